@@ -0,0 +1,44 @@
+"""
+Admin API endpoints (index hot-swap)
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel, Field
+from app.core.config import settings
+from app.services.index_swapper import get_index_swapper
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set, then require it"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API bị tắt (ADMIN_TOKEN chưa được cấu hình)")
+    if x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="X-Admin-Token không hợp lệ")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+class IndexSwapRequest(BaseModel):
+    """Request model for index swap endpoint"""
+    version: Optional[str] = Field(None, description="Index version under INDEX_ROOT (default: the one named by CURRENT)")
+
+@router.get("/index")
+async def index_status():
+    """Served index version, in-flight requests and the last swap"""
+    return get_index_swapper().stats()
+
+@router.post("/index/swap")
+async def swap_index(request: IndexSwapRequest):
+    """
+    Load an index version in the background and swap it in once warm
+    
+    Returns after the swap and the drain of the previous version.
+    """
+    swapper = get_index_swapper()
+    version = request.version or swapper.manager.pointer_version()
+    if not version:
+        raise HTTPException(status_code=400, detail="Không có phiên bản index (version hoặc INDEX_ROOT/CURRENT)")
+    try:
+        return await swapper.swap(version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi khi nạp index '{version}': {str(e)}")
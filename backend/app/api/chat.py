@@ -1,36 +1,116 @@
 """
 Chat API endpoints
 """
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import ChatRequest, ChatResponse
-from app.services.rag_service import rag_service
+import json
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.core.config import settings
+from app.core.corpus_registry import get_corpus_registry
+from app.core.embedding_batcher import get_embedding_batcher
+from app.core.embedding_cache import get_embedding_cache
+from app.models.schemas import BatchChatItem, BatchChatRequest, ChatRequest, ChatResponse
+from app.services.admission import AdmissionRejected, get_admission_controller
+from app.services.answer_cache import get_answer_cache
+from app.services.llm_service import LLMServiceError, get_llm_service
+from app.services.reranker import get_reranker
+from app.services.session_store import SessionNotFoundError, get_session_store
+from app.services.warmup import aget_rag_service, get_warmup
 
 router = APIRouter()
 
+def client_id(http_request: Request) -> str:
+    """
+    Rate-limit key: the client IP
+    
+    Client-supplied headers are not trusted: behind a proxy listed in
+    RATE_LIMIT_TRUSTED_PROXIES the key is the last X-Forwarded-For hop that
+    is not one of those proxies.
+    """
+    host = http_request.client.host if http_request.client else "unknown"
+    trusted = {proxy.strip() for proxy in settings.RATE_LIMIT_TRUSTED_PROXIES.split(",") if proxy.strip()}
+    if host not in trusted:
+        return host
+    hops = [hop.strip() for hop in http_request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in trusted:
+            return hop
+    return host
+
+def rejection(e: AdmissionRejected) -> HTTPException:
+    """Fast 429/503 with Retry-After for a shed request"""
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def check_rate(http_request: Request, cost: int = 1):
+    """Per-client rate limit (raises the 429); LLM slots are taken around the LLM call itself"""
+    try:
+        get_admission_controller().check_rate(client_id(http_request), cost)
+    except AdmissionRejected as e:
+        raise rejection(e)
+
+def open_session(session_id: Optional[str]) -> str:
+    """Session of the request: a new server-issued one without an ID, 404 for unknown/expired IDs"""
+    store = get_session_store()
+    if session_id is None:
+        return store.create().session_id
+    try:
+        return store.get(session_id).session_id
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Không tìm thấy phiên hội thoại (hết hạn hoặc không tồn tại)")
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
     """
     Chat endpoint 
     
+    Requests past the client's rate limit get 429, requests that cannot get
+    an LLM slot within ADMISSION_MAX_WAIT_SECONDS get 503 (both with Retry-After).
+    Without session_id a new session is started; its ID is returned for follow-ups.
+    
     Args:
-        request: ChatRequest with question, n_results, show_sources, model
+        request: ChatRequest with question, n_results, show_sources, model, session_id, chapters, articles, shards
+        http_request: Raw request (client identity for rate limiting)
         
     Returns:
-        ChatResponse with answer and sources
+        ChatResponse with answer, sources and session_id
     """
+    check_rate(http_request)
+    session_id = open_session(request.session_id)
     try:
         # Call RAG service
-        answer, sources = rag_service.query(
+        rag_service = await aget_rag_service()
+        answer, sources = await rag_service.aquery(
             question=request.question, 
             n_results=request.n_results,
             show_sources=request.show_sources,
-            model=request.model
+            model=request.model,
+            session_id=session_id,
+            filters={"chapters": request.chapters, "articles": request.articles, "shards": request.shards}
         )
         
         return ChatResponse(
             answer=answer,
             sources=sources if request.show_sources else None,
-            question=request.question
+            question=request.question,
+            session_id=session_id
+        )
+    
+    except AdmissionRejected as e:
+        raise rejection(e)
+    
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Không tìm thấy phiên hội thoại (hết hạn hoặc không tồn tại)")
+    
+    except ValueError as e:
+        # Invalid request filters (unknown corpus shard)
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    except LLMServiceError as e:
+        # Upstream LLM unavailable/over budget (retryable) vs rejected the request
+        raise HTTPException(
+            status_code=503 if e.retryable else 502,
+            detail=f"Lỗi khi gọi mô hình ngôn ngữ: {str(e)}",
+            headers={"Retry-After": str(get_admission_controller().retry_after())} if e.retryable else None
         )
     
     except Exception as e:
@@ -39,10 +119,170 @@ async def chat_endpoint(request: ChatRequest):
             detail=f"Lỗi khi xử lý câu hỏi: {str(e)}"
         )
 
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    """
+    Streaming chat endpoint (server-sent events)
+    
+    Events: "sources" (after retrieval), "token" (answer deltas),
+    "done" (timing metadata, session_id) or "error". The rate limit and the
+    session check run before the stream starts (plain 429/404); an LLM slot
+    is only requested after "sources", a shed request gets an "error" event
+    with retry_after.
+    
+    Args:
+        request: ChatRequest with question, n_results, show_sources, model, session_id, chapters, articles, shards
+        http_request: Raw request (client identity for rate limiting)
+        
+    Returns:
+        StreamingResponse with text/event-stream content
+    """
+    check_rate(http_request)
+    session_id = open_session(request.session_id)
+    
+    async def event_stream():
+        try:
+            rag_service = await aget_rag_service()
+            async for event, data in rag_service.astream_query(
+                question=request.question,
+                n_results=request.n_results,
+                show_sources=request.show_sources,
+                model=request.model,
+                session_id=session_id,
+                filters={"chapters": request.chapters, "articles": request.articles, "shards": request.shards}
+            ):
+                yield format_sse(event, data)
+        
+        except AdmissionRejected as e:
+            yield format_sse("error", {"detail": str(e), "retry_after": e.retry_after})
+        
+        except Exception as e:
+            yield format_sse("error", {"detail": f"Lỗi khi xử lý câu hỏi: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+        }
+    )
+
+@router.post("/chat/batch")
+async def chat_batch_endpoint(request: BatchChatRequest, http_request: Request):
+    """
+    Batch chat endpoint (newline-delimited JSON)
+    
+    All questions are encoded and retrieved together; answers are generated
+    concurrently and each line is sent as soon as its answer completes.
+    LLM calls take admission slots at batch priority, behind interactive chat;
+    the batch is charged one rate-limit token per question.
+    
+    Args:
+        request: BatchChatRequest with questions, n_results, show_sources, model
+        http_request: Raw request (client identity for rate limiting)
+        
+    Returns:
+        StreamingResponse with one BatchChatItem per line (application/x-ndjson)
+    """
+    questions = [question.strip() for question in request.questions]
+    if not all(questions):
+        raise HTTPException(status_code=422, detail="Câu hỏi không được để trống")
+    check_rate(http_request, cost=len(questions))
+    
+    async def ndjson_stream():
+        try:
+            rag_service = await aget_rag_service()
+            async for item in rag_service.query_batch(
+                questions=questions,
+                n_results=request.n_results,
+                show_sources=request.show_sources,
+                model=request.model
+            ):
+                yield BatchChatItem(**item).model_dump_json() + "\n"
+        
+        except Exception as e:
+            yield json.dumps({"error": f"Lỗi khi xử lý câu hỏi: {str(e)}"}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+@router.get("/embedding/stats")
+async def embedding_stats():
+    """Queue depth and batch-size stats of the embedding scheduler, cache hit/miss counters"""
+    return {
+        "batching_enabled": settings.EMBEDDING_BATCHING_ENABLED,
+        **get_embedding_batcher().stats(),
+        "cache": get_embedding_cache().stats() if settings.EMBEDDING_CACHE_ENABLED else None
+    }
+
+@router.get("/answer-cache/stats")
+async def answer_cache_stats():
+    """Hit/miss counters of the semantic answer cache"""
+    return {
+        "enabled": settings.ANSWER_CACHE_ENABLED,
+        **get_answer_cache().stats()
+    }
+
+@router.get("/admission/stats")
+async def admission_stats():
+    """LLM slot pool, queue, adaptive limit and rejection counters"""
+    return get_admission_controller().stats()
+
+@router.get("/rerank/stats")
+async def rerank_stats():
+    """Reranker budget, cache and cost counters"""
+    if not settings.RERANK_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **get_reranker().stats()}
+
+@router.get("/corpus")
+async def corpus_shards():
+    """Registered documents (corpus shards) and their versions"""
+    return {"shards": get_corpus_registry().describe()}
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Forget a chat session's history (the server-issued ID is the credential)"""
+    if not get_session_store().delete(session_id):
+        raise HTTPException(status_code=404, detail="Không tìm thấy phiên hội thoại")
+    return {"deleted": session_id}
+
+@router.get("/sessions/stats")
+async def session_stats():
+    """Active sessions and expiry/eviction counters"""
+    return get_session_store().stats()
+
+@router.get("/llm/stats")
+async def llm_stats():
+    """Retry, timeout, hedge and fallback counters of the LLM call layer"""
+    return {
+        "hedge_enabled": settings.LLM_HEDGE_ENABLED,
+        "fallback_model": settings.LLM_FALLBACK_MODEL,
+        **get_llm_service().stats()
+    }
+
 @router.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check: the process is up (components may still be warming)"""
     return {
         "status": "healthy",
-        "service": "Traffic Law Chatbot API"
-    }
\ No newline at end of file
+        "service": "Traffic Law Chatbot API",
+        "ready": get_warmup().ready
+    }
+
+@router.get("/ready")
+async def readiness_check():
+    """Readiness check: 200 once vector store, embedding model and indexes are warm, 503 before"""
+    warmup = get_warmup()
+    return JSONResponse(
+        status_code=200 if warmup.ready else 503,
+        content=warmup.stats()
+    )
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Article-level centroid index - routes a query to its most likely articles
+before chunk-level search
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
+from app.core.index_manager import current_index
+
+class ArticleIndex:
+    """
+    One normalized centroid per article (mean of its chunk embeddings), with
+    the article → chapter and article → chunk IDs mappings from the chunk
+    metadata emitted by flatten_to_chunks.
+    """
+
+    def __init__(self, ids: List[str], embeddings: np.ndarray, metadatas: List[Dict]):
+        self.article_chunks: Dict[str, List[str]] = {}
+        self.article_chapter: Dict[str, str] = {}
+        rows: Dict[str, List[int]] = {}
+        for i, (chunk_id, metadata) in enumerate(zip(ids, metadatas)):
+            article = metadata.get('article_number')
+            if article is None:
+                continue
+            article = str(article)
+            rows.setdefault(article, []).append(i)
+            self.article_chunks.setdefault(article, []).append(chunk_id)
+            self.article_chapter.setdefault(article, str(metadata.get('chapter_number', '')))
+
+        self.articles: List[str] = list(rows)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        centroids = np.stack([embeddings[rows[article]].mean(axis=0) for article in self.articles])
+        self.centroids = centroids / np.linalg.norm(centroids, axis=1, keepdims=True).clip(min=1e-12)
+
+    @classmethod
+    def from_collection(cls, collection) -> "ArticleIndex":
+        """Build from every chunk stored in the vector collection"""
+        data = collection.get(include=['metadatas', 'embeddings'])
+        return cls(data['ids'], data['embeddings'], data['metadatas'])
+
+    def articles_in(self, chapters: Iterable[str]) -> List[str]:
+        """Articles belonging to the given chapters"""
+        chapters = {str(chapter) for chapter in chapters}
+        return [article for article in self.articles if self.article_chapter[article] in chapters]
+
+    def route(self, query_embedding: np.ndarray, top_k: int, candidates: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Top articles by cosine similarity of the query to the article centroids
+
+        Args:
+            query_embedding: Normalized query embedding
+            top_k: Number of articles to keep
+            candidates: Restrict routing to these articles (explicit filters)
+
+        Returns:
+            Article numbers, best first
+        """
+        positions = np.arange(len(self.articles))
+        if candidates is not None:
+            wanted = set(map(str, candidates))
+            positions = np.array([i for i, article in enumerate(self.articles) if article in wanted], dtype=int)
+            if positions.size == 0:
+                return []
+        scores = self.centroids[positions] @ np.asarray(query_embedding, dtype=np.float32)
+        order = np.argsort(-scores)[:top_k]
+        return [self.articles[positions[i]] for i in order]
+
+    def chunk_ids(self, articles: Iterable[str]) -> Set[str]:
+        """All chunk IDs of the given articles"""
+        return {chunk_id for article in articles for chunk_id in self.article_chunks.get(str(article), ())}
+
+def get_article_index() -> ArticleIndex:
+    """Article centroid index of the served index version (built on first use)."""
+    return current_index().article_index()
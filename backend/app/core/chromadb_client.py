@@ -1,22 +1,28 @@
 """
-ChromaDB client singleton
+ChromaDB access - resolved through the index version being served
+(see app/core/index_manager.py), so a hot-swapped index needs no restart
 """
 
 import chromadb
-from functools import lru_cache
-from app.core.config import settings
+from app.core.index_manager import current_index
 
-@lru_cache()
 def get_chromadb_client() -> chromadb.Client:
-    """Create and return a ChromaDB client singleton."""
-    client = chromadb.PersistentClient(path=str(settings.CHROMADB_PATH))
-    print(f"ChromaDB client initialized at {settings.CHROMADB_PATH}")
-    return client
+    """ChromaDB client of the served index version."""
+    return current_index().chroma_client()
 
-@lru_cache()
 def get_collection() -> chromadb.Collection:
-    """Get or create the ChromaDB collection."""
-    client = get_chromadb_client()
-    collection = client.get_collection(name=settings.COLLECTION_NAME)
-    print(f"ChromaDB collection '{settings.COLLECTION_NAME}' is ready.")
-    return collection
\ No newline at end of file
+    """
+    Get the law collection of the served index version.
+    
+    Returns the ChromaDB collection, or a NumpyVectorStore (same query/get
+    interface) when VECTOR_STORE_BACKEND is "numpy". Inside a request this is
+    the version the request is pinned to.
+    """
+    return current_index().collection
+
+def get_index_version() -> str:
+    """
+    Version string of the law collection, changes whenever the index is
+    swapped, rebuilt (new collection ID) or written to (sqlite file modified).
+    """
+    return current_index().version
@@ -4,6 +4,7 @@ Configuration và settings từ environment variables
 
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Optional
 
 class Settings(BaseSettings):
     # API key
@@ -15,17 +16,131 @@ class Settings(BaseSettings):
     # ChromaDB 
     COLLECTION_NAME: str = "law_traffic_vietnam"
 
+    # Versioned indexes: INDEX_ROOT/<version>/{chroma, law_bm25_index.npz, law_numpy_index},
+    # INDEX_ROOT/CURRENT names the served version (legacy paths below when absent)
+    INDEX_ROOT: Path = PROJECT_ROOT / "data" / "indexes"
+    INDEX_WATCH_ENABLED: bool = False  # swap when CURRENT changes
+    INDEX_WATCH_INTERVAL_SECONDS: float = 5.0
+    INDEX_DRAIN_TIMEOUT_SECONDS: float = 60.0
+    ADMIN_TOKEN: Optional[str] = None  # X-Admin-Token of /api/admin endpoints (disabled when unset)
+
+    # Corpus registry (one collection per legal document, fan-out search)
+    CORPUS_REGISTRY_PATH: Path = PROJECT_ROOT / "data" / "corpus_registry.json"
+    SHARD_FANOUT_WORKERS: int = 8
+
+    # Vector store backend: "chroma" or "numpy" (exact search, memory-mapped)
+    VECTOR_STORE_BACKEND: str = "chroma"
+    NUMPY_INDEX_PATH: Path = PROJECT_ROOT / "data" / "law_numpy_index"
+
+    # Processed data
+    LAW_CHUNKS_PATH: Path = PROJECT_ROOT / "data" / "processed" / "law_chunks.json"
+    LAW_STRUCTURE_PATH: Path = PROJECT_ROOT / "data" / "processed" / "law_structure.json"
+    INDEX_STATE_PATH: Path = PROJECT_ROOT / "data" / "index_state.sqlite3"
+
     # Embedding model
     EMBEDDING_MODEL: str = "BAAI/bge-m3"
+    # "sentence_transformers" | "onnx" | "onnx_int8" (see scripts/export_onnx_embedding.py)
+    # | "remote" (shared server, see scripts/embedding_server.py)
+    EMBEDDING_BACKEND: str = "sentence_transformers"
+    ONNX_MODEL_PATH: Path = PROJECT_ROOT / "data" / "onnx" / "bge-m3"
+    ONNX_NUM_THREADS: int = 0  # 0 = ONNX Runtime default
+    EMBEDDING_MAX_LENGTH: int = 512
+    EMBEDDING_SERVER_SOCKET: Path = Path("/tmp/law-embedding.sock")  # EMBEDDING_BACKEND=remote
+    EMBEDDING_SERVER_TIMEOUT_SECONDS: float = 30.0
+    EMBEDDING_BATCHING_ENABLED: bool = True
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_DISK_ENABLED: bool = False
+    EMBEDDING_CACHE_DISK_PATH: Path = PROJECT_ROOT / "data" / "query_embedding_cache.sqlite3"
+    EMBEDDING_CACHE_DISK_SIZE: int = 200000
 
     # LLM 
     DEFAULT_LLM_MODEL: str = "llama-3.3-70b-versatile"
     LLM_TEMPERATURE: float = 0.2
     LLM_MAX_TOKENS: int = 1500
     LLM_TOP_P: float = 0.9
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    GROQ_BASE_URL: Optional[str] = None  # e.g. http://127.0.0.1:8100 for scripts/stub_llm_server.py
+
+    # LLM tail latency (deadlines, retries, hedging, fallback)
+    LLM_ATTEMPT_TIMEOUT_SECONDS: float = 20.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5
+    LLM_BACKOFF_MAX_SECONDS: float = 8.0
+    LLM_PRIMARY_BUDGET_SECONDS: float = 30.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_AFTER_SECONDS: float = 4.0
+    LLM_FALLBACK_MODEL: Optional[str] = None  # opt-in, e.g. "llama-3.1-8b-instant" (answers from a smaller model)
+    LLM_FALLBACK_BUDGET_SECONDS: float = 20.0
     
     # RAG
     DEFAULT_N_RESULTS: int = 5
+    RAG_EXECUTOR_WORKERS: int = 4
+    BATCH_LLM_CONCURRENCY: int = 4
+
+    # Admission control in front of the LLM: bounded slot pool, queue deadline, per-client rate limit
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENT: int = 16
+    ADMISSION_MIN_CONCURRENT: int = 2  # floor of the adaptive limit (shrinks on provider overload)
+    ADMISSION_MAX_QUEUE: int = 64
+    ADMISSION_MAX_WAIT_SECONDS: float = 5.0
+    ADMISSION_BATCH_MAX_WAIT_SECONDS: float = 120.0
+    RATE_LIMIT_PER_MINUTE: float = 30.0  # per client IP; 0 disables
+    RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_TRUSTED_PROXIES: str = ""  # comma-separated proxy IPs whose X-Forwarded-For is trusted
+    RATE_LIMIT_MAX_CLIENTS: int = 10000
+
+    # Startup warm-up (parallel component loading, /api/ready)
+    WARMUP_ENABLED: bool = True
+    WARMUP_QUERY: str = "Người điều khiển xe ô tô phải tuân thủ những quy định gì?"
+
+    # Hybrid retrieval (BM25 + dense, reciprocal rank fusion)
+    HYBRID_SEARCH_ENABLED: bool = True
+    BM25_INDEX_PATH: Path = PROJECT_ROOT / "data" / "law_bm25_index.npz"
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+
+    # Cross-encoder reranking (second retrieval stage)
+    RERANK_ENABLED: bool = False
+    RERANKER_MODEL: str = "BAAI/bge-reranker-v2-m3"
+    RERANK_CANDIDATES: int = 20
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_MAX_LENGTH: int = 512
+    RERANK_BUDGET_MS: float = 300.0
+    RERANK_CACHE_SIZE: int = 50000
+
+    # Article routing (query → top articles by centroid, then chunk search within them)
+    # Off by default: recall on benchmark_questions.json should be checked first
+    ARTICLE_ROUTING_ENABLED: bool = False
+    ARTICLE_ROUTING_TOP_K: int = 10
+
+    # Direct citation fast path ("Điều X Khoản Y" → exact provision, no vector search)
+    CITATION_FAST_PATH_ENABLED: bool = True
+    CITATION_MAX_CHUNKS: int = 20
+
+    # Context builder (merge sibling chunks, prompt-token budget)
+    CONTEXT_BUILDER_ENABLED: bool = True
+    CONTEXT_TOKEN_BUDGET: int = 1500
+    CONTEXT_CHARS_PER_TOKEN: float = 3.0
+
+    # Chat sessions (multi-turn history)
+    SESSION_TTL_SECONDS: float = 1800.0
+    SESSION_MAX_SESSIONS: int = 10000
+    SESSION_MAX_TURNS: int = 6
+    SESSION_HISTORY_TOKEN_BUDGET: int = 400
+    SESSION_SUMMARY_TOKEN_BUDGET: int = 100
+    SESSION_ANSWER_MAX_CHARS: int = 600
+    SESSION_FOLLOWUP_MAX_WORDS: int = 6
+
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: float = 86400.0
+    ANSWER_CACHE_MAX_SIZE: int = 5000
 
     class Config:
         env_file = ".env"
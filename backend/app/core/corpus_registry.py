@@ -0,0 +1,125 @@
+"""
+Corpus registry - one vector collection (shard) per legal document
+
+Registry file (CORPUS_REGISTRY_PATH, JSON):
+    {"shards": [{"id": "luat-gtdb-2008", "collection": "law_traffic_vietnam",
+                 "title": "Luật Giao thông đường bộ 2008", "document_number": "23/2008/QH12",
+                 "version": "2008", "effective_date": "2009-07-01",
+                 "status": "active", "default": true}, ...]}
+
+Every shard is a collection in CHROMADB_PATH built with the same embedding
+model (scripts/build_index.py --collection <name>), so L2 distances are
+comparable across shards. The primary shard (COLLECTION_NAME) is the one the
+BM25, structure and article indexes are built from.
+"""
+
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+from app.core.index_manager import current_index
+from app.core.config import settings
+
+T = TypeVar("T")
+
+class Shard:
+    """One registered document and its collection"""
+    __slots__ = ("id", "collection", "title", "document_number", "version", "effective_date", "status", "default")
+
+    def __init__(
+        self,
+        id: str,
+        collection: str,
+        title: str = "",
+        document_number: str = "",
+        version: str = "",
+        effective_date: str = "",
+        status: str = "active",
+        default: bool = True
+    ):
+        self.id = id
+        self.collection = collection
+        self.title = title or collection
+        self.document_number = document_number
+        self.version = version
+        self.effective_date = effective_date
+        self.status = status
+        self.default = default
+
+    @property
+    def primary(self) -> bool:
+        return self.collection == settings.COLLECTION_NAME
+
+    def to_dict(self) -> Dict:
+        return {**{name: getattr(self, name) for name in self.__slots__}, "primary": self.primary}
+
+class CorpusRegistry:
+    """Registered shards and per-request shard selection"""
+
+    def __init__(self, shards: List[Shard]):
+        if not shards:
+            raise ValueError("Corpus registry has no shards")
+        self.shards: Dict[str, Shard] = {shard.id: shard for shard in shards}
+
+    @classmethod
+    def load(cls) -> "CorpusRegistry":
+        """Read CORPUS_REGISTRY_PATH; without a registry file the corpus is the single COLLECTION_NAME shard"""
+        path = settings.CORPUS_REGISTRY_PATH
+        if not path.exists():
+            return cls([Shard(id=settings.COLLECTION_NAME, collection=settings.COLLECTION_NAME)])
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([Shard(**entry) for entry in data["shards"]])
+
+    def select(self, shard_ids: Optional[Iterable[str]] = None) -> List[Shard]:
+        """
+        Shards searched by a request
+
+        Args:
+            shard_ids: Requested shard IDs (None: the active default shards)
+
+        Returns:
+            Selected shards
+
+        Raises:
+            ValueError: Unknown shard ID
+        """
+        if not shard_ids:
+            return [shard for shard in self.shards.values() if shard.default and shard.status == "active"]
+        unknown = [shard_id for shard_id in shard_ids if shard_id not in self.shards]
+        if unknown:
+            raise ValueError(f"Unknown corpus shard(s): {', '.join(unknown)}")
+        return [self.shards[shard_id] for shard_id in dict.fromkeys(shard_ids)]
+
+    def describe(self) -> List[Dict]:
+        return [shard.to_dict() for shard in self.shards.values()]
+
+@lru_cache()
+def get_corpus_registry() -> CorpusRegistry:
+    """Load the corpus registry (singleton)."""
+    registry = CorpusRegistry.load()
+    print(f"Corpus registry loaded ({len(registry.shards)} shards).")
+    return registry
+
+def get_shard_collection(collection_name: str):
+    """Collection of a shard in the served index version; the primary shard goes through the configured vector store backend."""
+    return current_index().shard_collection(collection_name)
+
+@lru_cache()
+def get_fanout_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool of the shard fan-out.
+
+    Separate from the RAG executor: searches already run on RAG executor
+    threads, waiting there on tasks of the same pool could deadlock it.
+    """
+    return ThreadPoolExecutor(max_workers=settings.SHARD_FANOUT_WORKERS, thread_name_prefix="shard")
+
+def fan_out(fn: Callable[[Shard], T], shards: List[Shard]) -> List[T]:
+    """Run fn for every shard concurrently, results in shard order"""
+    if len(shards) == 1:
+        return [fn(shards[0])]
+    # Each task runs in a copy of the caller's context (request-scoped stage timings)
+    futures = [get_fanout_executor().submit(contextvars.copy_context().run, fn, shard) for shard in shards]
+    return [future.result() for future in futures]
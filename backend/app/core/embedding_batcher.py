@@ -0,0 +1,152 @@
+"""
+Dynamic micro-batching scheduler for query embeddings
+"""
+
+import asyncio
+import time
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.embedding_model import get_embedding_model
+from app.core.executor import run_blocking
+
+class EmbeddingBatcher:
+    """
+    Collect concurrent encode requests and run them as one batched encode call.
+
+    A batch is dispatched when it reaches max_batch_size or when window_ms
+    has passed since its first query arrived.
+    """
+
+    def __init__(self, max_batch_size: int = None, window_ms: float = None):
+        self.max_batch_size = max_batch_size or settings.EMBEDDING_BATCH_MAX_SIZE
+        self.window = (window_ms if window_ms is not None else settings.EMBEDDING_BATCH_WINDOW_MS) / 1000
+        self._queue: asyncio.Queue = None
+        self._worker: asyncio.Task = None
+        self._loop: asyncio.AbstractEventLoop = None
+
+        # Stats
+        self.batches = 0
+        self.items = 0
+        self.max_seen_batch_size = 0
+        self.last_batch_size = 0
+        self.encode_seconds = 0.0
+        self.batch_size_counts: Dict[int, int] = {}
+
+    def _ensure_started(self):
+        """Start the worker task on the running event loop (lazily)"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def encode(self, text: str) -> np.ndarray:
+        """
+        Encode one query, batched together with other concurrent queries
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            Normalized embedding vector
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait for the first query, then collect more until the window closes or batch is full"""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.window
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Callers that gave up (cancelled) don't need an embedding
+        return [(text, future) for text, future in batch if not future.done()]
+
+    async def _run(self):
+        """Worker loop: collect → encode in one call → hand vectors back"""
+        model = get_embedding_model()
+
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+
+            texts = [text for text, _ in batch]
+            start = time.perf_counter()
+            try:
+                embeddings = await run_blocking(
+                    model.encode,
+                    texts,
+                    batch_size=len(texts),
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self._record_batch(len(texts), time.perf_counter() - start)
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+    def _record_batch(self, size: int, seconds: float):
+        """Update batch statistics"""
+        self.batches += 1
+        self.items += size
+        self.last_batch_size = size
+        self.max_seen_batch_size = max(self.max_seen_batch_size, size)
+        self.encode_seconds += seconds
+        self.batch_size_counts[size] = self.batch_size_counts.get(size, 0) + 1
+
+    def stats(self) -> Dict:
+        """Queue depth and batch-size statistics"""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_seen_batch_size,
+            "last_batch_size": self.last_batch_size,
+            "avg_encode_ms": round(self.encode_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "config": {
+                "max_batch_size": self.max_batch_size,
+                "window_ms": self.window * 1000
+            }
+        }
+
+    async def stop(self):
+        """Cancel the worker task (called on application shutdown)"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+@lru_cache()
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Create and return the embedding batcher singleton."""
+    batcher = EmbeddingBatcher()
+    print(f"Embedding batcher ready (max batch {batcher.max_batch_size}, window {batcher.window * 1000:.1f} ms).")
+    return batcher
@@ -0,0 +1,231 @@
+"""
+Query embedding cache: in-process LRU + optional sqlite tier that survives restarts
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.core.metrics import record_cache
+from app.core.text_normalization import normalize_query
+
+class SqliteEmbeddingStore:
+    """Size-bounded on-disk embedding store (least recently used rows are evicted)"""
+
+    def __init__(self, path: Path, max_size: int):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_query_embeddings_last_used "
+            "ON query_embeddings(last_used)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Read an embedding and refresh its last-used time"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT embedding FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE query_embeddings SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, key: str, embedding: np.ndarray):
+        """Insert an embedding, evicting the oldest rows when over max_size"""
+        blob = np.asarray(embedding, dtype=np.float32).tobytes()
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO query_embeddings (key, embedding, last_used) VALUES (?, ?, ?)",
+                (key, blob, now)
+            )
+            if cursor.rowcount:
+                self._size += 1
+            else:
+                # Existing key (e.g. written by another worker): refresh it, the row count is unchanged
+                self._conn.execute(
+                    "UPDATE query_embeddings SET embedding = ?, last_used = ? WHERE key = ?", (blob, now, key)
+                )
+            if self._size > self.max_size:
+                # Evict 10% at once so we don't delete on every insert
+                n_evict = self._size - int(self.max_size * 0.9)
+                self._conn.execute(
+                    "DELETE FROM query_embeddings WHERE key IN ("
+                    "SELECT key FROM query_embeddings ORDER BY last_used LIMIT ?)",
+                    (n_evict,)
+                )
+                self._size = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        """Delete all rows"""
+        with self._lock:
+            self._conn.execute("DELETE FROM query_embeddings")
+            self._conn.commit()
+            self._size = 0
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache of query embeddings keyed on the normalized question.
+
+    Lookups go memory → disk; disk hits are promoted to memory. On the event
+    loop use aget/aput: the memory tier is read inline, the sqlite tier runs
+    on the executor.
+    """
+
+    def __init__(
+        self,
+        max_size: int = None,
+        disk_path: Optional[Path] = None,
+        disk_max_size: int = None,
+        model_name: str = None
+    ):
+        self.max_size = max_size or settings.EMBEDDING_CACHE_SIZE
+        # Backend is part of the key: int8/ONNX vectors differ slightly from fp32 ones
+        self.model_name = model_name or f"{settings.EMBEDDING_MODEL}:{settings.EMBEDDING_BACKEND}"
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = SqliteEmbeddingStore(
+            disk_path, disk_max_size or settings.EMBEDDING_CACHE_DISK_SIZE
+        ) if disk_path else None
+
+        # Stats
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def make_key(self, query: str) -> str:
+        """Cache key: model name + normalized question"""
+        normalized = normalize_query(query)
+        return hashlib.sha1(f"{self.model_name}\x00{normalized}".encode('utf-8')).hexdigest()
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """
+        Look up a cached embedding
+        
+        Args:
+            query: User's question (raw)
+            
+        Returns:
+            Embedding or None on miss
+        """
+        key = self.make_key(query)
+        embedding = self._get_memory(key)
+        if embedding is None and self._disk is not None:
+            embedding = self._get_disk(key)
+        return self._record(embedding)
+
+    async def aget(self, query: str) -> Optional[np.ndarray]:
+        """get() without blocking the event loop on the sqlite tier"""
+        key = self.make_key(query)
+        embedding = self._get_memory(key)
+        if embedding is None and self._disk is not None:
+            embedding = await run_blocking(self._get_disk, key)
+        return self._record(embedding)
+
+    def _get_memory(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+        return embedding
+
+    def _get_disk(self, key: str) -> Optional[np.ndarray]:
+        """Disk lookup (blocking); hits are promoted to memory"""
+        embedding = self._disk.get(key)
+        if embedding is not None:
+            self._put_memory(key, embedding)
+            with self._lock:
+                self.disk_hits += 1
+        return embedding
+
+    def _record(self, embedding: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if embedding is None:
+            with self._lock:
+                self.misses += 1
+        record_cache("embedding", embedding is not None)
+        return embedding
+
+    def put(self, query: str, embedding: np.ndarray):
+        """
+        Store an embedding in both tiers
+        
+        Args:
+            query: User's question (raw)
+            embedding: Normalized query embedding
+        """
+        key = self.make_key(query)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        self._put_memory(key, embedding)
+        if self._disk is not None:
+            self._disk.put(key, embedding)
+
+    async def aput(self, query: str, embedding: np.ndarray):
+        """put() without blocking the event loop on the sqlite tier"""
+        key = self.make_key(query)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        self._put_memory(key, embedding)
+        if self._disk is not None:
+            await run_blocking(self._disk.put, key, embedding)
+
+    def _put_memory(self, key: str, embedding: np.ndarray):
+        with self._lock:
+            self._memory[key] = embedding
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached embeddings (e.g. when the embedding model changes)"""
+        with self._lock:
+            self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_size": len(self._memory),
+            "memory_max_size": self.max_size,
+            "disk_size": len(self._disk) if self._disk is not None else None,
+            "disk_path": str(self._disk.path) if self._disk is not None else None
+        }
+
+@lru_cache()
+def get_embedding_cache() -> QueryEmbeddingCache:
+    """Create and return the query embedding cache singleton."""
+    disk_path = settings.EMBEDDING_CACHE_DISK_PATH if settings.EMBEDDING_CACHE_DISK_ENABLED else None
+    cache = QueryEmbeddingCache(disk_path=disk_path)
+    print(f"Query embedding cache ready (memory {cache.max_size}, disk {disk_path or 'disabled'}).")
+    return cache
@@ -2,17 +2,119 @@
 Embedding model singleton
 """
 
-from sentence_transformers import SentenceTransformer
 from functools import lru_cache
+from pathlib import Path
+from typing import List, Union
+import numpy as np
 from app.core.config import settings
 
+class OnnxEmbeddingModel:
+    """
+    bge-m3 dense encoder running on ONNX Runtime (fp32 or int8-quantized export).
+
+    Mirrors the part of SentenceTransformer.encode used by the app, so it can
+    be returned by get_embedding_model(). Export with scripts/export_onnx_embedding.py.
+    """
+
+    def __init__(self, model_dir: Path, model_file: str, max_length: int = None, num_threads: int = None):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=onnx/onnx_int8 requires onnxruntime and tokenizers "
+                "(pip install onnxruntime tokenizers)"
+            ) from e
+
+        model_dir = Path(model_dir)
+        self.max_length = max_length or settings.EMBEDDING_MAX_LENGTH
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_length)
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id("<pad>") or 0)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(model_dir / model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = None,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Encode sentences (CLS pooling, like bge-m3 dense embeddings)
+        
+        Args:
+            sentences: One sentence or a list of sentences
+            batch_size: Sentences per ONNX Runtime call
+            normalize_embeddings: L2-normalize the embeddings
+            
+        Returns:
+            (D,) array for one sentence, (N, D) array for a list
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        # Sort by length so each batch pads as little as possible
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+        for start in range(0, len(texts), batch_size):
+            batch_ids = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch_ids])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            }
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            last_hidden_state = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+            embeddings[batch_ids] = last_hidden_state[:, 0]
+
+        if normalize_embeddings:
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-12)
+        return embeddings[0] if single else embeddings
+
 @lru_cache()
-def get_embedding_model() -> SentenceTransformer:
+def get_embedding_model():
     """
     Load embedding model (singleton pattern)
     Only load once and reuse
+    
+    EMBEDDING_BACKEND selects the implementation:
+        "sentence_transformers" - full-precision SentenceTransformer (default)
+        "onnx"                  - fp32 ONNX Runtime export
+        "onnx_int8"             - int8-quantized ONNX Runtime export
+        "remote"                - shared embedding server (scripts/embedding_server.py)
     """
+    backend = settings.EMBEDDING_BACKEND
+    if backend == "remote":
+        from app.core.embedding_remote import RemoteEmbeddingModel
+
+        model = RemoteEmbeddingModel(settings.EMBEDDING_SERVER_SOCKET)
+        print(f"Embedding model '{model.info['model']}' connected (remote {model.info['backend']}, {settings.EMBEDDING_SERVER_SOCKET}).")
+        return model
+
+    if backend in ("onnx", "onnx_int8"):
+        model_file = "model_int8.onnx" if backend == "onnx_int8" else "model.onnx"
+        model = OnnxEmbeddingModel(settings.ONNX_MODEL_PATH, model_file, num_threads=settings.ONNX_NUM_THREADS)
+        print(f"Embedding model '{settings.EMBEDDING_MODEL}' loaded ({backend}, {settings.ONNX_MODEL_PATH / model_file}).")
+        return model
+
+    from sentence_transformers import SentenceTransformer
 
     model = SentenceTransformer(settings.EMBEDDING_MODEL)
     print(f"Embedding model '{settings.EMBEDDING_MODEL}' loaded.")
-    return model
\ No newline at end of file
+    return model
@@ -0,0 +1,135 @@
+"""
+Client for the shared embedding server (scripts/embedding_server.py)
+
+One server process owns the embedding model; API workers encode through a
+Unix socket, so the number of workers no longer multiplies model memory.
+
+Wire format, both directions: 8-byte header (JSON length, payload length,
+big-endian uint32) + JSON + raw payload. Embeddings travel as float32 bytes.
+"""
+import json
+import queue
+import socket
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+import numpy as np
+from app.core.config import settings
+
+FRAME_HEADER = struct.Struct("!II")
+
+def pack_message(header: Dict, payload: bytes = b"") -> bytes:
+    """Serialize one message (JSON header + binary payload)"""
+    body = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return FRAME_HEADER.pack(len(body), len(payload)) + body + payload
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def recv_message(sock: socket.socket) -> Tuple[Dict, bytes]:
+    """Read one message from a blocking socket"""
+    header_size, payload_size = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    header = json.loads(_recv_exact(sock, header_size))
+    return header, _recv_exact(sock, payload_size) if payload_size else b""
+
+async def aread_message(reader) -> Tuple[Dict, bytes]:
+    """Read one message from an asyncio StreamReader (server side)"""
+    header_size, payload_size = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    header = json.loads(await reader.readexactly(header_size))
+    return header, await reader.readexactly(payload_size) if payload_size else b""
+
+class RemoteEmbeddingModel:
+    """
+    SentenceTransformer-compatible encode() backed by the embedding server.
+
+    Connections are pooled, one request in flight per connection, so executor
+    threads can encode concurrently; the server batches across all clients.
+    """
+
+    def __init__(self, socket_path: Path, timeout: float = None, pool_size: int = None):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout or settings.EMBEDDING_SERVER_TIMEOUT_SECONDS
+        self._pool: "queue.LifoQueue[socket.socket]" = queue.LifoQueue(maxsize=pool_size or settings.RAG_EXECUTOR_WORKERS)
+        self.info = self.request({"op": "info"})[0]
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def request(self, header: Dict) -> Tuple[Dict, bytes]:
+        """
+        Send one request and wait for the reply (reconnects once on a stale connection)
+
+        Args:
+            header: Request JSON ("op" plus arguments)
+
+        Returns:
+            Tuple (reply header, reply payload)
+        """
+        for attempt in range(2):
+            try:
+                sock = self._pool.get_nowait()
+            except queue.Empty:
+                sock = self._connect()
+            try:
+                sock.sendall(pack_message(header))
+                reply, payload = recv_message(sock)
+            except (ConnectionError, BrokenPipeError, socket.timeout, OSError):
+                sock.close()
+                if attempt:
+                    raise
+                continue
+
+            try:
+                self._pool.put_nowait(sock)
+            except queue.Full:
+                sock.close()
+            if "error" in reply:
+                raise RuntimeError(f"Embedding server error: {reply['error']}")
+            return reply, payload
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Encode text(s) on the embedding server
+
+        Args:
+            sentences: One text or a list of texts
+            normalize_embeddings: L2-normalize the embeddings
+
+        Returns:
+            1-D embedding for one text, 2-D array for a list
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        reply, payload = self.request({"op": "encode", "texts": texts, "normalize": normalize_embeddings})
+        embeddings = np.frombuffer(payload, dtype=np.float32).reshape(reply["shape"])
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.info["dimension"]
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
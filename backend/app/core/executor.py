@@ -0,0 +1,42 @@
+"""
+Bounded thread pool for blocking RAG work (embedding, vector search)
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from app.core.config import settings
+
+@lru_cache()
+def get_executor() -> ThreadPoolExecutor:
+    """Create and return the shared executor singleton."""
+    executor = ThreadPoolExecutor(
+        max_workers=settings.RAG_EXECUTOR_WORKERS,
+        thread_name_prefix="rag-worker"
+    )
+    print(f"RAG executor initialized with {settings.RAG_EXECUTOR_WORKERS} workers.")
+    return executor
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking function on the shared executor without blocking the event loop
+
+    Args:
+        func: Blocking callable
+        *args, **kwargs: Arguments forwarded to func
+
+    Returns:
+        Return value of func
+    """
+    loop = asyncio.get_running_loop()
+    # Keep context variables (request-scoped state) visible inside the worker thread
+    ctx = contextvars.copy_context()
+    call = partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+def shutdown_executor():
+    """Shut down the shared executor (called on application shutdown)."""
+    if get_executor.cache_info().currsize:
+        get_executor().shutdown(wait=False, cancel_futures=True)
+        get_executor.cache_clear()
@@ -0,0 +1,296 @@
+"""
+Versioned vector index with zero-downtime hot-swap
+
+Layout of INDEX_ROOT (written by scripts/build_index.py --index-version):
+    <version>/chroma/               ChromaDB directory (primary + shard collections)
+    <version>/law_bm25_index.npz    BM25 index
+    <version>/law_numpy_index/      NumPy index (VECTOR_STORE_BACKEND=numpy)
+    <version>/law_chunks.json       chunks of the primary collection (chunk_<i> order)
+    <version>/law_structure.json    law hierarchy (structure index, context builder)
+    CURRENT                         name of the version to serve
+
+Without INDEX_ROOT/CURRENT the legacy paths (CHROMADB_PATH, BM25_INDEX_PATH,
+NUMPY_INDEX_PATH, LAW_CHUNKS_PATH, LAW_STRUCTURE_PATH) are served as version
+"legacy".
+
+A request pins the index it started on, so a swap never changes the index
+under a running query; the previous version is dropped once drained.
+"""
+
+import contextvars
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+import numpy as np
+from app.core.config import settings
+
+CHROMA_DIR = "chroma"
+BM25_FILE = "law_bm25_index.npz"
+NUMPY_DIR = "law_numpy_index"
+CHUNKS_FILE = "law_chunks.json"
+STRUCTURE_FILE = "law_structure.json"
+POINTER_FILE = "CURRENT"
+
+# Index pinned by the running request (IndexManager.pin)
+_pinned_index: contextvars.ContextVar[Optional["IndexBundle"]] = contextvars.ContextVar("pinned_index", default=None)
+
+class IndexBundle:
+    """
+    Everything loaded from one index version: the primary collection, the BM25
+    index, the law structure index, the article centroids and the collections
+    of the other corpus shards.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        chroma_path: Path,
+        bm25_path: Path,
+        numpy_path: Path,
+        chunks_path: Path,
+        structure_path: Path
+    ):
+        self.name = name
+        self.chroma_path = Path(chroma_path)
+        self.bm25_path = Path(bm25_path)
+        self.numpy_path = Path(numpy_path)
+        self.chunks_path = Path(chunks_path)
+        self.structure_path = Path(structure_path)
+        self.collection = None
+        self.load_times_ms: Dict[str, float] = {}
+        self.loaded_at: Optional[float] = None
+        self._client = None
+        self._lexical_index = None
+        self._structure_index = None
+        self._article_index = None
+        self._shards: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+        # Requests pinned to this version; a retired version is dropped once they finish
+        self.in_flight = 0
+        self.retired = False
+
+    @classmethod
+    def from_version(cls, version: str) -> "IndexBundle":
+        root = settings.INDEX_ROOT / version
+        if not version or "/" in version or not root.is_dir():
+            raise ValueError(f"Index version '{version}' not found in {settings.INDEX_ROOT}")
+        return cls(
+            version, root / CHROMA_DIR, root / BM25_FILE, root / NUMPY_DIR, root / CHUNKS_FILE, root / STRUCTURE_FILE
+        )
+
+    @classmethod
+    def legacy(cls) -> "IndexBundle":
+        return cls(
+            "legacy",
+            settings.CHROMADB_PATH,
+            settings.BM25_INDEX_PATH,
+            settings.NUMPY_INDEX_PATH,
+            settings.LAW_CHUNKS_PATH,
+            settings.LAW_STRUCTURE_PATH
+        )
+
+    def _timed(self, name: str, func):
+        start = time.perf_counter()
+        result = func()
+        self.load_times_ms[name] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    def load(self) -> "IndexBundle":
+        """Open the primary collection and the indexes enabled in settings (blocking)"""
+        if settings.VECTOR_STORE_BACKEND == "numpy":
+            from app.core.vector_store import load_numpy_store
+            self.collection = self._timed("vector_store", lambda: load_numpy_store(self.numpy_path))
+        else:
+            self.collection = self._timed(
+                "vector_store", lambda: self.chroma_client().get_collection(name=settings.COLLECTION_NAME)
+            )
+            print(f"ChromaDB collection '{settings.COLLECTION_NAME}' is ready (index {self.name}).")
+        if settings.HYBRID_SEARCH_ENABLED:
+            self._timed("lexical_index", self.lexical_index)
+        if settings.CITATION_FAST_PATH_ENABLED or settings.CONTEXT_BUILDER_ENABLED:
+            self._timed("structure_index", self.structure_index)
+        if settings.ARTICLE_ROUTING_ENABLED:
+            self._timed("article_index", self.article_index)
+        self.loaded_at = time.time()
+        return self
+
+    def warm(self, query_embedding: np.ndarray, query: str):
+        """One vector (+ BM25) query so the first request does not pay for page faults"""
+        self.collection.query(query_embeddings=[query_embedding.tolist()], n_results=settings.DEFAULT_N_RESULTS)
+        if settings.HYBRID_SEARCH_ENABLED:
+            self.lexical_index().search(query, settings.HYBRID_CANDIDATES)
+
+    def chroma_client(self):
+        with self._lock:
+            if self._client is None:
+                import chromadb
+                self._client = chromadb.PersistentClient(path=str(self.chroma_path))
+                print(f"ChromaDB client initialized at {self.chroma_path}")
+            return self._client
+
+    def lexical_index(self):
+        with self._lock:
+            if self._lexical_index is None:
+                from app.core.lexical_index import load_lexical_index
+                self._lexical_index = load_lexical_index(self.bm25_path, self.chunks_path)
+            return self._lexical_index
+
+    def structure_index(self):
+        with self._lock:
+            if self._structure_index is None:
+                from app.core.structure_index import load_structure_index
+                self._structure_index = load_structure_index(self.structure_path, self.chunks_path)
+            return self._structure_index
+
+    def article_index(self):
+        if self._article_index is None:
+            from app.core.article_index import ArticleIndex
+            index = ArticleIndex.from_collection(self.collection)
+            with self._lock:
+                if self._article_index is None:
+                    self._article_index = index
+                    print(f"Article index built ({len(index.articles)} articles, index {self.name}).")
+        return self._article_index
+
+    def shard_collection(self, collection_name: str):
+        """Collection of a corpus shard in this version (the primary one is self.collection)"""
+        if collection_name == settings.COLLECTION_NAME:
+            return self.collection
+        collection = self._shards.get(collection_name)
+        if collection is None:
+            collection = self.chroma_client().get_collection(name=collection_name)
+            self._shards[collection_name] = collection
+            print(f"ChromaDB collection '{collection_name}' is ready (index {self.name}).")
+        return collection
+
+    def close(self):
+        """
+        Release this version once no request uses it: stop its ChromaDB system
+        and drop the collections and indexes (and with them the mmap'd arrays)
+        """
+        with self._lock:
+            client, self._client = self._client, None
+            self.collection = None
+            self._lexical_index = None
+            self._structure_index = None
+            self._article_index = None
+            self._shards.clear()
+        if client is not None:
+            from chromadb.api.client import SharedSystemClient
+            # PersistentClients of one path share a System; stop it and drop it from chromadb's cache
+            system = SharedSystemClient._identifier_to_system.pop(client._identifier, None)
+            if system is not None:
+                system.stop()
+        print(f"Index {self.name} closed.")
+
+    @property
+    def version(self) -> str:
+        """
+        Changes whenever the index is swapped, rebuilt (new collection ID) or
+        written to (sqlite file modified)
+        """
+        if settings.VECTOR_STORE_BACKEND == "numpy":
+            return f"{self.name}:{self.collection.version}"
+        sqlite_path = self.chroma_path / "chroma.sqlite3"
+        mtime = sqlite_path.stat().st_mtime_ns if sqlite_path.exists() else 0
+        return f"{self.name}:{self.collection.id}:{mtime}"
+
+class IndexManager:
+    """Serves the current index version; new versions are installed atomically"""
+
+    def __init__(self):
+        version = self.pointer_version()
+        bundle = IndexBundle.from_version(version) if version else IndexBundle.legacy()
+        self.current: IndexBundle = bundle.load()
+        self._lock = threading.Lock()
+        self.swaps = 0
+
+    @staticmethod
+    def pointer_version() -> Optional[str]:
+        """Version named by INDEX_ROOT/CURRENT (None without a pointer file)"""
+        pointer = settings.INDEX_ROOT / POINTER_FILE
+        if not pointer.exists():
+            return None
+        return pointer.read_text(encoding="utf-8").strip() or None
+
+    def active(self) -> IndexBundle:
+        return _pinned_index.get() or self.current
+
+    @contextmanager
+    def pin(self) -> Iterator[IndexBundle]:
+        """Serve everything inside the block from the current version, even across a swap"""
+        pinned = _pinned_index.get()
+        if pinned is not None:
+            yield pinned
+            return
+
+        with self._lock:
+            bundle = self.current
+            bundle.in_flight += 1
+        _pinned_index.set(bundle)
+        try:
+            yield bundle
+        finally:
+            _pinned_index.set(None)
+            with self._lock:
+                bundle.in_flight -= 1
+
+    def install(self, bundle: IndexBundle) -> IndexBundle:
+        """
+        Make a loaded bundle current (new requests use it immediately)
+
+        Returns:
+            The previous bundle, retired; it is released once its requests drain
+        """
+        with self._lock:
+            previous, self.current = self.current, bundle
+            previous.retired = True
+            self.swaps += 1
+        return previous
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.current.name,
+            "pointer": self.pointer_version(),
+            "loaded_at": self.current.loaded_at,
+            "in_flight": self.current.in_flight,
+            "swaps": self.swaps
+        }
+
+@lru_cache()
+def get_index_manager() -> IndexManager:
+    """Load the current index version (singleton)."""
+    return IndexManager()
+
+def current_index() -> IndexBundle:
+    """Index of the running request (pinned), else the current version"""
+    return get_index_manager().active()
+
+def pins_index(func):
+    """Decorator: run a (sync, async or async generator) function with the index pinned"""
+    if inspect.isasyncgenfunction(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with get_index_manager().pin():
+                generator = func(*args, **kwargs)
+                try:
+                    async for item in generator:
+                        yield item
+                finally:
+                    await generator.aclose()
+    elif inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with get_index_manager().pin():
+                return await func(*args, **kwargs)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_index_manager().pin():
+                return func(*args, **kwargs)
+    return wrapper
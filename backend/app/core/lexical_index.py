@@ -0,0 +1,197 @@
+"""
+BM25 inverted index over the law chunks (lexical side of hybrid retrieval)
+
+On-disk format (numpy .npz, loaded without parsing):
+    terms      - vocabulary (sorted), term i owns postings[offsets[i]:offsets[i+1]]
+    offsets    - int64 (V + 1)
+    postings   - int32 document positions
+    weights    - float32 precomputed BM25 term weight of each posting
+    ids        - chunk IDs (document position → chunk ID)
+"""
+
+import json
+from pathlib import Path
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.text_normalization import normalize_query
+
+def tokenize(text: str) -> List[str]:
+    """
+    Vietnamese-aware tokenization: syllables + adjacent-syllable bigrams
+    
+    Vietnamese words are mostly 1-2 syllables ("giấy phép", "nồng độ"), so
+    bigrams approximate word segmentation without a segmenter.
+    
+    Args:
+        text: Raw text
+        
+    Returns:
+        List of tokens (bigrams joined with "_")
+    """
+    syllables = normalize_query(text).split()
+    bigrams = [f"{a}_{b}" for a, b in zip(syllables, syllables[1:])]
+    return syllables + bigrams
+
+def chunk_search_text(content: str, metadata: Dict) -> str:
+    """Text indexed for a chunk: reference (Điều/Khoản numbers) + article title + content"""
+    return f"{metadata.get('full_reference', '')} {metadata.get('article_title', '')} {content}"
+
+class BM25Index:
+    """Sparse BM25 index with precomputed per-posting weights (query = sum of slices)"""
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        weights: np.ndarray,
+        ids: np.ndarray
+    ):
+        self.term_index = {term: i for i, term in enumerate(terms.tolist())}
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+        self.ids = ids.tolist()
+        self.positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+    @classmethod
+    def build(
+        cls,
+        documents: Iterable[Tuple[str, str]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        min_bigram_df: int = 2
+    ) -> "BM25Index":
+        """
+        Build the index
+        
+        Args:
+            documents: (chunk_id, text) pairs
+            k1, b: BM25 parameters
+            min_bigram_df: Bigrams in fewer documents are dropped (keeps only common bigrams)
+            
+        Returns:
+            BM25Index
+        """
+        ids, doc_term_freqs, doc_lengths = [], [], []
+        document_freq: Dict[str, int] = {}
+        for chunk_id, text in documents:
+            term_freqs: Dict[str, int] = {}
+            for token in tokenize(text):
+                term_freqs[token] = term_freqs.get(token, 0) + 1
+            for term in term_freqs:
+                document_freq[term] = document_freq.get(term, 0) + 1
+            ids.append(chunk_id)
+            doc_term_freqs.append(term_freqs)
+            doc_lengths.append(sum(term_freqs.values()))
+
+        n_docs = len(ids)
+        avg_length = (sum(doc_lengths) / n_docs) if n_docs else 1.0
+        terms = sorted(
+            term for term, df in document_freq.items()
+            if '_' not in term or df >= min_bigram_df
+        )
+        term_index = {term: i for i, term in enumerate(terms)}
+
+        postings_per_term: List[List[Tuple[int, float]]] = [[] for _ in terms]
+        for doc, (term_freqs, length) in enumerate(zip(doc_term_freqs, doc_lengths)):
+            norm = k1 * (1 - b + b * length / avg_length)
+            for term, tf in term_freqs.items():
+                i = term_index.get(term)
+                if i is None:
+                    continue
+                df = document_freq[term]
+                idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                postings_per_term[i].append((doc, idf * tf * (k1 + 1) / (tf + norm)))
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in postings_per_term])
+        postings = np.fromiter((doc for p in postings_per_term for doc, _ in p), dtype=np.int32)
+        weights = np.fromiter((w for p in postings_per_term for _, w in p), dtype=np.float32)
+
+        return cls(np.array(terms), offsets, postings, weights, np.array(ids))
+
+    def save(self, path: Path):
+        """Write the index as an uncompressed .npz (fast to load)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        terms = sorted(self.term_index, key=self.term_index.get)
+        np.savez(
+            path,
+            terms=np.array(terms),
+            offsets=self.offsets,
+            postings=self.postings,
+            weights=self.weights,
+            ids=np.array(self.ids)
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        """Load an index written by save()"""
+        with np.load(path) as data:
+            return cls(data['terms'], data['offsets'], data['postings'], data['weights'], data['ids'])
+
+    def search(
+        self, 
+        query: str, 
+        n_results: int = 10, 
+        allowed_ids: Optional[Collection[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k chunks by BM25 score
+        
+        Args:
+            query: User's question
+            n_results: Number of chunks returned
+            allowed_ids: Restrict results to these chunk IDs (metadata filter / article routing)
+            
+        Returns:
+            List of (chunk_id, score), best first (only chunks with score > 0)
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for token in set(tokenize(query)):
+            i = self.term_index.get(token)
+            if i is None:
+                continue
+            start, end = self.offsets[i], self.offsets[i + 1]
+            # Postings of one term are unique documents, so fancy-index add is safe
+            scores[self.postings[start:end]] += self.weights[start:end]
+
+        if allowed_ids is not None:
+            mask = np.zeros(len(self.ids), dtype=bool)
+            mask[[self.positions[chunk_id] for chunk_id in allowed_ids if chunk_id in self.positions]] = True
+            scores[~mask] = 0.0
+
+        k = min(n_results, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+def build_index_from_chunks(chunks_path: Path) -> BM25Index:
+    """Build a BM25 index from law_chunks.json (chunk IDs follow the chunk_<i> convention)"""
+    with open(chunks_path, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    return BM25Index.build(
+        (f"chunk_{i}", chunk_search_text(chunk['content'], chunk['metadata']))
+        for i, chunk in enumerate(chunks)
+    )
+
+def load_lexical_index(path: Path, chunks_path: Path = None) -> BM25Index:
+    """Load a BM25 index (built in memory from law_chunks.json if missing)."""
+    if path.exists():
+        index = BM25Index.load(path)
+        print(f"BM25 index loaded from {path} ({len(index.term_index)} terms).")
+    else:
+        chunks_path = chunks_path or settings.LAW_CHUNKS_PATH
+        index = build_index_from_chunks(chunks_path)
+        print(f"BM25 index built from {chunks_path} ({len(index.term_index)} terms); "
+              f"run scripts/build_bm25_index.py to prebuild it.")
+    return index
+
+def get_lexical_index() -> BM25Index:
+    """BM25 index of the served index version."""
+    from app.core.index_manager import current_index
+    return current_index().lexical_index()
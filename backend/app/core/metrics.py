@@ -0,0 +1,91 @@
+"""
+Prometheus metrics and per-request stage timings
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+from prometheus_client import Counter, Gauge, Histogram
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_seconds",
+    "Time spent per pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency (until response headers)",
+    ["method", "path", "status"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the LLM API",
+    ["model", "kind"]
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "Failed LLM attempts",
+    ["model", "error"]
+)
+CACHE_EVENTS = Counter(
+    "rag_cache_events_total",
+    "Cache lookups",
+    ["cache", "result"]
+)
+ADMISSION_EVENTS = Counter(
+    "rag_admission_total",
+    "Admission control decisions",
+    ["priority", "result"]
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "rag_admission_in_flight",
+    "Requests holding an LLM slot"
+)
+ADMISSION_QUEUED = Gauge(
+    "rag_admission_queued",
+    "Requests waiting for an LLM slot"
+)
+
+# Stage durations (ms) of the current request; run_blocking copies the context,
+# so stages running on the executor are recorded too.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+def start_request_timings() -> Dict[str, float]:
+    """Start collecting stage timings for the current request"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+def observe_stage(stage: str, seconds: float):
+    """Record one stage duration (histogram + current request breakdown)"""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds * 1000
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a block as a pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+def record_cache(cache: str, hit: bool):
+    CACHE_EVENTS.labels(cache, "hit" if hit else "miss").inc()
+
+def record_tokens(model: str, usage) -> None:
+    """Count prompt/completion tokens from an API usage object (if present)"""
+    if usage is None:
+        return
+    LLM_TOKENS.labels(model, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(model, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """Server-Timing header value, e.g. "encode;dur=12.3, vector_query;dur=1.1" """
+    return ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in timings.items())
@@ -0,0 +1,171 @@
+"""
+Structural index of the law: chapter → article → clause → point lookups in O(1)
+
+Built from law_structure.json (output of parse_law_document) and
+law_chunks.json (output of flatten_to_chunks, chunk IDs chunk_<i>).
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.core.text_normalization import normalize_query
+
+# (article, clause, point) - clause/point are None for coarser provisions
+ProvisionKey = Tuple[str, Optional[str], Optional[str]]
+
+_ARTICLE_PATTERN = re.compile(r'\bđiều (\d+[a-z]?)\b')
+_CLAUSE_PATTERN = re.compile(r'\bkhoản (\d+)\b')
+_POINT_PATTERN = re.compile(r'\bđiểm ([a-zđ])\b')
+
+def detect_citations(question: str) -> List[ProvisionKey]:
+    """
+    Detect references like "Điều 8 khoản 2", "điểm a khoản 1 Điều 60"
+    
+    A clause/point is only bound to the article when the question cites a
+    single article; with several articles each one is returned as a whole.
+    
+    Args:
+        question: User's question
+        
+    Returns:
+        List of (article, clause, point) keys, empty if there is no citation
+    """
+    text = normalize_query(question)
+    articles = list(dict.fromkeys(_ARTICLE_PATTERN.findall(text)))
+    if not articles:
+        return []
+    if len(articles) > 1:
+        return [(article, None, None) for article in articles]
+
+    clause = _CLAUSE_PATTERN.search(text)
+    point = _POINT_PATTERN.search(text)
+    clause_number = clause.group(1) if clause else None
+    point_letter = point.group(1) if point and clause_number else None
+    return [(articles[0], clause_number, point_letter)]
+
+class LawStructureIndex:
+    """Hash-map index over the law hierarchy and its chunks"""
+
+    def __init__(self, structure: List[Dict], chunks: List[Dict]):
+        self.chapters: Dict[str, Dict] = {}
+        self.articles: Dict[str, Dict] = {}
+        self.article_chapter: Dict[str, Dict] = {}
+        self.clauses: Dict[Tuple[str, str], Dict] = {}
+
+        for chapter in structure:
+            self.chapters[chapter['number']] = chapter
+            for article in chapter['articles']:
+                self.articles[article['number']] = article
+                self.article_chapter[article['number']] = chapter
+                for clause in article['clauses']:
+                    self.clauses[(article['number'], clause['number'])] = clause
+
+        # Chunks in document order, grouped by article and by clause
+        self.chunks: Dict[ProvisionKey, Tuple[str, Dict]] = {}
+        self.chunk_ids: Dict[ProvisionKey, str] = {}
+        self.article_chunks: Dict[str, List[ProvisionKey]] = {}
+        self.clause_chunks: Dict[Tuple[str, str], List[ProvisionKey]] = {}
+
+        for i, chunk in enumerate(chunks):
+            metadata = chunk['metadata']
+            key = (metadata['article_number'], metadata.get('clause_number'), metadata.get('point_letter'))
+            self.chunks[key] = (chunk['content'], metadata)
+            self.chunk_ids[key] = f"chunk_{i}"
+            self.article_chunks.setdefault(key[0], []).append(key)
+            if key[1] is not None:
+                self.clause_chunks.setdefault((key[0], key[1]), []).append(key)
+
+    @classmethod
+    def from_files(cls, structure_path: Path, chunks_path: Path) -> "LawStructureIndex":
+        with open(structure_path, 'r', encoding='utf-8') as f:
+            structure = json.load(f)
+        with open(chunks_path, 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        return cls(structure, chunks)
+
+    def resolve(self, key: ProvisionKey) -> List[ProvisionKey]:
+        """
+        Chunk keys covering a provision, the provision itself first
+        
+        - point: the point, then its sibling points in the same clause
+        - clause: the clause chunk, or all its points
+        - article: every chunk of the article
+        
+        Args:
+            key: (article, clause, point)
+            
+        Returns:
+            Chunk keys, empty if the provision does not exist
+        """
+        article, clause, point = key
+        if clause is None:
+            return list(self.article_chunks.get(article, []))
+
+        siblings = self.clause_chunks.get((article, clause), [])
+        if point is None:
+            return list(siblings)
+
+        if key not in self.chunks:
+            return list(siblings)
+        return [key] + [sibling for sibling in siblings if sibling != key]
+
+    def lookup(self, citations: List[ProvisionKey], max_chunks: int) -> Optional[Dict]:
+        """
+        Fetch the cited provisions as a retrieval result
+        
+        The chunk budget is shared round-robin across the citations, so a long
+        first article does not crowd out the later ones.
+        
+        Args:
+            citations: Keys from detect_citations
+            max_chunks: Maximum number of chunks returned
+            
+        Returns:
+            Dict contains ids, documents, metadatas, distances (Chroma format),
+            or None if no cited provision exists or the cited provisions do not
+            all fit in max_chunks (the vector search ranks them instead)
+        """
+        resolved = [keys for keys in (self.resolve(citation) for citation in citations) if keys]
+        if not resolved or len(resolved) > max_chunks:
+            return None
+
+        selected: List[List[ProvisionKey]] = [[] for _ in resolved]
+        seen = set()
+        remaining = max_chunks
+        depth = 0
+        while remaining and any(depth < len(group) for group in resolved):
+            for group, chosen in zip(resolved, selected):
+                if remaining and depth < len(group) and group[depth] not in seen:
+                    seen.add(group[depth])
+                    chosen.append(group[depth])
+                    remaining -= 1
+            depth += 1
+        # Each citation's chunks stay together, in citation order
+        keys = [key for chosen in selected for key in chosen]
+
+        documents, metadatas = [], []
+        for key in keys:
+            content, metadata = self.chunks[key]
+            # Same document layout as the vector store ("<reference>: <content>")
+            documents.append(f"{metadata['full_reference']}: {content}")
+            metadatas.append(metadata)
+
+        return {
+            'ids': [[self.chunk_ids[key] for key in keys]],
+            'documents': [documents],
+            'metadatas': [metadatas],
+            'distances': [[0.0] * len(keys)]  # Exact structural match
+        }
+
+def load_structure_index(structure_path: Path, chunks_path: Path) -> LawStructureIndex:
+    """Load a law structure index from law_structure.json and law_chunks.json."""
+    index = LawStructureIndex.from_files(structure_path, chunks_path)
+    print(f"Law structure index loaded from {structure_path.parent} "
+          f"({len(index.articles)} articles, {len(index.chunks)} chunks).")
+    return index
+
+def get_structure_index() -> LawStructureIndex:
+    """Law structure index of the served index version."""
+    from app.core.index_manager import current_index
+    return current_index().structure_index()
@@ -0,0 +1,26 @@
+"""
+Vietnamese text normalization helpers
+"""
+
+import re
+import unicodedata
+
+_PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a question so trivial variants map to the same key
+    
+    NFC-composes diacritics (NFD input from macOS/iOS keyboards), lowercases,
+    drops punctuation and collapses whitespace.
+    
+    Args:
+        text: Raw question
+        
+    Returns:
+        Normalized question
+    """
+    text = unicodedata.normalize('NFC', text).lower()
+    text = _PUNCTUATION_PATTERN.sub(' ', text)
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
@@ -0,0 +1,264 @@
+"""
+In-process NumPy exact-search vector store (alternative to ChromaDB)
+
+Layout of an index directory (built by scripts/build_numpy_index.py):
+    CURRENT                      - name of the build to serve
+    build-<ns>/embeddings.npy    - (N, D) normalized float32/float16 matrix, memory-mapped
+    build-<ns>/metadata.json     - ids, documents, metadatas (same order as embeddings)
+
+Directories written before builds existed hold the two files directly.
+"""
+
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.core.config import settings
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"
+POINTER_FILE = "CURRENT"
+BUILD_PREFIX = "build-"
+
+def resolve_index_dir(path: Path) -> Path:
+    """Directory holding the index files: the build named by CURRENT, else path itself"""
+    pointer = Path(path) / POINTER_FILE
+    if pointer.exists():
+        return Path(path) / pointer.read_text(encoding='utf-8').strip()
+    return Path(path)
+
+def matches_where(metadata: Dict, where: Dict) -> bool:
+    """
+    Evaluate a Chroma-style metadata filter on one chunk
+    
+    Supports {"field": value}, {"field": {"$eq"|"$ne"|"$in"|"$nin": ...}},
+    {"$and": [...]} and {"$or": [...]}.
+    """
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+                if op not in ("$eq", "$ne", "$in", "$nin"):
+                    raise ValueError(f"Unsupported where operator: {op}")
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+class NumpyVectorStore:
+    """
+    Exact cosine search over one contiguous embedding matrix.
+
+    Exposes the subset of the chromadb.Collection API used by the app
+    (query, get, count, name, id), so it can be returned by get_collection().
+    Distances are squared L2 like the Chroma collection (2 - 2 * cosine for
+    normalized vectors), so scores stay comparable between backends.
+    """
+
+    # Rows upcast per block when the matrix is stored as float16
+    BLOCK_SIZE = 8192
+
+    def __init__(self, path: Path, name: str = None):
+        self.path = Path(path)
+        self.data_path = resolve_index_dir(self.path)
+        # mmap: multiple workers share the same physical pages
+        self.embeddings = np.load(self.data_path / EMBEDDINGS_FILE, mmap_mode='r')
+        with open(self.data_path / METADATA_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        self.ids: List[str] = meta['ids']
+        self.documents: List[str] = meta['documents']
+        self.metadatas: List[Dict] = meta['metadatas']
+        self.name = name or meta.get('name', settings.COLLECTION_NAME)
+        self.id = meta.get('version', 'numpy')
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+        if len(self.ids) != self.embeddings.shape[0]:
+            raise ValueError(
+                f"Index at {self.data_path} is inconsistent: {len(self.ids)} ids "
+                f"for {self.embeddings.shape[0]} embeddings"
+            )
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def filter_mask(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        """Boolean mask of chunks matching where (None = no filter)"""
+        if not where:
+            return None
+        return np.fromiter((matches_where(m, where) for m in self.metadatas), dtype=bool, count=len(self.metadatas))
+
+    def similarities(self, query_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarities of every query against every chunk
+        
+        Args:
+            query_embeddings: (B, D) normalized queries
+            
+        Returns:
+            (B, N) similarity matrix
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if self.embeddings.dtype == np.float32:
+            return queries @ self.embeddings.T
+
+        # float16 storage: upcast block by block to keep BLAS speed and bounded memory
+        scores = np.empty((queries.shape[0], self.embeddings.shape[0]), dtype=np.float32)
+        for start in range(0, self.embeddings.shape[0], self.BLOCK_SIZE):
+            block = np.asarray(self.embeddings[start:start + self.BLOCK_SIZE], dtype=np.float32)
+            scores[:, start:start + block.shape[0]] = queries @ block.T
+        return scores
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        include: Optional[List[str]] = None,
+        where: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Top-k exact search, one matrix product for the whole batch of queries
+        
+        Args:
+            query_embeddings: List of normalized query embeddings
+            n_results: Number of chunks per query
+            where: Chroma-style metadata filter (optional)
+            
+        Returns:
+            Chroma-style dict: ids, documents, metadatas, distances (one list per query)
+        """
+        scores = self.similarities(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        mask = self.filter_mask(where)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        k = min(n_results, scores.shape[1] if mask is None else int(mask.sum()))
+
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        for row in scores:
+            if k == 0:
+                for key in results:
+                    results[key].append([])
+                continue
+            # argpartition is O(N); only the k winners get sorted
+            top = np.argpartition(-row, k - 1)[:k] if k < row.shape[0] else np.arange(row.shape[0])
+            top = top[np.argsort(-row[top])]
+            results['ids'].append([self.ids[i] for i in top])
+            results['documents'].append([self.documents[i] for i in top])
+            results['metadatas'].append([self.metadatas[i] for i in top])
+            results['distances'].append([float(2.0 - 2.0 * row[i]) for i in top])
+        return results
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        include: Optional[List[str]] = None,
+        where: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Fetch chunks by ID (all chunks when ids is None)
+        
+        Args:
+            ids: Chunk IDs
+            include: Fields to return ("documents", "metadatas", "embeddings")
+            where: Chroma-style metadata filter (optional)
+            
+        Returns:
+            Chroma-style dict: ids, documents, metadatas, embeddings
+        """
+        include = include or ['documents', 'metadatas']
+        positions = range(len(self.ids)) if ids is None else [
+            self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions
+        ]
+        positions = list(positions)
+        if where:
+            positions = [i for i in positions if matches_where(self.metadatas[i], where)]
+        return {
+            'ids': [self.ids[i] for i in positions],
+            'documents': [self.documents[i] for i in positions] if 'documents' in include else None,
+            'metadatas': [self.metadatas[i] for i in positions] if 'metadatas' in include else None,
+            'embeddings': np.asarray(self.embeddings[positions], dtype=np.float32)
+            if 'embeddings' in include else None
+        }
+
+    @property
+    def version(self) -> str:
+        """Changes whenever the index files are rebuilt"""
+        mtime = (self.data_path / EMBEDDINGS_FILE).stat().st_mtime_ns
+        return f"{self.id}:{mtime}"
+
+def save_numpy_index(
+    path: Path,
+    ids: List[str],
+    embeddings: np.ndarray,
+    documents: List[str],
+    metadatas: List[Dict],
+    name: str,
+    version: str,
+    dtype: str = "float32"
+):
+    """
+    Write an index directory readable by NumpyVectorStore
+    
+    Args:
+        path: Output directory
+        ids, embeddings, documents, metadatas: Chunks in the same order
+        name: Collection name
+        version: Version tag stored in metadata.json
+        dtype: "float32" or "float16"
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+    matrix = np.ascontiguousarray(matrix.astype(dtype))
+
+    # Both files go into a fresh build directory, published by one atomic
+    # rename of CURRENT: readers never mix the metadata of one build with
+    # the embeddings of another
+    build = f"{BUILD_PREFIX}{time.time_ns()}"
+    build_dir = path / build
+    build_dir.mkdir()
+    with open(build_dir / EMBEDDINGS_FILE, 'wb') as f:
+        np.save(f, matrix)
+    with open(build_dir / METADATA_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'name': name,
+            'version': version,
+            'dtype': dtype,
+            'ids': ids,
+            'documents': documents,
+            'metadatas': metadatas
+        }, f, ensure_ascii=False)
+    tmp_pointer = path / (POINTER_FILE + ".tmp")
+    tmp_pointer.write_text(build, encoding='utf-8')
+    tmp_pointer.replace(path / POINTER_FILE)
+
+    # Keep the previous build for readers that resolved CURRENT just before the swap
+    builds = sorted(child for child in path.iterdir() if child.is_dir() and child.name.startswith(BUILD_PREFIX))
+    for old in builds[:-2]:
+        shutil.rmtree(old, ignore_errors=True)
+    for flat_file in (EMBEDDINGS_FILE, METADATA_FILE):
+        (path / flat_file).unlink(missing_ok=True)  # pre-build flat layout
+
+def load_numpy_store(path: Path) -> NumpyVectorStore:
+    """Load a NumPy vector store (see IndexBundle)."""
+    store = NumpyVectorStore(path)
+    print(f"NumPy vector store loaded from {path} "
+          f"({store.count()} chunks, {store.embeddings.dtype}).")
+    return store
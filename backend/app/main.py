@@ -1,11 +1,15 @@
 """
 FastAPI application entry point
 """
+import asyncio
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import chat
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.api import admin, chat
 from app.core.config import settings
+from app.core.metrics import REQUEST_SECONDS, format_server_timing, start_request_timings
 
 
 @asynccontextmanager
@@ -20,15 +24,29 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Traffic Law Chatbot API")
     print("="*80)
     
-    # Load models and initialize singletons
-    from app.core.chromadb_client import get_collection
-    from app.core.embedding_model import get_embedding_model
-    from app.services.rag_service import rag_service
+    # Load models in the background: vector store and embedding model in parallel,
+    # then a warm-up query. /api/ready returns 503 until this finishes.
+    from app.services.warmup import get_warmup
     
-    get_collection()
-    get_embedding_model()
+    if settings.WARMUP_ENABLED:
+        get_warmup().start()
+    else:
+        get_warmup().status = "ready"
     
-    print("\n✅ API is ready!")
+    index_watch_start = None
+    if settings.INDEX_WATCH_ENABLED:
+        # Swap in a new index version when INDEX_ROOT/CURRENT changes (after warm-up loaded the current one)
+        async def start_index_watch():
+            from app.core.executor import run_blocking
+            from app.services.index_swapper import get_index_swapper
+            await get_warmup().wait()
+            if not get_warmup().ready:
+                print("⚠️ Index watcher not started: warm-up did not complete")
+                return
+            (await run_blocking(get_index_swapper)).start()
+        index_watch_start = asyncio.create_task(start_index_watch())
+    
+    print("\n✅ API is accepting connections (warm-up running, see /api/ready)")
     print(f"📚 Collection: {settings.COLLECTION_NAME}")
     print(f"🤖 LLM Model: {settings.DEFAULT_LLM_MODEL}")
     print("="*80 + "\n")
@@ -37,6 +55,25 @@ async def lifespan(app: FastAPI):
     
     # ========== SHUTDOWN ==========
     print("\n🛑 Shutting down API...")
+    from app.core.embedding_batcher import get_embedding_batcher
+    from app.core.executor import shutdown_executor
+    from app.services.index_swapper import get_index_swapper
+    from app.services.llm_service import get_llm_service
+    
+    await get_warmup().stop()
+    if index_watch_start is not None:
+        index_watch_start.cancel()
+        try:
+            await index_watch_start
+        except asyncio.CancelledError:
+            pass
+    if get_index_swapper.cache_info().currsize:
+        await get_index_swapper().stop()
+    if get_embedding_batcher.cache_info().currsize:
+        await get_embedding_batcher().stop()
+    if get_llm_service.cache_info().currsize:
+        await get_llm_service().aclose()
+    shutdown_executor()
     print("👋 Goodbye!\n")
 
 
@@ -55,10 +92,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """
+    Per-request stage breakdown in the Server-Timing header + latency histogram
+    
+    Streaming responses only carry the stages finished before headers are sent;
+    their full breakdown is in the final "done" event.
+    """
+    timings = start_request_timings()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    
+    route = request.scope.get("route")
+    REQUEST_SECONDS.labels(
+        request.method,
+        route.path if route is not None else "unmatched",
+        str(response.status_code)
+    ).observe(elapsed)
+    
+    timings["total"] = elapsed * 1000
+    response.headers["Server-Timing"] = format_server_timing(timings)
+    return response
+
 # Include routers
 app.include_router(chat.router, prefix="/api", tags=["chat"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get("/")
@@ -11,15 +11,36 @@ class ChatRequest(BaseModel):
     n_results: int = Field(5,ge=1, le=10,  description="Number of retrieved documents to use for context")
     show_sources: bool = Field(False, description="Whether to show source documents in the response")
     model: str = Field("llama-3.3-70b-versatile", description="LLM model to use")
+    session_id: Optional[str] = Field(None, min_length=1, max_length=64, description="Session ID returned by a previous answer (follow-up questions); omit to start a new session")
+    chapters: Optional[List[str]] = Field(None, max_length=50, description="Only search these chapters (chapter_number, e.g. \"II\")")
+    articles: Optional[List[str]] = Field(None, max_length=100, description="Only search these articles (article_number, e.g. \"6\", \"6a\")")
+    shards: Optional[List[str]] = Field(None, max_length=50, description="Corpus shards (documents) to search, default: all active default shards")
 
 class Source(BaseModel):
     """Source document model"""
     reference: str
     content: str
-    relevent_score: float   
+    relevance_score: float   
 
 class ChatResponse(BaseModel):
     """Response model cho chat endpoint"""
     answer: str
     sources: Optional[List[Source]] = None
-    question: str
\ No newline at end of file
+    question: str
+    session_id: Optional[str] = None
+
+class BatchChatRequest(BaseModel):
+    """Request model for batch chat endpoint"""
+    questions: List[str] = Field(..., min_length=1, max_length=100, description="User's questions")
+    n_results: int = Field(5,ge=1, le=10,  description="Number of retrieved documents to use for context")
+    show_sources: bool = Field(False, description="Whether to show source documents in the response")
+    model: str = Field("llama-3.3-70b-versatile", description="LLM model to use")
+
+class BatchChatItem(BaseModel):
+    """One line of the batch chat NDJSON stream"""
+    index: int
+    question: str
+    answer: Optional[str] = None
+    sources: Optional[List[Source]] = None
+    cached: bool = False
+    error: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+Admission control in front of the LLM - bounded slot pool, priority queue
+with a deadline, per-client rate limits
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import ADMISSION_EVENTS, ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, observe_stage
+from app.services.llm_service import LLMServiceError
+
+# Priority tiers: lower is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BATCH: "batch"}
+
+class AdmissionRejected(Exception):
+    """Request shed by admission control (429 rate limited, 503 overloaded)"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class AdmissionTicket:
+    """An acquired LLM slot; release() is idempotent"""
+    __slots__ = ("controller", "start", "released")
+
+    def __init__(self, controller: Optional["AdmissionController"], start: float):
+        self.controller = controller
+        self.start = start
+        self.released = False
+
+    def release(self, overloaded: bool = False, completed: bool = False):
+        """
+        Give the slot back
+
+        Only a slot released with overloaded or completed tells the adaptive
+        limit something about the provider; otherwise the release is neutral.
+
+        Args:
+            overloaded: The LLM call failed with a provider overload (rate limit, timeout, 5xx)
+            completed: The LLM call was answered by the provider
+        """
+        if self.released:
+            return
+        self.released = True
+        if self.controller is not None:
+            self.controller._release(self, overloaded, completed)
+
+class AdmissionController:
+    """
+    Bounded pool of LLM slots in front of the provider.
+
+    Requests beyond the pool wait in a priority queue (interactive before
+    batch) for at most max_wait seconds; a full queue or an expired wait is
+    rejected at once with 503 + Retry-After instead of piling up on the
+    provider. Each client also has a token bucket (429 + Retry-After).
+
+    The pool size adapts (AIMD): a provider overload shrinks it by a quarter,
+    every call the provider answered grows it back by 1/limit, so throughput
+    degrades gradually under provider rate limits instead of collapsing into
+    errors. Slots are held around the LLM call only (see slot()), so cache
+    hits and retrieval never count as provider feedback.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        max_queue: int = None,
+        max_wait: float = None,
+        rate_per_minute: float = None,
+        burst: int = None
+    ):
+        self.enabled = settings.ADMISSION_ENABLED
+        self.max_concurrency = max_concurrency or settings.ADMISSION_MAX_CONCURRENT
+        self.min_concurrency = min(settings.ADMISSION_MIN_CONCURRENT, self.max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.max_queue = max_queue if max_queue is not None else settings.ADMISSION_MAX_QUEUE
+        self.max_wait = max_wait if max_wait is not None else settings.ADMISSION_MAX_WAIT_SECONDS
+        self.rate = (rate_per_minute if rate_per_minute is not None else settings.RATE_LIMIT_PER_MINUTE) / 60
+        self.burst = burst or settings.RATE_LIMIT_BURST
+
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []  # heap (priority, seq, future)
+        self._seq = itertools.count()
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()  # client → [tokens, updated]
+        self.hold_seconds: Optional[float] = None  # moving average of slot hold time
+
+        # Stats
+        self.admitted = 0
+        self.rate_limited = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.limit_decreases = 0
+
+    def check_rate(self, client_id: str, cost: int = 1):
+        """
+        Take cost tokens (one per LLM call) from the client's bucket
+
+        A cost larger than the burst is admitted once the bucket is full and
+        leaves it in debt, so a big batch is paid back before the next request.
+
+        Args:
+            client_id: Rate-limit key
+            cost: Number of LLM calls the request makes
+
+        Raises:
+            AdmissionRejected: 429, not enough tokens
+        """
+        if not self.enabled or self.rate <= 0:
+            return
+        now = time.monotonic()
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = self._buckets[client_id] = [float(self.burst), now]
+            while len(self._buckets) > settings.RATE_LIMIT_MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        needed = min(cost, self.burst)
+        if bucket[0] < needed:
+            self.rate_limited += 1
+            ADMISSION_EVENTS.labels("any", "rate_limited").inc()
+            raise AdmissionRejected(
+                "Bạn gửi quá nhiều câu hỏi, vui lòng thử lại sau",
+                429,
+                max(1, math.ceil((needed - bucket[0]) / self.rate))
+            )
+        bucket[0] -= cost
+
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def retry_after(self) -> int:
+        """Seconds until a new request would likely get a slot"""
+        hold = self.hold_seconds or 1.0
+        return max(1, math.ceil(hold * (self.queued() + 1) / max(1, int(self.limit))))
+
+    def _has_capacity(self) -> bool:
+        return self.active < max(1, int(self.limit))
+
+    def _update_gauges(self):
+        ADMISSION_IN_FLIGHT.set(self.active)
+        ADMISSION_QUEUED.set(self.queued())
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE, max_wait: float = None) -> AdmissionTicket:
+        """
+        Get an LLM slot, waiting in the priority queue if the pool is full
+
+        Args:
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BATCH
+            max_wait: Queue deadline in seconds (default ADMISSION_MAX_WAIT_SECONDS)
+
+        Returns:
+            Ticket to release when the request is done
+
+        Raises:
+            AdmissionRejected: 503, queue full or deadline passed
+        """
+        if not self.enabled:
+            return AdmissionTicket(None, time.monotonic())
+        tier = PRIORITY_NAMES.get(priority, str(priority))
+
+        if self._has_capacity() and not self.queued():
+            self.active += 1
+            self.admitted += 1
+            ADMISSION_EVENTS.labels(tier, "admitted").inc()
+            self._update_gauges()
+            return AdmissionTicket(self, time.monotonic())
+
+        if self.queued() >= self.max_queue:
+            self.rejected_queue_full += 1
+            ADMISSION_EVENTS.labels(tier, "queue_full").inc()
+            raise AdmissionRejected("Hệ thống đang quá tải, vui lòng thử lại sau", 503, self.retry_after())
+
+        # Drop entries of requests that already gave up, then queue
+        self._waiters = [entry for entry in self._waiters if not entry[2].done()]
+        heapq.heapify(self._waiters)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._update_gauges()
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(future, self.max_wait if max_wait is None else max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # A slot was handed over just as we gave up: pass it on
+                self.active -= 1
+                self._wake()
+            self._update_gauges()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_timeout += 1
+            ADMISSION_EVENTS.labels(tier, "timeout").inc()
+            raise AdmissionRejected("Hệ thống đang quá tải, vui lòng thử lại sau", 503, self.retry_after())
+
+        observe_stage("admission_wait", time.monotonic() - start)
+        self.admitted += 1
+        ADMISSION_EVENTS.labels(tier, "admitted").inc()
+        return AdmissionTicket(self, time.monotonic())
+
+    def _wake(self):
+        """Hand free slots to the highest-priority waiters (the slot count moves with the hand-over)"""
+        while self._waiters and self._has_capacity():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # timed out or cancelled
+            self.active += 1
+            future.set_result(None)
+        self._update_gauges()
+
+    def _release(self, ticket: AdmissionTicket, overloaded: bool, completed: bool):
+        if overloaded or completed:
+            held = time.monotonic() - ticket.start
+            self.hold_seconds = held if self.hold_seconds is None else 0.9 * self.hold_seconds + 0.1 * held
+
+        if overloaded:
+            self.limit = max(self.min_concurrency, self.limit * 0.75)
+            self.limit_decreases += 1
+        elif completed:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+        self.active -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE, max_wait: float = None) -> AsyncIterator[AdmissionTicket]:
+        """
+        Hold an LLM slot for the block, which should wrap the LLM call only
+
+        A block that finishes counts as a provider answer, a retryable LLM
+        error as provider overload; anything else (cancel, client gone,
+        rejected request) releases the slot without feedback.
+        """
+        ticket = await self.acquire(priority, max_wait)
+        overloaded = completed = False
+        try:
+            yield ticket
+            completed = True
+        except LLMServiceError as e:
+            overloaded = e.retryable
+            raise
+        finally:
+            ticket.release(overloaded, completed)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "active": self.active,
+            "queued": self.queued(),
+            "limit": round(self.limit, 2),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait,
+            "hold_ms": round(self.hold_seconds * 1000, 1) if self.hold_seconds is not None else None,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "limit_decreases": self.limit_decreases,
+            "clients": len(self._buckets)
+        }
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    """Create and return the admission controller singleton."""
+    controller = AdmissionController()
+    print(f"Admission control ready ({controller.max_concurrency} LLM slots, queue {controller.max_queue}, "
+          f"max wait {controller.max_wait}s, {controller.rate * 60:g} req/min per client).")
+    return controller
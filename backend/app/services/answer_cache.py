@@ -0,0 +1,182 @@
+"""
+Semantic answer cache - reuse LLM answers for near-paraphrased questions
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+class CachedAnswer:
+    """One cached answer with the query embedding that produced it"""
+    __slots__ = ("embedding", "group", "answer", "created_at")
+
+    def __init__(self, embedding: np.ndarray, group: Tuple, answer: str):
+        self.embedding = embedding
+        self.group = group
+        self.answer = answer
+        self.created_at = time.monotonic()
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed by (model, retrieved chunk IDs) + query embedding.
+
+    A lookup hits when a cached entry was generated by the same model from
+    the same retrieved chunks and its query embedding is within
+    similarity_threshold (cosine) of the new query. Entries expire after
+    ttl_seconds; the least recently used entry is evicted past max_size.
+    The whole cache is dropped when the index version changes.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = None,
+        ttl_seconds: float = None,
+        max_size: int = None
+    ):
+        self.similarity_threshold = similarity_threshold or settings.ANSWER_CACHE_SIMILARITY
+        self.ttl_seconds = ttl_seconds or settings.ANSWER_CACHE_TTL_SECONDS
+        self.max_size = max_size or settings.ANSWER_CACHE_MAX_SIZE
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._groups: Dict[Tuple, List[int]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._index_version: Optional[str] = None
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_group(model: str, chunk_ids: Sequence[str]) -> Tuple:
+        """Group key: model + set of retrieved chunk IDs"""
+        return (model, tuple(sorted(chunk_ids)))
+
+    def _check_version(self, index_version: str):
+        """Drop everything if the law collection was rebuilt (lock held)"""
+        if index_version != self._index_version:
+            if self._index_version is not None:
+                self._clear()
+                self.invalidations += 1
+            self._index_version = index_version
+
+    def lookup(
+        self,
+        embedding: np.ndarray,
+        chunk_ids: Sequence[str],
+        model: str,
+        index_version: str
+    ) -> Optional[str]:
+        """
+        Find a cached answer for a semantically equivalent question
+        
+        Args:
+            embedding: Normalized query embedding
+            chunk_ids: IDs of the retrieved chunks
+            model: LLM model name
+            index_version: Current version of the law collection
+            
+        Returns:
+            Cached answer or None on miss
+        """
+        group = self.make_group(model, chunk_ids)
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_version(index_version)
+
+            best_id, best_score = None, self.similarity_threshold
+            for entry_id in list(self._groups.get(group, ())):
+                entry = self._entries[entry_id]
+                if now - entry.created_at > self.ttl_seconds:
+                    self._remove(entry_id)
+                    continue
+                score = float(np.dot(entry.embedding, embedding))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                record_cache("answer", False)
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            record_cache("answer", True)
+            return self._entries[best_id].answer
+
+    def store(
+        self,
+        embedding: np.ndarray,
+        chunk_ids: Sequence[str],
+        model: str,
+        index_version: str,
+        answer: str
+    ):
+        """
+        Cache an answer generated for (embedding, chunk_ids, model)
+        
+        Args:
+            embedding: Normalized query embedding
+            chunk_ids: IDs of the retrieved chunks
+            model: LLM model name
+            index_version: Current version of the law collection
+            answer: Generated answer
+        """
+        group = self.make_group(model, chunk_ids)
+        entry = CachedAnswer(np.asarray(embedding, dtype=np.float32), group, answer)
+
+        with self._lock:
+            self._check_version(index_version)
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            self._groups.setdefault(group, []).append(entry_id)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, entry_id: int):
+        """Remove one entry (lock held)"""
+        entry = self._entries.pop(entry_id)
+        ids = self._groups[entry.group]
+        ids.remove(entry_id)
+        if not ids:
+            del self._groups[entry.group]
+
+    def _clear(self):
+        self._entries.clear()
+        self._groups.clear()
+
+    def invalidate(self):
+        """Drop all cached answers (e.g. after the law collection is rebuilt)"""
+        with self._lock:
+            self._clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "index_version": self._index_version
+        }
+
+@lru_cache()
+def get_answer_cache() -> SemanticAnswerCache:
+    """Create and return the semantic answer cache singleton."""
+    cache = SemanticAnswerCache()
+    print(f"Semantic answer cache ready (threshold {cache.similarity_threshold}, ttl {cache.ttl_seconds}s).")
+    return cache
@@ -0,0 +1,148 @@
+"""
+Token-budgeted context builder with hierarchical chunk merging
+"""
+
+import math
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.structure_index import LawStructureIndex, get_structure_index
+
+def estimate_tokens(text: str, chars_per_token: float = None) -> int:
+    """Cheap prompt-token estimate (no tokenizer call)"""
+    return math.ceil(len(text) / (chars_per_token or settings.CONTEXT_CHARS_PER_TOKEN))
+
+class ContextBuilder:
+    """
+    Build the LLM context from retrieval results under a token budget.
+
+    Point-level hits of the same clause are merged into one clause group:
+    the clause's own text (from the law hierarchy), then the retrieved
+    points in document order. Groups are admitted by the rank of their best
+    hit until the token budget is reached, and groups of the same article
+    share one article header.
+    """
+
+    def __init__(self, structure_index: Optional[LawStructureIndex] = None, token_budget: int = None):
+        self._structure = structure_index
+        self.token_budget = token_budget or settings.CONTEXT_TOKEN_BUDGET
+
+    @property
+    def structure(self) -> LawStructureIndex:
+        """Fixed structure index if given, else the one of the served index version"""
+        return self._structure if self._structure is not None else get_structure_index()
+
+    def group_hits(self, results: Dict) -> List[Tuple[Optional[Tuple[str, Optional[str]]], List[int]]]:
+        """
+        Group hit positions by (article, clause) in order of their best rank
+        
+        Hits outside the law hierarchy (unknown article, or from another corpus shard)
+        stay as their own group with key None.
+        """
+        groups: Dict[Tuple[str, Optional[str]], List[int]] = {}
+        ordered: List[Tuple[Optional[Tuple[str, Optional[str]]], List[int]]] = []
+
+        for position, metadata in enumerate(results['metadatas'][0]):
+            article = metadata.get('article_number')
+            if metadata.get('shard') or article not in self.structure.articles:
+                ordered.append((None, [position]))
+                continue
+            key = (article, metadata.get('clause_number'))
+            if key not in groups:
+                groups[key] = []
+                ordered.append((key, groups[key]))
+            groups[key].append(position)
+        return ordered
+
+    def article_header(self, article_number: str) -> str:
+        article = self.structure.articles[article_number]
+        chapter = self.structure.article_chapter[article_number]
+        return f"Chương {chapter['number']}, Điều {article_number}. {article['title']}"
+
+    def render_group(self, key: Tuple[str, Optional[str]], positions: List[int], results: Dict) -> str:
+        """Render the body of one article/clause group: parent text + retrieved points"""
+        article_number, clause_number = key
+        if clause_number is None:
+            return self.structure.articles[article_number]['content']
+
+        clause = self.structure.clauses.get((article_number, clause_number))
+        clause_text = clause['content'] if clause else ""
+
+        # Retrieved points, in document order, without text already in the clause body
+        letters = {results['metadatas'][0][p].get('point_letter') for p in positions} - {None}
+        point_lines = []
+        for point in (clause['points'] if clause else []):
+            if point['letter'] in letters and point['content'] not in clause_text:
+                point_lines.append(f"{point['letter']}. {point['content']}")
+
+        return f"Khoản {clause_number}. " + "\n".join(([clause_text] if clause_text else []) + point_lines)
+
+    def build(self, results: Dict) -> str:
+        """
+        Format merged blocks into the LLM context, stopping at the token budget
+        
+        Groups are admitted in rank order until the budget is spent, then
+        rendered per article (header once, clauses in document order).
+        
+        Args:
+            results: Results from ChromaDB
+            
+        Returns:
+            Formatted string context
+        """
+        # article (or position of a non-law hit) → list of (clause_number, body)
+        selected: Dict[str, List[Tuple[Optional[str], str]]] = {}
+        seen_bodies = set()
+        used_tokens = 0
+
+        for key, positions in self.group_hits(results):
+            if key is None:
+                # Outside the law hierarchy: keep the retrieved document as is
+                position = positions[0]
+                metadata = results['metadatas'][0][position]
+                block_key = f"#{position}"
+                header = metadata.get('full_reference', 'N/A')
+                body = results['documents'][0][position]
+                clause_number = None
+            else:
+                block_key = key[0]
+                header = self.article_header(key[0])
+                body = self.render_group(key, positions, results)
+                clause_number = key[1]
+
+            if not body or body in seen_bodies:
+                continue
+
+            # The article header is paid once, with its first admitted group
+            tokens = estimate_tokens(body) + (0 if block_key in selected else estimate_tokens(header) + 4)
+            if used_tokens + tokens > self.token_budget:
+                if selected:
+                    break
+                # Even the best group is over budget: truncate it
+                body = body[:int(self.token_budget * settings.CONTEXT_CHARS_PER_TOKEN)]
+                tokens = self.token_budget
+
+            seen_bodies.add(body)
+            selected.setdefault(block_key, []).append((clause_number, body))
+            used_tokens += tokens
+
+        blocks = []
+        for i, (block_key, groups) in enumerate(selected.items(), 1):
+            if block_key.startswith('#'):
+                position = int(block_key[1:])
+                header = results['metadatas'][0][position].get('full_reference', 'N/A')
+            else:
+                header = self.article_header(block_key)
+                # Clauses in document order inside the article
+                groups = sorted(groups, key=lambda g: int(g[0]) if g[0] and g[0].isdigit() else 0)
+            body = "\n".join(text for _, text in groups)
+            blocks.append(f"[Trích dẫn {i}] {header}\nNội dung: {body}")
+
+        return "\n\n".join(blocks)
+
+@lru_cache()
+def get_context_builder() -> ContextBuilder:
+    """Create and return the context builder singleton."""
+    builder = ContextBuilder()
+    print(f"Context builder ready (budget {builder.token_budget} tokens).")
+    return builder
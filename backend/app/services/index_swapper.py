@@ -0,0 +1,151 @@
+"""
+Index hot-swap - load a new index version in the background, swap it in once
+warm, drain requests still running on the old one
+"""
+import asyncio
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.embedding_model import get_embedding_model
+from app.core.executor import run_blocking
+from app.core.index_manager import IndexBundle, get_index_manager
+from app.services.answer_cache import get_answer_cache
+
+class IndexSwapper:
+    """
+    Swaps the served index version without a restart.
+
+    Triggered by POST /api/admin/index/swap, or by the watcher polling
+    INDEX_ROOT/CURRENT when INDEX_WATCH_ENABLED. The embedding model, LLM
+    client and reranker stay loaded; only the index bundle is replaced.
+    """
+
+    def __init__(self):
+        self.manager = get_index_manager()
+        self.status = "idle"  # idle | loading | draining
+        self.last_swap: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+        self._failed_version: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def _load(self, version: str) -> IndexBundle:
+        """Load and warm a version (blocking, runs on the executor)"""
+        bundle = IndexBundle.from_version(version).load()
+        query_embedding = get_embedding_model().encode(settings.WARMUP_QUERY, normalize_embeddings=True)
+        bundle.warm(query_embedding, settings.WARMUP_QUERY)
+        return bundle
+
+    @staticmethod
+    def invalidate_caches():
+        """
+        Answers were generated from the old chunks. Query embeddings and rerank
+        scores are keyed by text, they stay valid.
+        """
+        if settings.ANSWER_CACHE_ENABLED:
+            get_answer_cache().invalidate()
+
+    async def _drain(self, bundle: IndexBundle) -> bool:
+        """Wait for the requests pinned to a retired version (bounded)"""
+        deadline = time.monotonic() + settings.INDEX_DRAIN_TIMEOUT_SECONDS
+        while bundle.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return bundle.in_flight == 0
+
+    async def swap(self, version: str) -> Dict:
+        """
+        Load version, install it, invalidate caches, drain and close the previous version
+
+        Args:
+            version: Directory name under INDEX_ROOT
+
+        Returns:
+            Swap report (versions, load/drain times, drained flag)
+
+        Raises:
+            ValueError: Unknown version
+        """
+        async with self._lock:
+            previous = self.manager.current
+            if version == previous.name:
+                return {"swapped": False, "version": version}
+
+            self.status = "loading"
+            start = time.perf_counter()
+            try:
+                bundle = await run_blocking(self._load, version)
+            except Exception as e:
+                self.status = "idle"
+                self.last_error = f"{version}: {e}"
+                raise
+            load_ms = (time.perf_counter() - start) * 1000
+
+            self.manager.install(bundle)
+            self.invalidate_caches()
+
+            self.status = "draining"
+            drain_start = time.perf_counter()
+            drained = await self._drain(previous)
+            if drained:
+                await run_blocking(previous.close)
+            else:
+                print(f"⚠️ Index {previous.name} still has {previous.in_flight} requests after "
+                      f"{settings.INDEX_DRAIN_TIMEOUT_SECONDS}s; left open for them")
+            self.status = "idle"
+            self.last_error = None
+
+            self.last_swap = {
+                "from": previous.name,
+                "to": bundle.name,
+                "load_ms": round(load_ms, 2),
+                "drain_ms": round((time.perf_counter() - drain_start) * 1000, 2),
+                "drained": drained,
+                "at": time.time()
+            }
+            print(f"🔁 Index swapped {previous.name} → {bundle.name} "
+                  f"(load {load_ms:.0f} ms, drained: {drained})")
+            return {"swapped": True, **self.last_swap}
+
+    async def _watch(self):
+        """Swap whenever INDEX_ROOT/CURRENT names another version"""
+        while True:
+            await asyncio.sleep(settings.INDEX_WATCH_INTERVAL_SECONDS)
+            version = self.manager.pointer_version()
+            if not version or version == self.manager.current.name or version == self._failed_version:
+                continue
+            try:
+                await self.swap(version)
+                self._failed_version = None
+            except Exception as e:
+                # Not retried until CURRENT changes again
+                self._failed_version = version
+                print(f"⚠️ Index swap to '{version}' failed: {e}")
+
+    def start(self):
+        """Start the CURRENT pointer watcher"""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    def stats(self) -> Dict:
+        return {
+            **self.manager.stats(),
+            "status": self.status,
+            "watching": self._watch_task is not None,
+            "last_swap": self.last_swap,
+            "last_error": self.last_error
+        }
+
+@lru_cache()
+def get_index_swapper() -> IndexSwapper:
+    """Create and return the index swapper singleton."""
+    return IndexSwapper()
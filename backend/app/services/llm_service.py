@@ -1,42 +1,77 @@
-"""
-Services for interacting with large language models (LLMs).
-"""
-
-from app.core.config import settings
-from groq import Groq
-
 """
 Service xử lý LLM calls (Groq)
+
+Async calls go through a resilient layer: per-attempt deadlines, retries with
+jittered backoff on rate limits / transient errors, optional hedged requests
+and a fallback model when the primary model is over its latency budget.
 """
-from groq import Groq
+import asyncio
+import random
+import time
+import httpx
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from groq import (
+    Groq, AsyncGroq, DefaultAsyncHttpxClient,
+    APIConnectionError, APIStatusError, APITimeoutError, InternalServerError, RateLimitError
+)
 from app.core.config import settings
+from app.core.metrics import LLM_ERRORS, record_tokens
+
+class LLMServiceError(Exception):
+    """LLM call failed (after retries and fallback)"""
+    
+    def __init__(self, message: str, model: str = None, retryable: bool = False, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.model = model
+        self.retryable = retryable
+        self.status_code = status_code
+
+class LLMTimeoutError(LLMServiceError):
+    """A single attempt exceeded its deadline"""
+
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError, APITimeoutError, LLMTimeoutError)
 
 class LLMService:
     def __init__(self):
-        """Initialize Groq client"""
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        """Initialize Groq clients (sync + async with pooled connections)"""
+        self.client = Groq(
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_BASE_URL,
+            timeout=settings.LLM_ATTEMPT_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES
+        )
+        # Retries are handled by this service (deadlines, hedging, fallback), not by the SDK
+        self.async_client = AsyncGroq(
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_BASE_URL,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        )
+        self.counters = {
+            "calls": 0, "retries": 0, "timeouts": 0, "rate_limited": 0,
+            "hedges": 0, "hedge_wins": 0, "fallbacks": 0, "failures": 0
+        }
         print("   ✓ Groq API client initialized")
     
-    def generate_answer(
-        self, 
-        query: str, 
-        context: str, 
-        model: str = None
-    ) -> str:
+    def build_messages(self, query: str, context: str, history: str = None) -> List[Dict[str, str]]:
         """
-        Create answers from LLM model
+        Build chat messages (system + user prompt) for the LLM
         
         Args:
             query: User's question
             context: Context documents
-            model: Groq model to use (optional)
+            history: Compacted conversation history of the session (optional)
             
         Returns:
-            Answer from LLM model
+            List of chat messages
         """
-        if model is None:
-            model = settings.DEFAULT_LLM_MODEL
-        
         system_prompt = """Bạn là trợ lý AI chuyên tư vấn Luật Giao thông đường bộ Việt Nam.
 
 NHIỆM VỤ:
@@ -56,33 +91,358 @@ LƯU Ý:
 - KHÔNG trả lời về các vấn đề ngoài luật giao thông
 - Sử dụng ngôn ngữ lịch sự, chuyên nghiệp"""
 
+        history_section = f"""LỊCH SỬ HỘI THOẠI:
+
+{history}
+
+---
+
+""" if history else ""
+
         user_prompt = f"""CÁC QUY ĐỊNH LIÊN QUAN:
 
 {context}
 
 ---
 
-CÂU HỎI CỦA NGƯỜI DÙNG:
+{history_section}CÂU HỎI CỦA NGƯỜI DÙNG:
 {query}
 
 Hãy trả lời câu hỏi dựa trên các quy định trên."""
 
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def completion_params(self, model: str, query: str, context: str, history: str = None) -> Dict:
+        """Chat completion parameters shared by every call path"""
+        return {
+            "model": model,
+            "messages": self.build_messages(query, context, history),
+            "temperature": settings.LLM_TEMPERATURE,
+            "max_tokens": settings.LLM_MAX_TOKENS,
+            "top_p": settings.LLM_TOP_P
+        }
+    
+    def fallback_for(self, model: str) -> Optional[str]:
+        """Fallback model for model, None if there is none (or it is the same model)"""
+        fallback = settings.LLM_FALLBACK_MODEL
+        return fallback if fallback and fallback != model else None
+    
+    def backoff_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Full-jitter exponential backoff, never shorter than the server's Retry-After
+        
+        Args:
+            attempt: Number of the failed attempt (0-based)
+            error: The error that triggered the retry
+            
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        cap = min(settings.LLM_BACKOFF_MAX_SECONDS, settings.LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+        delay = random.uniform(0, cap)
+        if isinstance(error, APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                delay = max(delay, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+        return delay
+    
+    def to_service_error(self, error: Exception, model: str) -> LLMServiceError:
+        """Wrap an SDK error, keeping whether it is worth retrying / falling back"""
+        if isinstance(error, LLMServiceError):
+            return error
+        return LLMServiceError(
+            f"Error while calling Groq API ({model}): {str(error)}",
+            model=model,
+            retryable=isinstance(error, RETRYABLE_ERRORS),
+            status_code=getattr(error, "status_code", None)
+        )
+    
+    async def acomplete_once(self, params: Dict) -> str:
+        """One completion attempt under the per-attempt deadline"""
+        self.counters["calls"] += 1
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=settings.LLM_TEMPERATURE,
-                max_tokens=settings.LLM_MAX_TOKENS,
-                top_p=settings.LLM_TOP_P
+            response = await asyncio.wait_for(
+                self.async_client.chat.completions.create(**params),
+                timeout=settings.LLM_ATTEMPT_TIMEOUT_SECONDS
             )
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            raise LLMTimeoutError(
+                f"Groq API attempt exceeded {settings.LLM_ATTEMPT_TIMEOUT_SECONDS}s ({params['model']})",
+                model=params["model"],
+                retryable=True
+            )
+        record_tokens(params["model"], response.usage)
+        return response.choices[0].message.content.strip()
+    
+    async def acomplete_hedged(self, params: Dict) -> str:
+        """
+        Send the request; if it is still pending after LLM_HEDGE_AFTER_SECONDS,
+        send a duplicate and return whichever finishes first successfully
+        """
+        if not settings.LLM_HEDGE_ENABLED:
+            return await self.acomplete_once(params)
+        
+        primary = asyncio.create_task(self.acomplete_once(params))
+        done, _ = await asyncio.wait({primary}, timeout=settings.LLM_HEDGE_AFTER_SECONDS)
+        if done:
+            return primary.result()
+        
+        self.counters["hedges"] += 1
+        hedge = asyncio.create_task(self.acomplete_once(params))
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def with_retries(self, attempt_fn: Callable, model: str, budget_seconds: float):
+        """
+        Retry attempt_fn on rate limits and transient errors until budget_seconds is spent
+        
+        Args:
+            attempt_fn: Coroutine function performing one attempt
+            model: Model name (for error reporting)
+            budget_seconds: Total time allowed for this model, backoff included
             
+        Returns:
+            Result of the first successful attempt
+        """
+        deadline = time.monotonic() + budget_seconds
+        attempt = 0
+        while True:
+            try:
+                return await attempt_fn()
+            except RETRYABLE_ERRORS as e:
+                LLM_ERRORS.labels(model, type(e).__name__).inc()
+                if isinstance(e, RateLimitError):
+                    self.counters["rate_limited"] += 1
+                delay = self.backoff_delay(attempt, e)
+                attempt += 1
+                if attempt > settings.LLM_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                    raise self.to_service_error(e, model)
+                self.counters["retries"] += 1
+                await asyncio.sleep(delay)
+            except LLMServiceError:
+                raise
+            except Exception as e:
+                LLM_ERRORS.labels(model, type(e).__name__).inc()
+                raise self.to_service_error(e, model)
+    
+    def generate_answer(
+        self, 
+        query: str, 
+        context: str, 
+        model: str = None,
+        history: str = None
+    ) -> str:
+        """
+        Create answers from LLM model
+        
+        Args:
+            query: User's question
+            context: Context documents
+            model: Groq model to use (optional)
+            history: Compacted conversation history (optional)
+            
+        Returns:
+            Answer from LLM model
+        """
+        if model is None:
+            model = settings.DEFAULT_LLM_MODEL
+
+        try:
+            # SDK-level timeout and retries (Retry-After aware) on the sync path
+            response = self.client.chat.completions.create(**self.completion_params(model, query, context, history))
+            record_tokens(model, response.usage)
             return response.choices[0].message.content.strip()
         
         except Exception as e:
-            raise Exception(f"Error while calling Groq API: {str(e)}")
+            LLM_ERRORS.labels(model, type(e).__name__).inc()
+            error = self.to_service_error(e, model)
+            fallback = self.fallback_for(model)
+            if not (error.retryable and fallback):
+                self.counters["failures"] += 1
+                raise error
+        
+        self.counters["fallbacks"] += 1
+        try:
+            response = self.client.chat.completions.create(**self.completion_params(fallback, query, context, history))
+            record_tokens(fallback, response.usage)
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            LLM_ERRORS.labels(fallback, type(e).__name__).inc()
+            self.counters["failures"] += 1
+            raise self.to_service_error(e, fallback)
+    
+    async def agenerate_answer(
+        self, 
+        query: str, 
+        context: str, 
+        model: str = None,
+        history: str = None
+    ) -> str:
+        """
+        Async version of generate_answer: deadlines, retries, hedging, then the fallback model
+        
+        Args:
+            query: User's question
+            context: Context documents
+            model: Groq model to use (optional)
+            history: Compacted conversation history (optional)
+            
+        Returns:
+            Answer from LLM model
+        """
+        if model is None:
+            model = settings.DEFAULT_LLM_MODEL
+
+        params = self.completion_params(model, query, context, history)
+        try:
+            return await self.with_retries(
+                lambda: self.acomplete_hedged(params), model, settings.LLM_PRIMARY_BUDGET_SECONDS
+            )
+        except LLMServiceError as e:
+            fallback = self.fallback_for(model)
+            if not (e.retryable and fallback):
+                self.counters["failures"] += 1
+                raise
+            print(f"⚠️ {model} over budget ({e}), falling back to {fallback}")
+        
+        self.counters["fallbacks"] += 1
+        params = self.completion_params(fallback, query, context, history)
+        try:
+            return await self.with_retries(
+                lambda: self.acomplete_hedged(params), fallback, settings.LLM_FALLBACK_BUDGET_SECONDS
+            )
+        except LLMServiceError:
+            self.counters["failures"] += 1
+            raise
+    
+    async def aopen_stream(self, params: Dict):
+        """
+        Open a completion stream and wait for its first content chunk under the per-attempt deadline
+        
+        Returns:
+            Tuple (stream, first_delta)
+        """
+        self.counters["calls"] += 1
+        
+        async def first_delta():
+            stream = await self.async_client.chat.completions.create(**params, stream=True)
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        return stream, chunk.choices[0].delta.content
+                return stream, ""
+            except BaseException:
+                # Timed out / cancelled / failed before the first token: give the connection back
+                await stream.response.aclose()
+                raise
+        
+        try:
+            return await asyncio.wait_for(first_delta(), timeout=settings.LLM_ATTEMPT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            raise LLMTimeoutError(
+                f"Groq API first token exceeded {settings.LLM_ATTEMPT_TIMEOUT_SECONDS}s ({params['model']})",
+                model=params["model"],
+                retryable=True
+            )
+    
+    async def astream_answer(
+        self, 
+        query: str, 
+        context: str, 
+        model: str = None,
+        history: str = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream answer tokens from LLM model as soon as they are generated
+        
+        Retries and the fallback model apply until the first token arrives; once
+        tokens have been sent a failure is raised (no hedging on streams).
+        
+        Args:
+            query: User's question
+            context: Context documents
+            model: Groq model to use (optional)
+            history: Compacted conversation history (optional)
+            
+        Yields:
+            Text deltas of the answer
+        """
+        if model is None:
+            model = settings.DEFAULT_LLM_MODEL
+
+        params = self.completion_params(model, query, context, history)
+        try:
+            stream, first = await self.with_retries(
+                lambda: self.aopen_stream(params), model, settings.LLM_PRIMARY_BUDGET_SECONDS
+            )
+        except LLMServiceError as e:
+            fallback = self.fallback_for(model)
+            if not (e.retryable and fallback):
+                self.counters["failures"] += 1
+                raise
+            print(f"⚠️ {model} over budget ({e}), falling back to {fallback}")
+            self.counters["fallbacks"] += 1
+            model = fallback
+            params = self.completion_params(fallback, query, context, history)
+            try:
+                stream, first = await self.with_retries(
+                    lambda: self.aopen_stream(params), fallback, settings.LLM_FALLBACK_BUDGET_SECONDS
+                )
+            except LLMServiceError:
+                self.counters["failures"] += 1
+                raise
+        
+        try:
+            if first:
+                yield first
+            async for chunk in stream:
+                # Groq reports usage on the last chunk (x_groq.usage)
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None)
+                if usage is not None:
+                    record_tokens(model, usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        
+        except Exception as e:
+            LLM_ERRORS.labels(model, type(e).__name__).inc()
+            self.counters["failures"] += 1
+            raise self.to_service_error(e, model)
+        finally:
+            # Also runs when the consumer stops early (client disconnect): release the pooled connection
+            await stream.response.aclose()
+    
+    def stats(self) -> Dict[str, int]:
+        """Call, retry, hedge and fallback counters"""
+        return dict(self.counters)
+    
+    async def aclose(self):
+        """Close pooled HTTP connections of the async client"""
+        await self.async_client.close()
 
-# Singleton instance
-llm_service = LLMService()
\ No newline at end of file
+@lru_cache()
+def get_llm_service() -> LLMService:
+    """Create and return the LLM service singleton (lazily, on first use)"""
+    return LLMService()
\ No newline at end of file
@@ -1,43 +1,573 @@
 """
 RAG Service - Orchestrate retrieval and generation
 """
-from typing import Dict, List, Tuple
-from app.core.chromadb_client import get_collection
+import asyncio
+import time
+import numpy as np
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from app.core.article_index import get_article_index
+from app.core.chromadb_client import get_collection, get_index_version
+from app.core.config import settings
+from app.core.corpus_registry import Shard, fan_out, get_corpus_registry, get_shard_collection
 from app.core.embedding_model import get_embedding_model
-from app.services.llm_service import llm_service
+from app.core.embedding_batcher import get_embedding_batcher
+from app.core.embedding_cache import get_embedding_cache
+from app.core.executor import run_blocking
+from app.core.index_manager import current_index, get_index_manager, pins_index
+from app.core.lexical_index import get_lexical_index
+from app.core.metrics import observe_stage, timed
+from app.core.structure_index import detect_citations, get_structure_index
+from app.services.admission import PRIORITY_BATCH, PRIORITY_INTERACTIVE, get_admission_controller
+from app.services.answer_cache import get_answer_cache
+from app.services.context_builder import get_context_builder
+from app.services.llm_service import get_llm_service
+from app.services.reranker import get_reranker
+from app.services.session_store import get_session_store
 from app.models.schemas import Source
 
+def empty_results() -> Dict:
+    return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+
+def metadata_filter(filters: Optional[Dict[str, List[str]]]) -> Optional[Dict]:
+    """Chroma where-filter for explicit chapter/article filters (shards without an article index)"""
+    clauses = []
+    if (filters or {}).get("chapters"):
+        clauses.append({"chapter_number": {"$in": list(map(str, filters["chapters"]))}})
+    if (filters or {}).get("articles"):
+        clauses.append({"article_number": {"$in": list(map(str, filters["articles"]))}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
 class RAGService:
     def __init__(self):
         """Intialize RAG service"""
-        self.collection = get_collection()
+        get_index_manager()  # loads the served index version
         self.embedding_model = get_embedding_model()
         print("✅ RAG Service initialized")
     
-    def retrieve(self, query: str, n_results: int = 5) -> Dict:
+    @property
+    def collection(self):
+        """Law collection of the index version the request is pinned to (hot-swappable)"""
+        return get_collection()
+    
+    def encode_query(self, query: str) -> np.ndarray:
         """
-        Looling for the most related chunks 
+        Encode a query into a normalized embedding (query embedding cache first)
         
         Args:
             query: User's question
+            
+        Returns:
+            Query embedding
+        """
+        if settings.EMBEDDING_CACHE_ENABLED:
+            cached = get_embedding_cache().get(query)
+            if cached is not None:
+                return cached
+        
+        with timed("encode"):
+            query_embedding = self.embedding_model.encode(
+                query, 
+                normalize_embeddings=True
+            )
+        
+        if settings.EMBEDDING_CACHE_ENABLED:
+            get_embedding_cache().put(query, query_embedding)
+        return query_embedding
+    
+    async def aencode_query(self, query: str) -> np.ndarray:
+        """
+        Async encode: cache lookup, then the micro-batching scheduler when enabled
+        
+        Args:
+            query: User's question
+            
+        Returns:
+            Query embedding
+        """
+        if not settings.EMBEDDING_BATCHING_ENABLED:
+            return await run_blocking(self.encode_query, query)
+        
+        if settings.EMBEDDING_CACHE_ENABLED:
+            cached = await get_embedding_cache().aget(query)
+            if cached is not None:
+                return cached
+        
+        with timed("encode"):
+            query_embedding = await get_embedding_batcher().encode(query)
+        
+        if settings.EMBEDDING_CACHE_ENABLED:
+            await get_embedding_cache().aput(query, query_embedding)
+        return query_embedding
+    
+    def dense_search(
+        self, 
+        query_embedding: np.ndarray, 
+        n_results: int = 5, 
+        where: Optional[Dict] = None,
+        collection=None
+    ) -> Dict:
+        """
+        Query ChromaDB with an already computed embedding
+        
+        Args:
+            query_embedding: Normalized query embedding
             n_results: Number of chunks returned
+            where: Metadata filter (optional)
+            collection: Shard collection (default: the primary law collection)
             
         Returns:
             Dict contains documents, metadatas, distances
         """
+        with timed("vector_query"):
+            return (collection or self.collection).query(
+                query_embeddings=[query_embedding.tolist()],
+                n_results=n_results,
+                where=where
+            )
+    
+    def resolve_scope(
+        self, 
+        query_embedding: np.ndarray, 
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> Tuple[Optional[Dict], Optional[Set[str]]]:
+        """
+        Restrict chunk search to explicit chapter/article filters and/or routed articles
+        
+        Args:
+            query_embedding: Normalized query embedding
+            filters: {"chapters": [...], "articles": [...]} (optional)
+            
+        Returns:
+            Tuple (where, allowed_chunk_ids); (None, None) searches the whole collection
+        """
+        chapters = (filters or {}).get("chapters")
+        articles = (filters or {}).get("articles")
+        if not (chapters or articles or settings.ARTICLE_ROUTING_ENABLED):
+            return None, None
+        
+        index = get_article_index()
+        candidates = None
+        if chapters:
+            candidates = set(index.articles_in(chapters))
+        if articles:
+            wanted = set(map(str, articles))
+            candidates = wanted if candidates is None else candidates & wanted
+        
+        if settings.ARTICLE_ROUTING_ENABLED and (candidates is None or len(candidates) > settings.ARTICLE_ROUTING_TOP_K):
+            with timed("article_routing"):
+                scope = index.route(query_embedding, settings.ARTICLE_ROUTING_TOP_K, candidates)
+        else:
+            scope = sorted(candidates)
+        return {"article_number": {"$in": scope}}, index.chunk_ids(scope)
+    
+    def search(
+        self, 
+        query: str, 
+        query_embedding: np.ndarray, 
+        n_results: int = 5, 
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> Dict:
+        """
+        Retrieve candidates from the selected corpus shards (within filters / routed
+        articles), then rerank them when enabled
+        
+        Args:
+            query: User's question
+            query_embedding: Normalized query embedding
+            n_results: Number of chunks returned
+            filters: {"chapters": [...], "articles": [...], "shards": [...]} (optional)
+            
+        Returns:
+            Dict contains documents, metadatas, distances
+        """
+        shards = self.select_shards(filters)
+        n_candidates = max(n_results, settings.RERANK_CANDIDATES) if settings.RERANK_ENABLED else n_results
+        
+        if len(shards) == 1 and shards[0].primary:
+            candidates = self.shard_search(shards[0], query, query_embedding, n_candidates, filters)
+        else:
+            with timed("shard_fanout"):
+                shard_results = fan_out(
+                    lambda shard: self.shard_search(shard, query, query_embedding, n_candidates, filters),
+                    shards
+                )
+            candidates = self.merge_shard_results(shards, shard_results, n_candidates)
+        
+        if not settings.RERANK_ENABLED:
+            return candidates
+        return self.rerank(query, candidates, n_results)
+    
+    def select_shards(self, filters: Optional[Dict[str, List[str]]] = None) -> List[Shard]:
+        """Corpus shards searched for a request (filters["shards"], else the default shards)"""
+        return get_corpus_registry().select((filters or {}).get("shards"))
+    
+    def primary_only(self, filters: Optional[Dict[str, List[str]]] = None) -> bool:
+        """Whether only the primary law is searched (its structure index answers citations)"""
+        shards = self.select_shards(filters)
+        return len(shards) == 1 and shards[0].primary
+    
+    def shard_search(
+        self, 
+        shard: Shard, 
+        query: str, 
+        query_embedding: np.ndarray, 
+        n_results: int, 
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> Dict:
+        """
+        Search one corpus shard
+        
+        The primary shard has the BM25 and article indexes (hybrid search, routing);
+        other shards are searched dense-only with the explicit filters.
+        
+        Args:
+            shard: Corpus shard
+            query: User's question
+            query_embedding: Normalized query embedding
+            n_results: Number of chunks returned
+            filters: {"chapters": [...], "articles": [...]} (optional)
+            
+        Returns:
+            Dict contains documents, metadatas, distances
+        """
+        if not shard.primary:
+            return self.dense_search(
+                query_embedding, n_results, metadata_filter(filters), get_shard_collection(shard.collection)
+            )
+        
+        where, allowed_ids = self.resolve_scope(query_embedding, filters)
+        if allowed_ids is not None and not allowed_ids:
+            return empty_results()
+        return self.candidate_search(query, query_embedding, n_results, where, allowed_ids)
+    
+    def merge_shard_results(self, shards: List[Shard], shard_results: List[Dict], n_results: int) -> Dict:
+        """
+        Merge per-shard results by rank
+        
+        Each shard's list is already ranked its own way (the primary shard by
+        BM25 + dense fusion, the others by distance), so distances are not
+        compared across shards: the lists are interleaved by per-shard rank
+        (equal-weight RRF), ties going to the shard listed first.
+        
+        Hits of non-primary shards get shard-qualified IDs, a "shard" metadata key
+        and the document title in their reference.
+        
+        Args:
+            shards: Searched shards
+            shard_results: Results of each shard, aligned with shards
+            n_results: Number of chunks returned
+            
+        Returns:
+            Dict contains ids, documents, metadatas, distances
+        """
+        rows = []
+        for shard_index, (shard, results) in enumerate(zip(shards, shard_results)):
+            for rank, (chunk_id, doc, metadata, distance) in enumerate(zip(
+                results['ids'][0],
+                results['documents'][0],
+                results['metadatas'][0],
+                results['distances'][0]
+            )):
+                if not shard.primary:
+                    chunk_id = f"{shard.id}:{chunk_id}"
+                    metadata = {
+                        **metadata, 
+                        'shard': shard.id,
+                        'full_reference': f"{shard.title}, {metadata.get('full_reference', 'N/A')}"
+                    }
+                rows.append(((rank, shard_index), chunk_id, doc, metadata, distance))
+        rows.sort(key=lambda row: row[0])
+        rows = rows[:n_results]
+        
+        return {
+            'ids': [[row[1] for row in rows]],
+            'documents': [[row[2] for row in rows]],
+            'metadatas': [[row[3] for row in rows]],
+            'distances': [[row[4] for row in rows]]
+        }
+    
+    def rerank(self, query: str, candidates: Dict, n_results: int) -> Dict:
+        """Second stage: cross-encoder reranking under the RERANK_BUDGET_MS budget"""
+        with timed("rerank"):
+            return get_reranker().rerank(query, candidates, n_results)
+    
+    def candidate_search(
+        self, 
+        query: str, 
+        query_embedding: np.ndarray, 
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+        allowed_ids: Optional[Set[str]] = None
+    ) -> Dict:
+        """
+        Dense search, fused with BM25 lexical search when hybrid search is enabled
+        
+        Args:
+            query: User's question
+            query_embedding: Normalized query embedding
+            n_results: Number of chunks returned
+            where: Metadata filter of the dense search (optional)
+            allowed_ids: Chunk IDs matching where, for the BM25 side (optional)
+            
+        Returns:
+            Dict contains documents, metadatas, distances
+        """
+        if not settings.HYBRID_SEARCH_ENABLED:
+            return self.dense_search(query_embedding, n_results, where)
+        
+        n_candidates = max(n_results, settings.HYBRID_CANDIDATES)
+        dense_results = self.dense_search(query_embedding, n_candidates, where)
+        with timed("lexical_query"):
+            lexical_results = get_lexical_index().search(query, n_candidates, allowed_ids)
+        with timed("fusion"):
+            return self.fuse_results(query_embedding, dense_results, lexical_results, n_results)
+    
+    def fuse_results(
+        self, 
+        query_embedding: np.ndarray, 
+        dense_results: Dict, 
+        lexical_results: List[Tuple[str, float]], 
+        n_results: int
+    ) -> Dict:
+        """
+        Reciprocal rank fusion of dense and BM25 rankings
+        
+        Args:
+            query_embedding: Normalized query embedding (distance of lexical-only hits)
+            dense_results: Results from ChromaDB
+            lexical_results: (chunk_id, score) pairs from the BM25 index
+            n_results: Number of chunks returned
+            
+        Returns:
+            Dict contains ids, documents, metadatas, distances in fused order
+        """
+        fused_scores: Dict[str, float] = {}
+        for rank, chunk_id in enumerate(dense_results['ids'][0]):
+            fused_scores[chunk_id] = fused_scores.get(chunk_id, 0.0) + 1 / (settings.RRF_K + rank + 1)
+        for rank, (chunk_id, _) in enumerate(lexical_results):
+            fused_scores[chunk_id] = fused_scores.get(chunk_id, 0.0) + 1 / (settings.RRF_K + rank + 1)
+        top_ids = sorted(fused_scores, key=fused_scores.get, reverse=True)[:n_results]
+        
+        rows = {
+            chunk_id: (doc, metadata, distance)
+            for chunk_id, doc, metadata, distance in zip(
+                dense_results['ids'][0],
+                dense_results['documents'][0],
+                dense_results['metadatas'][0],
+                dense_results['distances'][0]
+            )
+        }
+        
+        # Chunks found only by BM25: fetch them, distance from their stored embedding
+        missing = [chunk_id for chunk_id in top_ids if chunk_id not in rows]
+        if missing:
+            fetched = self.collection.get(ids=missing, include=['documents', 'metadatas', 'embeddings'])
+            for chunk_id, doc, metadata, embedding in zip(
+                fetched['ids'], fetched['documents'], fetched['metadatas'], fetched['embeddings']
+            ):
+                similarity = float(np.dot(np.asarray(embedding, dtype=np.float32), query_embedding))
+                rows[chunk_id] = (doc, metadata, 2.0 - 2.0 * similarity)
+        
+        top_ids = [chunk_id for chunk_id in top_ids if chunk_id in rows]
+        return {
+            'ids': [top_ids],
+            'documents': [[rows[chunk_id][0] for chunk_id in top_ids]],
+            'metadatas': [[rows[chunk_id][1] for chunk_id in top_ids]],
+            'distances': [[rows[chunk_id][2] for chunk_id in top_ids]]
+        }
+    
+    def retrieve_citation(
+        self, 
+        query: str, 
+        n_results: int = 5, 
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> Optional[Dict]:
+        """
+        Fast path for questions citing a provision ("Điều 8 khoản 2 quy định gì?")
+        
+        Args:
+            query: User's question
+            n_results: Number of chunks requested (the cited provision may return more)
+            filters: Request filters; a citation is ambiguous when other shards are searched
+            
+        Returns:
+            The cited provision with its siblings, or None if the question cites nothing
+        """
+        if not settings.CITATION_FAST_PATH_ENABLED or not self.primary_only(filters):
+            return None
+        citations = detect_citations(query)
+        if not citations:
+            return None
+        with timed("citation_lookup"):
+            return get_structure_index().lookup(
+                citations, 
+                max(n_results, settings.CITATION_MAX_CHUNKS)
+            )
+    
+    @pins_index
+    def retrieve_with_embedding(
+        self, 
+        query: str, 
+        n_results: int = 5, 
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> Tuple[Optional[np.ndarray], Dict]:
+        """
+        Retrieve chunks and return the query embedding used (None on the citation fast path)
+        
+        Args:
+            query: User's question
+            n_results: Number of chunks returned
+            filters: {"chapters": [...], "articles": [...], "shards": [...]} (optional)
+            
+        Returns:
+            Tuple (query_embedding, results)
+        """
+        # Cited provision: no embedding, no vector search
+        results = self.retrieve_citation(query, n_results, filters)
+        if results is not None:
+            return None, results
+        
         # Encode query
-        query_embedding = self.embedding_model.encode(
-            query, 
-            normalize_embeddings=True
-        )
+        query_embedding = self.encode_query(query)
         
-        # Query ChromaDB
-        results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()],
-            n_results=n_results
-        )
+        # Query ChromaDB (+ BM25)
+        return query_embedding, self.search(query, query_embedding, n_results, filters)
+    
+    @pins_index
+    async def aretrieve_with_embedding(
+        self, 
+        query: str, 
+        n_results: int = 5, 
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> Tuple[Optional[np.ndarray], Dict]:
+        """
+        Async version of retrieve_with_embedding: batched encode + search on the bounded executor
         
-        return results
+        Args:
+            query: User's question
+            n_results: Number of chunks returned
+            filters: {"chapters": [...], "articles": [...], "shards": [...]} (optional)
+            
+        Returns:
+            Tuple (query_embedding, results)
+        """
+        results = self.retrieve_citation(query, n_results, filters)
+        if results is not None:
+            return None, results
+        
+        query_embedding = await self.aencode_query(query)
+        return query_embedding, await run_blocking(self.search, query, query_embedding, n_results, filters)
+    
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Encode many queries with a single model call (query embedding cache first)
+        
+        Args:
+            queries: User questions
+            
+        Returns:
+            Matrix of normalized query embeddings, one row per query
+        """
+        cache = get_embedding_cache() if settings.EMBEDDING_CACHE_ENABLED else None
+        embeddings: List[Optional[np.ndarray]] = [cache.get(q) if cache else None for q in queries]
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            with timed("encode"):
+                encoded = self.embedding_model.encode(
+                    [queries[i] for i in missing],
+                    batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                )
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+                if cache:
+                    cache.put(queries[i], embedding)
+        return np.vstack(embeddings)
+    
+    @pins_index
+    def retrieve_batch(self, queries: List[str], n_results: int = 5) -> List[Tuple[Optional[np.ndarray], Dict]]:
+        """
+        Retrieve for many questions: one batched encode and one multi-embedding vector query
+        
+        Args:
+            queries: User questions
+            n_results: Number of chunks returned per question
+            
+        Returns:
+            List of (query_embedding, results), in the order of queries
+        """
+        retrieved: List[Optional[Tuple[Optional[np.ndarray], Dict]]] = [None] * len(queries)
+        
+        # Cited provisions go through the structural fast path
+        for i, query in enumerate(queries):
+            results = self.retrieve_citation(query, n_results)
+            if results is not None:
+                retrieved[i] = (None, results)
+        
+        pending = [i for i, item in enumerate(retrieved) if item is None]
+        if pending and (settings.ARTICLE_ROUTING_ENABLED or not self.primary_only()):
+            # Each question searches its own routed articles / fans out over the shards:
+            # batched encode, per-question search
+            query_embeddings = self.encode_queries([queries[i] for i in pending])
+            for row, i in enumerate(pending):
+                retrieved[i] = (query_embeddings[row], self.search(queries[i], query_embeddings[row], n_results))
+        elif pending:
+            query_embeddings = self.encode_queries([queries[i] for i in pending])
+            n_keep = max(n_results, settings.RERANK_CANDIDATES) if settings.RERANK_ENABLED else n_results
+            n_candidates = max(n_keep, settings.HYBRID_CANDIDATES) if settings.HYBRID_SEARCH_ENABLED else n_keep
+            with timed("vector_query"):
+                batch_results = self.collection.query(
+                    query_embeddings=query_embeddings.tolist(),
+                    n_results=n_candidates
+                )
+            
+            for row, i in enumerate(pending):
+                dense_results = {key: [batch_results[key][row]] for key in ('ids', 'documents', 'metadatas', 'distances')}
+                if settings.HYBRID_SEARCH_ENABLED:
+                    with timed("lexical_query"):
+                        lexical_results = get_lexical_index().search(queries[i], n_candidates)
+                    with timed("fusion"):
+                        results = self.fuse_results(query_embeddings[row], dense_results, lexical_results, n_keep)
+                else:
+                    results = dense_results
+                if settings.RERANK_ENABLED:
+                    results = self.rerank(queries[i], results, n_results)
+                retrieved[i] = (query_embeddings[row], results)
+        
+        return retrieved
+    
+    def retrieve(self, query: str, n_results: int = 5, filters: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """
+        Looling for the most related chunks 
+        
+        Args:
+            query: User's question
+            n_results: Number of chunks returned
+            filters: {"chapters": [...], "articles": [...], "shards": [...]} (optional)
+            
+        Returns:
+            Dict contains documents, metadatas, distances
+        """
+        return self.retrieve_with_embedding(query, n_results, filters)[1]
+    
+    async def aretrieve(self, query: str, n_results: int = 5, filters: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """
+        Async version of retrieve
+        
+        Args:
+            query: User's question
+            n_results: Number of chunks returned
+            filters: {"chapters": [...], "articles": [...], "shards": [...]} (optional)
+            
+        Returns:
+            Dict contains documents, metadatas, distances
+        """
+        return (await self.aretrieve_with_embedding(query, n_results, filters))[1]
     
     def format_context(self, results: Dict) -> str:
         """
@@ -49,6 +579,13 @@ class RAGService:
         Returns:
             Formated string context 
         """
+        with timed("context_format"):
+            if settings.CONTEXT_BUILDER_ENABLED:
+                return get_context_builder().build(results)
+            return self.format_context_plain(results)
+    
+    def format_context_plain(self, results: Dict) -> str:
+        """Numbered citations, one per retrieved chunk (context builder disabled)"""
         contexts = []
         
         for i, (doc, metadata) in enumerate(zip(
@@ -86,12 +623,81 @@ class RAGService:
         
         return sources
     
+    def lookup_cached_answer(
+        self, 
+        query_embedding: Optional[np.ndarray], 
+        results: Dict, 
+        model: str = None
+    ) -> Optional[str]:
+        """
+        Look up the semantic answer cache for this query and retrieved context
+        
+        Args:
+            query_embedding: Normalized query embedding (None on the citation fast path)
+            results: Results from ChromaDB
+            model: Groq model to use (optional)
+            
+        Returns:
+            Cached answer or None
+        """
+        # A request still running on a swapped-out index must not touch the new cache
+        if not settings.ANSWER_CACHE_ENABLED or query_embedding is None or current_index().retired:
+            return None
+        return get_answer_cache().lookup(
+            query_embedding,
+            results['ids'][0],
+            model or settings.DEFAULT_LLM_MODEL,
+            get_index_version()
+        )
+    
+    def store_cached_answer(
+        self, 
+        query_embedding: Optional[np.ndarray], 
+        results: Dict, 
+        model: str, 
+        answer: str
+    ):
+        """Store a generated answer in the semantic answer cache"""
+        if not settings.ANSWER_CACHE_ENABLED or query_embedding is None or not answer or current_index().retired:
+            return
+        get_answer_cache().store(
+            query_embedding,
+            results['ids'][0],
+            model or settings.DEFAULT_LLM_MODEL,
+            get_index_version(),
+            answer
+        )
+    
+    def open_session(self, session_id: Optional[str], question: str) -> Tuple[str, str]:
+        """
+        Session context for a turn
+        
+        Args:
+            session_id: Session ID (None for a stateless question)
+            question: User's question
+            
+        Returns:
+            Tuple (retrieval_query, history); history is "" without prior turns
+        """
+        if not session_id:
+            return question, ""
+        session = get_session_store().get(session_id)
+        return session.retrieval_query(question), session.render_history()
+    
+    def close_turn(self, session_id: Optional[str], question: str, answer: str):
+        """Record the answered turn in the session"""
+        if session_id and answer:
+            get_session_store().add_turn(session_id, question, answer)
+    
+    @pins_index
     def query(
         self, 
         question: str, 
         n_results: int = 5,
         show_sources: bool = True,
-        model: str = None
+        model: str = None,
+        session_id: str = None,
+        filters: Optional[Dict[str, List[str]]] = None
     ) -> Tuple[str, List[Source]]:
         """
         Query end-to-end: Retrieve → Generate
@@ -101,23 +707,229 @@ class RAGService:
             n_results: Number of chunks to retrieve
             show_sources: If to extract source documents
             model: Groq model to use (optional)
+            session_id: Chat session ID for multi-turn context (optional)
+            filters: Restrict retrieval, {"chapters": [...], "articles": [...], "shards": [...]} (optional)
             
         Returns:
             Tuple (answer, sources)
         """
-        # Step 1: Retrieve relevant chunks
-        results = self.retrieve(question, n_results)
+        # Step 1: Retrieve relevant chunks (follow-ups are searched with the previous question)
+        retrieval_query, history = self.open_session(session_id, question)
+        query_embedding, results = self.retrieve_with_embedding(retrieval_query, n_results, filters)
         
-        # Step 2: Format context
-        context = self.format_context(results)
+        # Step 2: Reuse a cached answer for the same context, else generate
+        # (answers that depend on conversation history are not cached)
+        answer = None if history else self.lookup_cached_answer(query_embedding, results, model)
+        if answer is None:
+            context = self.format_context(results)
+            with timed("llm"):
+                answer = get_llm_service().generate_answer(question, context, model, history=history)
+            if not history:
+                self.store_cached_answer(query_embedding, results, model, answer)
+        self.close_turn(session_id, question, answer)
         
-        # Step 3: Generate answer
-        answer = llm_service.generate_answer(question, context, model)
+        # Step 3: Extract sources (if needed)
+        sources = self.extract_sources(results) if show_sources else []
         
-        # Step 4: Extract sources (if needed)
+        return answer, sources
+    
+    @pins_index
+    async def aquery(
+        self, 
+        question: str, 
+        n_results: int = 5,
+        show_sources: bool = True,
+        model: str = None,
+        session_id: str = None,
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> Tuple[str, List[Source]]:
+        """
+        Async query end-to-end: Retrieve → Generate without blocking the event loop
+        
+        The LLM call waits for an interactive admission slot; cached answers never take one.
+        
+        Args:
+            question: User's question
+            n_results: Number of chunks to retrieve
+            show_sources: If to extract source documents
+            model: Groq model to use (optional)
+            session_id: Chat session ID for multi-turn context (optional)
+            filters: Restrict retrieval, {"chapters": [...], "articles": [...], "shards": [...]} (optional)
+            
+        Returns:
+            Tuple (answer, sources)
+            
+        Raises:
+            AdmissionRejected: No LLM slot within ADMISSION_MAX_WAIT_SECONDS
+        """
+        # Step 1: Retrieve relevant chunks (CPU-bound, on executor)
+        retrieval_query, history = self.open_session(session_id, question)
+        query_embedding, results = await self.aretrieve_with_embedding(retrieval_query, n_results, filters)
+        
+        # Step 2: Reuse a cached answer for the same context, else generate (non-blocking HTTP call)
+        answer = None if history else self.lookup_cached_answer(query_embedding, results, model)
+        if answer is None:
+            context = self.format_context(results)
+            async with get_admission_controller().slot(PRIORITY_INTERACTIVE):
+                with timed("llm"):
+                    answer = await get_llm_service().agenerate_answer(question, context, model, history=history)
+            if not history:
+                self.store_cached_answer(query_embedding, results, model, answer)
+        self.close_turn(session_id, question, answer)
+        
+        # Step 3: Extract sources (if needed)
         sources = self.extract_sources(results) if show_sources else []
         
         return answer, sources
+    
+    @pins_index
+    async def query_batch(
+        self, 
+        questions: List[str], 
+        n_results: int = 5,
+        show_sources: bool = True,
+        model: str = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer many questions: vectorized retrieval, then LLM calls with bounded concurrency
+        
+        Results are yielded as each answer completes (not in input order); a failing
+        question yields an item with "error" instead of failing the whole batch.
+        
+        Args:
+            questions: User questions
+            n_results: Number of chunks to retrieve per question
+            show_sources: If to extract source documents
+            model: Groq model to use (optional)
+            
+        Yields:
+            Dict with index, question, answer, sources, cached, error
+        """
+        # Step 1: Retrieve for all questions at once (CPU-bound, on executor)
+        retrieved = await run_blocking(self.retrieve_batch, questions, n_results)
+        
+        # Step 2: Generate concurrently, at most BATCH_LLM_CONCURRENCY calls in flight,
+        # each behind a batch-priority admission slot (interactive chat goes first)
+        semaphore = asyncio.Semaphore(settings.BATCH_LLM_CONCURRENCY)
+        
+        async def answer_one(index: int) -> Dict[str, Any]:
+            question = questions[index]
+            query_embedding, results = retrieved[index]
+            item = {"index": index, "question": question, "answer": None, "sources": None, "cached": False, "error": None}
+            try:
+                answer = self.lookup_cached_answer(query_embedding, results, model)
+                item["cached"] = answer is not None
+                if answer is None:
+                    context = self.format_context(results)
+                    async with semaphore, get_admission_controller().slot(
+                        PRIORITY_BATCH, settings.ADMISSION_BATCH_MAX_WAIT_SECONDS
+                    ):
+                        with timed("llm"):
+                            answer = await get_llm_service().agenerate_answer(question, context, model)
+                    self.store_cached_answer(query_embedding, results, model, answer)
+                item["answer"] = answer
+                if show_sources:
+                    item["sources"] = [source.model_dump() for source in self.extract_sources(results)]
+            except Exception as e:
+                item["error"] = str(e)
+            return item
+        
+        tasks = [asyncio.create_task(answer_one(i)) for i in range(len(questions))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away: don't keep spending LLM calls
+            for task in tasks:
+                task.cancel()
+    
+    @pins_index
+    async def astream_query(
+        self, 
+        question: str, 
+        n_results: int = 5,
+        show_sources: bool = True,
+        model: str = None,
+        session_id: str = None,
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming query: Retrieve → emit sources → stream answer tokens
+        
+        Args:
+            question: User's question
+            n_results: Number of chunks to retrieve
+            show_sources: If to extract source documents
+            model: Groq model to use (optional)
+            session_id: Chat session ID for multi-turn context (optional)
+            filters: Restrict retrieval, {"chapters": [...], "articles": [...], "shards": [...]} (optional)
+            
+        Yields:
+            Tuples (event, data): "sources" once, "token" per text delta, "done" with timings
+            
+        Raises:
+            AdmissionRejected: No LLM slot within ADMISSION_MAX_WAIT_SECONDS (after "sources")
+        """
+        start = time.perf_counter()
+        
+        # Step 1: Retrieve relevant chunks
+        retrieval_query, history = self.open_session(session_id, question)
+        query_embedding, results = await self.aretrieve_with_embedding(retrieval_query, n_results, filters)
+        retrieval_ms = (time.perf_counter() - start) * 1000
+        
+        # Step 2: Send sources before generation starts
+        sources = self.extract_sources(results) if show_sources else []
+        yield "sources", {
+            "question": question,
+            "sources": [source.model_dump() for source in sources]
+        }
+        
+        # Step 3: Stream answer tokens (a cached answer goes out as one token event)
+        generation_start = time.perf_counter()
+        first_token_ms = None
+        n_chunks = 0
+        
+        cached_answer = None if history else self.lookup_cached_answer(query_embedding, results, model)
+        if cached_answer is not None:
+            first_token_ms = (time.perf_counter() - start) * 1000
+            n_chunks = 1
+            yield "token", {"content": cached_answer}
+            self.close_turn(session_id, question, cached_answer)
+        else:
+            context = self.format_context(results)
+            deltas = []
+            # The slot is held while tokens stream; a client that leaves frees it
+            async with get_admission_controller().slot(PRIORITY_INTERACTIVE):
+                llm_start = time.perf_counter()
+                async for delta in get_llm_service().astream_answer(question, context, model, history=history):
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                        observe_stage("llm_first_token", time.perf_counter() - llm_start)
+                    n_chunks += 1
+                    deltas.append(delta)
+                    yield "token", {"content": delta}
+                observe_stage("llm", time.perf_counter() - llm_start)
+            answer = "".join(deltas).strip()
+            if not history:
+                self.store_cached_answer(query_embedding, results, model, answer)
+            self.close_turn(session_id, question, answer)
+        
+        # Step 4: Timing metadata
+        end = time.perf_counter()
+        yield "done", {
+            "model": model or settings.DEFAULT_LLM_MODEL,
+            "session_id": session_id,
+            "cached": cached_answer is not None,
+            "chunks": n_chunks,
+            "timings": {
+                "retrieval_ms": round(retrieval_ms, 2),
+                "first_token_ms": round(first_token_ms, 2) if first_token_ms is not None else None,
+                "generation_ms": round((end - generation_start) * 1000, 2),
+                "total_ms": round((end - start) * 1000, 2)
+            }
+        }
 
-# Singleton instance
-rag_service = RAGService()
\ No newline at end of file
+@lru_cache()
+def get_rag_service() -> RAGService:
+    """Create and return the RAG service singleton (lazily, on first use)"""
+    return RAGService()
\ No newline at end of file
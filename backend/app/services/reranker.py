@@ -0,0 +1,157 @@
+"""
+Cross-encoder reranking of retrieval candidates under a latency budget
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.text_normalization import normalize_query
+
+class Reranker:
+    """
+    Second retrieval stage: score (query, chunk) pairs with a CPU cross-encoder
+    and keep the best n_results.
+
+    Scores are cached per (normalized query, chunk text). The stage has a time
+    budget: from the measured cost per pair it predicts how long the uncached
+    pairs take and skips reranking (first-stage order is kept) when that would
+    exceed budget_ms, or aborts between batches once the budget is spent.
+    """
+
+    def __init__(self, model=None, budget_ms: float = None, batch_size: int = None, cache_size: int = None):
+        if model is None:
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(settings.RERANKER_MODEL, max_length=settings.RERANK_MAX_LENGTH, device="cpu")
+        self.model = model
+        self.budget = (budget_ms if budget_ms is not None else settings.RERANK_BUDGET_MS) / 1000
+        self.batch_size = batch_size or settings.RERANK_BATCH_SIZE
+        self.cache_size = cache_size or settings.RERANK_CACHE_SIZE
+        self._scores: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.seconds_per_pair: Optional[float] = None  # moving average of the model cost
+
+        # Stats
+        self.reranked = 0
+        self.skipped = 0
+        self.aborted = 0
+        self.pairs_scored = 0
+        self.cache_hits = 0
+
+    @staticmethod
+    def make_key(query: str, document: str) -> str:
+        return hashlib.sha1(f"{normalize_query(query)}\x00{document}".encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[float]:
+        with self._lock:
+            score = self._scores.get(key)
+            if score is not None:
+                self._scores.move_to_end(key)
+            return score
+
+    def _store(self, key: str, score: float):
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+
+    def _update_cost(self, seconds: float, pairs: int):
+        per_pair = seconds / pairs
+        self.seconds_per_pair = per_pair if self.seconds_per_pair is None else 0.8 * self.seconds_per_pair + 0.2 * per_pair
+
+    def score(self, query: str, documents: List[str]) -> Optional[np.ndarray]:
+        """
+        Cross-encoder scores for documents, None if the budget does not allow it
+
+        Args:
+            query: User's question
+            documents: Candidate chunk texts
+
+        Returns:
+            Scores aligned with documents, or None (budget exceeded)
+        """
+        start = time.perf_counter()
+        keys = [self.make_key(query, document) for document in documents]
+        scores = np.empty(len(documents), dtype=np.float32)
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self._cached(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
+        self.cache_hits += len(documents) - len(missing)
+        record_cache("rerank", not missing)
+
+        if self.seconds_per_pair is not None and self.seconds_per_pair * len(missing) > self.budget:
+            self.skipped += 1
+            return None
+
+        for offset in range(0, len(missing), self.batch_size):
+            if time.perf_counter() - start > self.budget:
+                self.aborted += 1
+                return None
+            batch = missing[offset:offset + self.batch_size]
+            batch_start = time.perf_counter()
+            predicted = self.model.predict(
+                [(query, documents[i]) for i in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+            self._update_cost(time.perf_counter() - batch_start, len(batch))
+            self.pairs_scored += len(batch)
+            for i, value in zip(batch, predicted):
+                scores[i] = float(value)
+                self._store(keys[i], float(value))
+        return scores
+
+    def rerank(self, query: str, results: Dict, n_results: int) -> Dict:
+        """
+        Reorder first-stage results by cross-encoder score and keep n_results
+
+        Args:
+            query: User's question
+            results: First-stage results (Chroma format, one query)
+            n_results: Number of chunks returned
+
+        Returns:
+            Reranked results, or the first-stage top n_results when over budget
+        """
+        documents = results['documents'][0]
+        scores = self.score(query, documents) if len(documents) > 1 else None
+        if scores is None:
+            order = list(range(min(n_results, len(documents))))
+        else:
+            self.reranked += 1
+            order = [int(i) for i in np.argsort(-scores, kind="stable")[:n_results]]
+
+        reranked = {key: [[results[key][0][i] for i in order]] for key in ('ids', 'documents', 'metadatas', 'distances')}
+        if scores is not None:
+            reranked['rerank_scores'] = [[float(scores[i]) for i in order]]
+        return reranked
+
+    def stats(self) -> Dict:
+        return {
+            "reranked": self.reranked,
+            "skipped_budget": self.skipped,
+            "aborted_budget": self.aborted,
+            "pairs_scored": self.pairs_scored,
+            "cache_hits": self.cache_hits,
+            "cache_size": len(self._scores),
+            "ms_per_pair": round(self.seconds_per_pair * 1000, 3) if self.seconds_per_pair is not None else None,
+            "budget_ms": self.budget * 1000
+        }
+
+@lru_cache()
+def get_reranker() -> Reranker:
+    """Load the cross-encoder reranker (singleton)."""
+    reranker = Reranker()
+    print(f"Reranker '{settings.RERANKER_MODEL}' loaded (budget {reranker.budget * 1000:.0f} ms).")
+    return reranker
@@ -0,0 +1,194 @@
+"""
+Chat sessions - bounded, compacted conversation history
+"""
+
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from app.core.config import settings
+from app.core.structure_index import detect_citations
+from app.services.context_builder import estimate_tokens
+
+# Follow-up markers: the question only makes sense with the previous turn
+FOLLOWUP_PATTERN = re.compile(
+    r"^(còn|vậy|thế|nếu|trường hợp|và)\b|"
+    r"\b(thì sao|như vậy|như thế|trường hợp (đó|này|trên)|điều (đó|này)|khoản (đó|này)|xe (đó|này)|nó)\b",
+    re.IGNORECASE
+)
+
+class SessionNotFoundError(Exception):
+    """Unknown or expired session ID (sessions are only created by the server)"""
+
+class ChatSession:
+    """Conversation state: recent turns verbatim, older questions folded into a summary"""
+    __slots__ = ("session_id", "turns", "summary", "updated_at")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turns: List[Tuple[str, str]] = []  # (question, answer)
+        self.summary: List[str] = []            # questions of compacted turns
+        self.updated_at = time.monotonic()
+
+    def retrieval_query(self, question: str) -> str:
+        """
+        History-aware retrieval query
+
+        A short or anaphoric follow-up ("Còn xe máy thì sao?") is searched together
+        with the previous question; a self-contained question, or one citing its
+        own article ("Điều 9 thì sao?"), is searched as is.
+        """
+        if not self.turns or detect_citations(question):
+            return question
+        short = len(question.split()) <= settings.SESSION_FOLLOWUP_MAX_WORDS
+        if short or FOLLOWUP_PATTERN.search(question):
+            return f"{self.turns[-1][0]} {question}"
+        return question
+
+    def render_history(self) -> str:
+        """
+        Conversation history for the prompt, within SESSION_HISTORY_TOKEN_BUDGET
+
+        Newest turns are kept verbatim (answers trimmed); whatever does not fit,
+        plus already compacted turns, is listed as earlier questions only, within
+        SESSION_SUMMARY_TOKEN_BUDGET.
+        """
+        if not self.turns and not self.summary:
+            return ""
+
+        budget = settings.SESSION_HISTORY_TOKEN_BUDGET
+        rendered: List[str] = []
+        earlier: List[str] = []
+        for question, answer in reversed(self.turns):
+            if len(answer) > settings.SESSION_ANSWER_MAX_CHARS:
+                answer = answer[:settings.SESSION_ANSWER_MAX_CHARS].rsplit(" ", 1)[0] + "..."
+            block = f"Người dùng: {question}\nTrợ lý: {answer}"
+            cost = estimate_tokens(block)
+            if rendered and cost > budget:
+                earlier.append(question)
+                continue
+            rendered.append(block)
+            budget -= cost
+
+        # Earlier questions share the summary budget, oldest dropped first
+        summary = self.summary + list(reversed(earlier))
+        while summary and estimate_tokens("; ".join(summary)) > settings.SESSION_SUMMARY_TOKEN_BUDGET:
+            summary.pop(0)
+
+        parts = []
+        if summary:
+            parts.append("Các câu hỏi trước đó: " + "; ".join(summary))
+        parts.extend(reversed(rendered))
+        return "\n\n".join(parts)
+
+    def add_turn(self, question: str, answer: str):
+        """Append a turn; turns beyond SESSION_MAX_TURNS are compacted into the summary"""
+        self.turns.append((question, answer))
+        while len(self.turns) > settings.SESSION_MAX_TURNS:
+            self.summary.append(self.turns.pop(0)[0])
+        # The summary itself is bounded too: oldest questions are dropped
+        while self.summary and estimate_tokens("; ".join(self.summary)) > settings.SESSION_SUMMARY_TOKEN_BUDGET:
+            self.summary.pop(0)
+        self.updated_at = time.monotonic()
+
+class SessionStore:
+    """
+    In-memory session store with TTL and LRU eviction.
+
+    Sessions idle for more than ttl_seconds expire; past max_sessions the
+    least recently used session is evicted.
+    """
+
+    def __init__(self, ttl_seconds: float = None, max_sessions: int = None):
+        self.ttl_seconds = ttl_seconds or settings.SESSION_TTL_SECONDS
+        self.max_sessions = max_sessions or settings.SESSION_MAX_SESSIONS
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.created = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def create(self) -> ChatSession:
+        """
+        Start a session under a new server-generated ID
+
+        The ID is unguessable, so a client cannot read or delete another
+        client's history by picking the same ID.
+        """
+        session = ChatSession(secrets.token_urlsafe(16))
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self.created += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session
+
+    def _live(self, session_id: str) -> ChatSession:
+        """Session by ID, dropping it if expired (caller holds the lock)"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(session_id)
+        if time.monotonic() - session.updated_at > self.ttl_seconds:
+            del self._sessions[session_id]
+            self.expired += 1
+            raise SessionNotFoundError(session_id)
+        return session
+
+    def get(self, session_id: str) -> ChatSession:
+        """
+        Get a session created by create()
+
+        Args:
+            session_id: Server-issued session ID
+
+        Returns:
+            The session (most recently used from now on)
+
+        Raises:
+            SessionNotFoundError: Unknown, expired or evicted ID
+        """
+        with self._lock:
+            session = self._live(session_id)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def add_turn(self, session_id: str, question: str, answer: str):
+        """Record a completed turn (dropped if the session expired meanwhile)"""
+        with self._lock:
+            try:
+                session = self._live(session_id)
+            except SessionNotFoundError:
+                return
+            session.add_turn(question, answer)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            try:
+                self._live(session_id)
+            except SessionNotFoundError:
+                return False
+            del self._sessions[session_id]
+            return True
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "created": self.created,
+            "expired": self.expired,
+            "evictions": self.evictions
+        }
+
+@lru_cache()
+def get_session_store() -> SessionStore:
+    """Create and return the session store singleton."""
+    store = SessionStore()
+    print(f"Session store ready (ttl {store.ttl_seconds}s, max {store.max_sessions} sessions).")
+    return store
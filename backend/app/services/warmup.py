@@ -0,0 +1,124 @@
+"""
+Startup warm-up - load heavy components in parallel and track readiness
+"""
+import asyncio
+import time
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Optional
+from app.core.chromadb_client import get_collection
+from app.core.config import settings
+from app.core.corpus_registry import get_corpus_registry, get_shard_collection
+from app.core.embedding_model import get_embedding_model
+from app.core.executor import run_blocking
+from app.core.index_manager import get_index_manager
+from app.core.lexical_index import get_lexical_index
+from app.services.llm_service import get_llm_service
+from app.services.rag_service import RAGService, get_rag_service
+from app.services.reranker import get_reranker
+
+class Warmup:
+    """
+    Loads the index (vector store + auxiliary indexes), embedding model and LLM client concurrently,
+    then runs one encode + query so the first real request hits warm code paths.
+
+    Readiness (/api/ready) flips only after every step succeeded.
+    """
+
+    def __init__(self):
+        self.status = "pending"  # pending | warming | ready | failed
+        self.error: Optional[str] = None
+        self.load_times_ms: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    async def _timed(self, name: str, func: Callable[[], Any]) -> Any:
+        """Run a blocking loader in the executor and record its duration"""
+        start = time.perf_counter()
+        result = await run_blocking(func)
+        self.load_times_ms[name] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    def _warm_query(self):
+        """One encode + vector query (bypasses the caches so nothing is polluted)"""
+        embedding = get_embedding_model().encode(settings.WARMUP_QUERY, normalize_embeddings=True)
+        get_collection().query(query_embeddings=[embedding.tolist()], n_results=settings.DEFAULT_N_RESULTS)
+        if settings.HYBRID_SEARCH_ENABLED:
+            get_lexical_index().search(settings.WARMUP_QUERY, settings.HYBRID_CANDIDATES)
+        if settings.RERANK_ENABLED:
+            # Also seeds the per-pair cost estimate used by the rerank budget
+            get_reranker().score(settings.WARMUP_QUERY, ["Luật giao thông đường bộ"] * settings.RERANK_BATCH_SIZE)
+
+    async def run(self):
+        """Load all components concurrently, then warm the query path"""
+        self.status = "warming"
+        start = time.perf_counter()
+        try:
+            loaders = [
+                # Served index version: collection, BM25, structure and article indexes (timed per part below)
+                self._timed("index", get_index_manager),
+                self._timed("embedding_model", get_embedding_model),
+                self._timed("llm_client", get_llm_service),
+            ]
+            if settings.RERANK_ENABLED:
+                loaders.append(self._timed("reranker", get_reranker))
+            await asyncio.gather(*loaders)
+            self.load_times_ms.update(get_index_manager().current.load_times_ms)
+            # Other corpus shards share the ChromaDB client opened with the primary collection
+            await asyncio.gather(*(
+                self._timed(f"shard:{shard.id}", partial(get_shard_collection, shard.collection))
+                for shard in get_corpus_registry().select() if not shard.primary
+            ))
+            await self._timed("rag_service", get_rag_service)
+            await self._timed("warmup_query", self._warm_query)
+
+            self.load_times_ms["total"] = round((time.perf_counter() - start) * 1000, 2)
+            self.status = "ready"
+            print(f"✅ Warm-up done in {self.load_times_ms['total']:.0f} ms: {self.load_times_ms}")
+
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            print(f"❌ Warm-up failed: {e}")
+
+    def start(self) -> asyncio.Task:
+        """Schedule warm-up in the background (the server accepts connections meanwhile)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def wait(self):
+        """Wait for an in-flight warm-up so requests don't load components a second time"""
+        if self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def stop(self):
+        """Cancel a warm-up still running at shutdown"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "load_times_ms": self.load_times_ms,
+            "error": self.error
+        }
+
+@lru_cache()
+def get_warmup() -> Warmup:
+    """Create and return the warm-up tracker singleton"""
+    return Warmup()
+
+async def aget_rag_service() -> RAGService:
+    """RAG service for request handlers: waits for a running warm-up, loads lazily otherwise"""
+    await get_warmup().wait()
+    if get_rag_service.cache_info().currsize:
+        return get_rag_service()
+    return await run_blocking(get_rag_service)
@@ -0,0 +1,66 @@
+"""
+Micro-benchmark: legacy parser (parse_law_document + flatten_to_chunks + indented JSON)
+vs streaming parser (iter_law_chunks + JSON Lines) on raw_text.txt scaled up N times.
+
+Usage (from backend/scripts/):
+    python benchmark_law_parser.py [--scales 1 10 50] [--input ../data/raw/raw_text.txt]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from law_parser import (
+    flatten_to_chunks,
+    iter_law_chunks_from_file,
+    parse_law_document,
+    save_chunks_to_jsonl,
+)
+
+def run_legacy(input_file, output_file):
+    with open(input_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+    chunks = flatten_to_chunks(parse_law_document(text))
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(chunks, f, ensure_ascii=False, indent=2)
+    return len(chunks)
+
+def run_streaming(input_file, output_file):
+    return save_chunks_to_jsonl(iter_law_chunks_from_file(input_file), output_file)
+
+def measure(func, *args):
+    """(result, seconds, peak traced memory in MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return result, seconds, peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark law parsers")
+    parser.add_argument("--input", default="../data/raw/raw_text.txt")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        base_text = f.read().strip() + '\n'
+
+    print(f"{'scale':>6} | {'chunks':>8} | {'legacy s':>9} | {'legacy MB':>9} | "
+          f"{'stream s':>9} | {'stream MB':>9} | {'speedup':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            input_file = os.path.join(tmp, f"raw_x{scale}.txt")
+            with open(input_file, 'w', encoding='utf-8') as f:
+                for _ in range(scale):
+                    f.write(base_text)
+
+            n_legacy, legacy_s, legacy_mb = measure(run_legacy, input_file, os.path.join(tmp, "legacy.json"))
+            n_stream, stream_s, stream_mb = measure(run_streaming, input_file, os.path.join(tmp, "stream.jsonl"))
+            assert n_legacy == n_stream, f"chunk count mismatch: {n_legacy} != {n_stream}"
+
+            print(f"{scale:>6} | {n_stream:>8} | {legacy_s:>9.3f} | {legacy_mb:>9.1f} | "
+                  f"{stream_s:>9.3f} | {stream_mb:>9.1f} | {legacy_s / stream_s:>6.1f}x")
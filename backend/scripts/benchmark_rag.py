@@ -0,0 +1,250 @@
+"""
+Offline load test and retrieval benchmark for the RAG API
+
+Runs the FastAPI app in-process (httpx ASGI transport, no network) against
+scripts/stub_llm_server.py as a deterministic stand-in for Groq, then:
+  - replays a labeled Vietnamese question set at a given concurrency and
+    reports throughput + p50/p95/p99 latency per pipeline stage (from the
+    Server-Timing header, or the "done" event for /api/chat/stream)
+  - measures retrieval recall@k / hit@k against the labeled article numbers
+
+Caches are disabled by default so every request runs the full pipeline. The
+per-client rate limit is off (every simulated user shares one client address);
+the admission slot pool stays on, overload shows up as 503s in the errors.
+
+Usage (from backend/):
+    python scripts/benchmark_rag.py --requests 200 --concurrency 16
+    python scripts/benchmark_rag.py --endpoint stream --llm-latency-ms 500 --output bench.json
+    python scripts/benchmark_rag.py --recall-only --k 1 3 5 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+DEFAULT_QUESTIONS = BACKEND_DIR / "data" / "benchmark_questions.json"
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline RAG load test and retrieval benchmark")
+    parser.add_argument("--questions", type=Path, default=DEFAULT_QUESTIONS, help="JSON list of {question, articles}")
+    parser.add_argument("--requests", type=int, default=100, help="Number of chat requests to send")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoint", choices=["chat", "stream"], default="chat")
+    parser.add_argument("--n-results", type=int, default=5)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="k values for recall@k")
+    parser.add_argument("--recall-only", action="store_true", help="Skip the load test")
+    parser.add_argument("--with-caches", action="store_true", help="Keep embedding/answer caches enabled")
+    parser.add_argument("--llm-url", help="Use an already running LLM endpoint instead of starting the stub")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Stub time to first token")
+    parser.add_argument("--llm-tokens", type=int, default=60, help="Stub tokens per answer")
+    parser.add_argument("--output", type=Path, help="Write results as JSON (for regression comparison)")
+    return parser.parse_args()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_stub(args: argparse.Namespace) -> subprocess.Popen:
+    """Start the stub LLM server with fixed latency and seed, wait until it accepts connections"""
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, str(BACKEND_DIR / "scripts" / "stub_llm_server.py"),
+            "--port", str(port), "--latency-ms", str(args.llm_latency_ms), "--jitter-ms", "0",
+            "--tokens", str(args.llm_tokens), "--seed", "0"
+        ],
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{port}"
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Stub LLM server did not start")
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean": round(float(np.mean(values)), 2),
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2)
+    }
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'encode;dur=12.3, llm;dur=300.1' -> {'encode': 12.3, 'llm': 300.1}"""
+    timings = {}
+    for part in filter(None, (p.strip() for p in header.split(","))):
+        name, _, params = part.partition(";")
+        if params.startswith("dur="):
+            timings[name] = float(params[4:])
+    return timings
+
+def measure_recall(questions: List[Dict], ks: List[int]) -> Dict:
+    """recall@k (share of labeled articles retrieved) and hit@k (at least one retrieved)"""
+    from app.services.rag_service import get_rag_service
+
+    rag_service = get_rag_service()
+    max_k = max(ks)
+    recall = {k: [] for k in ks}
+    hits = {k: [] for k in ks}
+    misses = []
+    for item in questions:
+        results = rag_service.retrieve(item["question"], max_k)
+        articles = [str(m.get("article_number")) for m in results["metadatas"][0]]
+        labeled = set(map(str, item["articles"]))
+        for k in ks:
+            found = labeled & set(articles[:k])
+            recall[k].append(len(found) / len(labeled))
+            hits[k].append(1.0 if found else 0.0)
+        if not labeled & set(articles[:max_k]):
+            misses.append({"question": item["question"], "expected": sorted(labeled), "retrieved": articles[:max_k]})
+
+    return {
+        "recall": {f"@{k}": round(float(np.mean(recall[k])), 4) for k in ks},
+        "hit": {f"@{k}": round(float(np.mean(hits[k])), 4) for k in ks},
+        "misses": misses
+    }
+
+async def load_test(app, questions: List[Dict], args: argparse.Namespace) -> Dict:
+    """Replay questions at a fixed concurrency; latency per stage from Server-Timing / done event"""
+    import httpx
+
+    stages: Dict[str, List[float]] = {}
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(client: httpx.AsyncClient, i: int):
+        question = questions[i % len(questions)]["question"]
+        payload = {"question": question, "n_results": args.n_results}
+        async with semaphore:
+            start = time.perf_counter()
+            if args.endpoint == "chat":
+                response = await client.post("/api/chat", json=payload)
+                ok = response.status_code == 200
+                timings = parse_server_timing(response.headers.get("server-timing", ""))
+                timings.pop("total", None)
+            else:
+                ok, timings = False, {}
+                async with client.stream("POST", "/api/chat/stream", json=payload) as response:
+                    event = None
+                    async for line in response.aiter_lines():
+                        if line.startswith("event: "):
+                            event = line[7:]
+                        elif line.startswith("data: ") and event == "done":
+                            ok = True
+                            timings = {k: v for k, v in json.loads(line[6:])["timings"].items() if v is not None}
+                            timings.pop("total_ms", None)
+            elapsed = (time.perf_counter() - start) * 1000
+
+        if not ok:
+            key = str(response.status_code) if response.status_code != 200 else "error_event"
+            errors[key] = errors.get(key, 0) + 1
+            return
+        latencies.append(elapsed)
+        for stage, ms in timings.items():
+            stages.setdefault(stage, []).append(ms)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(args.requests)))
+        wall = time.perf_counter() - start
+
+    return {
+        "endpoint": args.endpoint,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "wall_s": round(wall, 2),
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "errors": errors,
+        "latency_ms": percentiles(latencies),
+        "stages_ms": {stage: percentiles(values) for stage, values in stages.items()}
+    }
+
+def print_report(report: Dict):
+    retrieval = report["retrieval"]
+    print("\n📊 Retrieval")
+    print("   recall " + "  ".join(f"{k}={v:.3f}" for k, v in retrieval["recall"].items()))
+    print("   hit    " + "  ".join(f"{k}={v:.3f}" for k, v in retrieval["hit"].items()))
+    for miss in retrieval["misses"]:
+        print(f"   ✗ {miss['question']} (cần Điều {', '.join(miss['expected'])}, có {', '.join(miss['retrieved'])})")
+
+    load = report.get("load")
+    if not load:
+        return
+    print(f"\n📊 Load test: {load['requests']} requests, concurrency {load['concurrency']} ({load['endpoint']})")
+    print(f"   throughput {load['throughput_rps']} req/s, wall {load['wall_s']} s, errors {load['errors'] or 0}")
+    print(f"   {'stage':<18} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    rows = [("end_to_end", load["latency_ms"])] + list(load["stages_ms"].items())
+    for stage, stats in rows:
+        if stats["count"]:
+            print(f"   {stage:<18} {stats['count']:>6} {stats['p50']:>9.2f} {stats['p95']:>9.2f} {stats['p99']:>9.2f}")
+
+async def run(args: argparse.Namespace, questions: List[Dict]) -> Dict:
+    from app.main import app
+    from app.services.warmup import get_warmup
+
+    async with app.router.lifespan_context(app):
+        await get_warmup().wait()
+        if not get_warmup().ready:
+            raise RuntimeError(f"Warm-up failed: {get_warmup().error}")
+
+        report = {"warmup_ms": get_warmup().load_times_ms}
+        report["retrieval"] = measure_recall(questions, args.k)
+        if not args.recall_only:
+            report["load"] = await load_test(app, questions, args)
+        return report
+
+def main():
+    args = parse_args()
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+    if not args.with_caches:
+        os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+        os.environ["ANSWER_CACHE_ENABLED"] = "false"
+
+    stub = None
+    if args.llm_url:
+        os.environ["GROQ_BASE_URL"] = args.llm_url
+    elif not args.recall_only:
+        stub = start_stub(args)
+
+    try:
+        report = asyncio.run(run(args, questions))
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Đã lưu kết quả vào {args.output}")
+
+if __name__ == "__main__":
+    main()
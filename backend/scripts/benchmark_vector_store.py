@@ -0,0 +1,116 @@
+"""
+Benchmark ChromaDB vs the NumPy exact-search index: load time, query latency,
+batched throughput and resident memory.
+
+Each backend runs in its own subprocess so resident memory is measured in isolation.
+
+Usage (from backend/):
+    python scripts/build_numpy_index.py
+    python scripts/benchmark_vector_store.py [--queries 500] [--batch-size 32] [--n-results 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    import resource
+    # Peak RSS (KB on Linux, bytes on macOS) when /proc is not available
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def percentile(values, q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+def run_backend(backend: str, n_queries: int, batch_size: int, n_results: int) -> dict:
+    """Benchmark one backend inside the current process"""
+    os.environ["VECTOR_STORE_BACKEND"] = backend
+    rss_before = rss_mb()
+
+    start = time.perf_counter()
+    from app.core.chromadb_client import get_collection
+    collection = get_collection()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # Queries: stored chunk embeddings with small noise (realistic neighbourhoods)
+    data = collection.get(include=['embeddings'])
+    base = np.asarray(data['embeddings'], dtype=np.float32)
+    rng = np.random.default_rng(0)
+    queries = base[rng.integers(0, len(base), n_queries)]
+    queries = queries + rng.normal(0, 0.02, queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    # Warm-up
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=n_results)
+
+    single = []
+    for q in queries:
+        t = time.perf_counter()
+        collection.query(query_embeddings=[q.tolist()], n_results=n_results)
+        single.append((time.perf_counter() - t) * 1000)
+
+    t = time.perf_counter()
+    for i in range(0, n_queries, batch_size):
+        collection.query(query_embeddings=queries[i:i + batch_size].tolist(), n_results=n_results)
+    batched_s = time.perf_counter() - t
+
+    return {
+        "backend": backend,
+        "chunks": collection.count(),
+        "load_ms": round(load_ms, 2),
+        "p50_ms": round(percentile(single, 50), 3),
+        "p95_ms": round(percentile(single, 95), 3),
+        "p99_ms": round(percentile(single, 99), 3),
+        "single_qps": round(n_queries / (sum(single) / 1000), 1),
+        "batched_qps": round(n_queries / batched_s, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vector store backends")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--n-results", type=int, default=5)
+    parser.add_argument("--backend", choices=["chroma", "numpy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        # Child process: run one backend and print JSON
+        print(json.dumps(run_backend(args.backend, args.queries, args.batch_size, args.n_results)))
+        sys.exit(0)
+
+    rows = []
+    for backend in ("chroma", "numpy"):
+        print(f"🔄 Đang benchmark backend '{backend}'...")
+        output = subprocess.run(
+            [sys.executable, __file__, "--backend", backend,
+             "--queries", str(args.queries),
+             "--batch-size", str(args.batch_size),
+             "--n-results", str(args.n_results)],
+            capture_output=True, text=True, cwd=BACKEND_DIR, check=True
+        ).stdout
+        rows.append(json.loads(output.strip().splitlines()[-1]))
+
+    columns = ["backend", "chunks", "load_ms", "p50_ms", "p95_ms", "p99_ms",
+               "single_qps", "batched_qps", "rss_mb", "rss_delta_mb"]
+    print("\n📊 Kết quả:")
+    print(" | ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        print(" | ".join(f"{str(row[c]):>12}" for c in columns))
@@ -0,0 +1,37 @@
+"""
+Build the BM25 inverted index from law_chunks.json
+
+Usage (from backend/):
+    python scripts/build_bm25_index.py [--chunks data/processed/law_chunks.json] [--output data/law_bm25_index.npz]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings
+from app.core.lexical_index import BM25Index, build_index_from_chunks
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the BM25 index for hybrid retrieval")
+    parser.add_argument("--chunks", type=Path, default=settings.LAW_CHUNKS_PATH)
+    parser.add_argument("--output", type=Path, default=settings.BM25_INDEX_PATH)
+    args = parser.parse_args()
+
+    print(f"🔄 Đang xây dựng BM25 index từ {args.chunks}...")
+    start = time.perf_counter()
+    index = build_index_from_chunks(args.chunks)
+    index.save(args.output)
+    print(f"✅ {len(index.ids)} chunks, {len(index.term_index)} terms, "
+          f"{len(index.postings)} postings trong {time.perf_counter() - start:.2f}s → {args.output}")
+
+    # Kiểm tra tốc độ truy vấn
+    index = BM25Index.load(args.output)
+    queries = ["giấy phép lái xe", "nồng độ cồn", "Điều 8 khoản 2", "tốc độ tối đa xe mô tô"]
+    start = time.perf_counter()
+    for _ in range(250):
+        for query in queries:
+            index.search(query, 20)
+    print(f"⚡ Trung bình {(time.perf_counter() - start) / 1000 * 1000:.3f} ms / truy vấn")
@@ -0,0 +1,370 @@
+"""
+Incremental, batched indexing of the law collection
+
+Chunks the law text (or reads law_chunks.json), embeds only chunks whose
+content changed since the last run, and upserts them into ChromaDB in bulk.
+
+- Content hashes: embeddings are cached by sha256(model + document) in a
+  sqlite file, so unchanged chunks are never re-embedded, even if their
+  position (chunk ID) moves after re-parsing an amended law.
+- Resume: embeddings and the manifest are committed batch by batch, so an
+  interrupted run picks up where it stopped.
+- Parallel: --processes N encodes with a multi-process pool (N CPU workers).
+
+Usage (from backend/):
+    python scripts/build_index.py                                  # from data/processed/law_chunks.json
+    python scripts/build_index.py --chunks data/processed/law_chunks.jsonl
+    python scripts/build_index.py --raw-text data/raw/raw_text.txt # parse + chunk first
+    python scripts/build_index.py --processes 4 --batch-size 64 --export-numpy
+    python scripts/build_index.py --index-version 2024-06-01 --activate  # new version, hot-swapped
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "scripts"))
+
+from app.core.config import settings
+
+COLLECTION_DESCRIPTION = "Luật Giao Thông Đường Bộ Việt Nam"
+
+def load_chunks(chunks_path: Optional[Path], raw_text_path: Optional[Path]) -> List[Dict]:
+    """Read chunks from law_chunks.json / .jsonl, or parse raw law text with the streaming parser"""
+    if raw_text_path is not None:
+        from law_parser import iter_law_chunks_from_file
+        return list(iter_law_chunks_from_file(raw_text_path))
+
+    with open(chunks_path, 'r', encoding='utf-8') as f:
+        if Path(chunks_path).suffix == '.jsonl':
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+def chunk_document(chunk: Dict) -> str:
+    """Document text stored (and embedded) for a chunk: '<full_reference>: <content>'"""
+    return f"{chunk['metadata']['full_reference']}: {chunk['content']}"
+
+def sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class IndexState:
+    """
+    sqlite state shared across runs:
+        embeddings(content_hash → vector)       - never re-embed unchanged text
+        manifest(collection, chunk_id → hashes)  - what is already in the collection
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (content_hash TEXT PRIMARY KEY, embedding BLOB NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS manifest ("
+            "collection TEXT NOT NULL, chunk_id TEXT NOT NULL, content_hash TEXT NOT NULL, "
+            "metadata_hash TEXT NOT NULL, PRIMARY KEY (collection, chunk_id))"
+        )
+        self.conn.commit()
+
+    def cached_hashes(self, hashes: List[str]) -> set:
+        found = set()
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT content_hash FROM embeddings WHERE content_hash IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            found.update(row[0] for row in rows)
+        return found
+
+    def get_embeddings(self, hashes: List[str]) -> np.ndarray:
+        vectors = {}
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT content_hash, embedding FROM embeddings WHERE content_hash IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            vectors.update((h, np.frombuffer(blob, dtype=np.float32)) for h, blob in rows)
+        return np.stack([vectors[h] for h in hashes])
+
+    def put_embeddings(self, hashes: List[str], embeddings: np.ndarray):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (content_hash, embedding) VALUES (?, ?)",
+            [(h, np.asarray(e, dtype=np.float32).tobytes()) for h, e in zip(hashes, embeddings)]
+        )
+        self.conn.commit()
+
+    def manifest(self, collection: str) -> Dict[str, Tuple[str, str]]:
+        rows = self.conn.execute(
+            "SELECT chunk_id, content_hash, metadata_hash FROM manifest WHERE collection = ?", (collection,)
+        )
+        return {chunk_id: (content_hash, metadata_hash) for chunk_id, content_hash, metadata_hash in rows}
+
+    def update_manifest(self, collection: str, rows: List[Tuple[str, str, str]]):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO manifest (collection, chunk_id, content_hash, metadata_hash) VALUES (?, ?, ?, ?)",
+            [(collection, *row) for row in rows]
+        )
+        self.conn.commit()
+
+    def delete_from_manifest(self, collection: str, chunk_ids: List[str]):
+        self.conn.executemany(
+            "DELETE FROM manifest WHERE collection = ? AND chunk_id = ?",
+            [(collection, chunk_id) for chunk_id in chunk_ids]
+        )
+        self.conn.commit()
+
+    def reset_manifest(self, collection: str):
+        self.conn.execute("DELETE FROM manifest WHERE collection = ?", (collection,))
+        self.conn.commit()
+
+def batched(items: List, size: int) -> Iterator[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def embed_missing(
+    texts_by_hash: Dict[str, str],
+    state: IndexState,
+    batch_size: int,
+    processes: int,
+    commit_every: int
+) -> Tuple[int, float]:
+    """
+    Embed texts whose hash is not cached yet, committing every commit_every chunks
+    
+    Returns:
+        (number of embedded chunks, seconds spent embedding)
+    """
+    cached = state.cached_hashes(list(texts_by_hash))
+    missing = [h for h in texts_by_hash if h not in cached]
+    if not missing:
+        return 0, 0.0
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    pool = model.start_multi_process_pool(["cpu"] * processes) if processes > 1 else None
+
+    start = time.perf_counter()
+    done = 0
+    try:
+        for hashes in batched(missing, commit_every):
+            embeddings = model.encode(
+                [texts_by_hash[h] for h in hashes],
+                batch_size=batch_size,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+                pool=pool
+            )
+            state.put_embeddings(hashes, embeddings)
+            done += len(hashes)
+            elapsed = time.perf_counter() - start
+            print(f"   ⏳ {done}/{len(missing)} chunks ({done / elapsed:.1f} chunks/s)")
+    finally:
+        if pool is not None:
+            SentenceTransformer.stop_multi_process_pool(pool)
+
+    return done, time.perf_counter() - start
+
+def seed_from_collection(collection, state: IndexState, model_prefix: str):
+    """Cache the embeddings already stored in the collection, keyed by their document hash"""
+    data = collection.get(include=['embeddings', 'documents'])
+    hashes = [sha256(model_prefix + document) for document in data['documents']]
+    state.put_embeddings(hashes, np.asarray(data['embeddings'], dtype=np.float32))
+    print(f"   ♻️  Đã tái sử dụng {len(hashes)} embeddings có sẵn trong collection")
+
+def build_index(
+    chunks: List[Dict],
+    collection_name: str,
+    state: IndexState,
+    batch_size: int = 32,
+    processes: int = 1,
+    commit_every: int = 256,
+    full_rebuild: bool = False,
+    chroma_path: Optional[Path] = None
+) -> Dict:
+    """
+    Bring the collection in sync with the chunks, touching only what changed
+    
+    Args:
+        chroma_path: ChromaDB directory (default CHROMADB_PATH; a versioned index directory)
+    
+    Returns:
+        Stats dict
+    """
+    import chromadb
+
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(path=str(chroma_path or settings.CHROMADB_PATH))
+    # Manifest rows are per ChromaDB directory: a new index version starts empty
+    # (its embeddings still come from the content-hash cache)
+    manifest_key = collection_name if chroma_path is None else f"{chroma_path}:{collection_name}"
+    if full_rebuild:
+        try:
+            client.delete_collection(collection_name)
+        except Exception:
+            pass
+        state.reset_manifest(manifest_key)
+    collection = client.get_or_create_collection(
+        name=collection_name,
+        metadata={"description": COLLECTION_DESCRIPTION}
+    )
+
+    # Hash every chunk: content hash decides re-embedding, metadata hash decides re-upsert
+    model_prefix = f"{settings.EMBEDDING_MODEL}\x00"
+    rows = []
+    for i, chunk in enumerate(chunks):
+        document = chunk_document(chunk)
+        rows.append((
+            f"chunk_{i}",
+            document,
+            chunk['metadata'],
+            sha256(model_prefix + document),
+            sha256(json.dumps(chunk['metadata'], ensure_ascii=False, sort_keys=True))
+        ))
+
+    # First run against a collection built elsewhere: reuse its stored embeddings
+    manifest = state.manifest(manifest_key)
+    if not manifest and collection.count():
+        seed_from_collection(collection, state, model_prefix)
+    
+    changed = [row for row in rows if manifest.get(row[0]) != (row[3], row[4])]
+    current_ids = {row[0] for row in rows}
+    stale_ids = [chunk_id for chunk_id in manifest if chunk_id not in current_ids]
+
+    # Step 1: Embed new / modified content only
+    n_embedded, embed_seconds = embed_missing(
+        {row[3]: row[1] for row in changed}, state, batch_size, processes, commit_every
+    )
+
+    # Step 2: Bulk upsert changed chunks
+    upsert_batch = min(client.get_max_batch_size(), 5000)
+    for batch in batched(changed, upsert_batch):
+        collection.upsert(
+            ids=[row[0] for row in batch],
+            embeddings=state.get_embeddings([row[3] for row in batch]),
+            documents=[row[1] for row in batch],
+            metadatas=[row[2] for row in batch]
+        )
+        state.update_manifest(manifest_key, [(row[0], row[3], row[4]) for row in batch])
+
+    # Step 3: Remove chunks that no longer exist
+    for batch in batched(stale_ids, upsert_batch):
+        collection.delete(ids=batch)
+        state.delete_from_manifest(manifest_key, batch)
+
+    total_seconds = time.perf_counter() - start
+    return {
+        "chunks": len(rows),
+        "embedded": n_embedded,
+        "upserted": len(changed),
+        "deleted": len(stale_ids),
+        "unchanged": len(rows) - len(changed),
+        "embed_seconds": round(embed_seconds, 2),
+        "embed_chunks_per_second": round(n_embedded / embed_seconds, 1) if embed_seconds else None,
+        "total_seconds": round(total_seconds, 2),
+        "collection_count": collection.count()
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally build the law vector index")
+    parser.add_argument("--chunks", type=Path, default=settings.LAW_CHUNKS_PATH, help=".json or .jsonl")
+    parser.add_argument("--raw-text", type=Path, help="Parse and chunk this law text instead of reading --chunks")
+    parser.add_argument(
+        "--structure", type=Path, default=settings.LAW_STRUCTURE_PATH,
+        help="law_structure.json copied into --index-version (parsed from --raw-text if given)"
+    )
+    parser.add_argument("--collection", default=settings.COLLECTION_NAME)
+    parser.add_argument("--state", type=Path, default=settings.INDEX_STATE_PATH)
+    parser.add_argument("--batch-size", type=int, default=32, help="Encode batch size")
+    parser.add_argument("--processes", type=int, default=1, help="CPU worker processes for encoding")
+    parser.add_argument("--commit-every", type=int, default=256, help="Chunks embedded between checkpoints")
+    parser.add_argument("--full-rebuild", action="store_true", help="Drop the collection first (cached embeddings are reused)")
+    parser.add_argument("--export-numpy", action="store_true", help="Also export the NumPy index")
+    parser.add_argument("--build-bm25", action="store_true", help="Also rebuild the BM25 index")
+    parser.add_argument(
+        "--index-version", 
+        help="Build a new versioned index in INDEX_ROOT/<version> (ChromaDB + BM25 + structure [+ NumPy]), served after a swap"
+    )
+    parser.add_argument("--activate", action="store_true", help="Point INDEX_ROOT/CURRENT at --index-version when done")
+    args = parser.parse_args()
+
+    chroma_path = None
+    numpy_path = settings.NUMPY_INDEX_PATH
+    bm25_path = settings.BM25_INDEX_PATH
+    if args.index_version:
+        from app.core.index_manager import BM25_FILE, CHROMA_DIR, NUMPY_DIR
+        version_dir = settings.INDEX_ROOT / args.index_version
+        chroma_path, numpy_path, bm25_path = version_dir / CHROMA_DIR, version_dir / NUMPY_DIR, version_dir / BM25_FILE
+        # A version directory is self-contained; BM25 only covers the primary collection
+        args.build_bm25 = args.build_bm25 or args.collection == settings.COLLECTION_NAME
+        print(f"📦 Phiên bản index '{args.index_version}' → {version_dir}")
+
+    print(f"🔄 Đang đọc chunks từ {args.raw_text or args.chunks}...")
+    chunks = load_chunks(args.chunks, args.raw_text)
+
+    print(f"🔄 Đang đồng bộ collection '{args.collection}' ({len(chunks)} chunks)...")
+    stats = build_index(
+        chunks,
+        args.collection,
+        IndexState(args.state),
+        batch_size=args.batch_size,
+        processes=args.processes,
+        commit_every=args.commit_every,
+        full_rebuild=args.full_rebuild,
+        chroma_path=chroma_path
+    )
+
+    print(f"\n📊 Thống kê:")
+    for key, value in stats.items():
+        print(f"  - {key}: {value}")
+
+    if args.export_numpy:
+        from build_numpy_index import export_collection
+        print(f"\n🔄 Đang xuất NumPy index sang {numpy_path}...")
+        export_collection(numpy_path, chroma_path=chroma_path)
+
+    if args.build_bm25 and args.collection != settings.COLLECTION_NAME:
+        print(f"\n⚠️ Bỏ qua BM25: index BM25 chỉ dành cho collection chính '{settings.COLLECTION_NAME}'")
+    elif args.build_bm25:
+        from app.core.lexical_index import BM25Index
+        from app.core.lexical_index import chunk_search_text
+        print(f"\n🔄 Đang xây dựng BM25 index {bm25_path}...")
+        BM25Index.build(
+            (f"chunk_{i}", chunk_search_text(chunk['content'], chunk['metadata']))
+            for i, chunk in enumerate(chunks)
+        ).save(bm25_path)
+
+    if args.index_version and args.collection == settings.COLLECTION_NAME:
+        # Structure index and context builder of this version read the same chunk_<i> order
+        from app.core.index_manager import CHUNKS_FILE, STRUCTURE_FILE
+        from law_parser import parse_law_document, save_chunks_to_json, save_structure_to_json
+        version_dir = settings.INDEX_ROOT / args.index_version
+        if args.raw_text is not None:
+            structure = parse_law_document(args.raw_text.read_text(encoding='utf-8'))
+        else:
+            with open(args.structure, 'r', encoding='utf-8') as f:
+                structure = json.load(f)
+        save_chunks_to_json(chunks, version_dir / CHUNKS_FILE)
+        save_structure_to_json(structure, version_dir / STRUCTURE_FILE)
+
+    if args.index_version and args.activate:
+        from app.core.index_manager import POINTER_FILE
+        # Atomic pointer update: the watcher / next start never reads a partial name
+        pointer = settings.INDEX_ROOT / POINTER_FILE
+        tmp_pointer = pointer.with_suffix(".tmp")
+        tmp_pointer.write_text(args.index_version, encoding="utf-8")
+        tmp_pointer.replace(pointer)
+        print(f"\n🔁 CURRENT → {args.index_version} (hot-swap: INDEX_WATCH_ENABLED hoặc POST /api/admin/index/swap)")
+
+    print(f"\n✅ Hoàn thành!")
@@ -0,0 +1,55 @@
+"""
+Export the ChromaDB law collection to a memory-mapped NumPy index
+
+Usage (from backend/):
+    python scripts/build_numpy_index.py [--dtype float16] [--output data/law_numpy_index]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings
+from app.core.vector_store import save_numpy_index
+
+def export_collection(output: Path, dtype: str = "float32", chroma_path: Optional[Path] = None) -> int:
+    """
+    Read every chunk (embedding, document, metadata) from ChromaDB and write a NumPy index
+    
+    Args:
+        chroma_path: ChromaDB directory (default CHROMADB_PATH)
+    
+    Returns:
+        Number of exported chunks
+    """
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(chroma_path or settings.CHROMADB_PATH))
+    collection = client.get_collection(name=settings.COLLECTION_NAME)
+    data = collection.get(include=['embeddings', 'documents', 'metadatas'])
+
+    save_numpy_index(
+        output,
+        ids=data['ids'],
+        embeddings=data['embeddings'],
+        documents=data['documents'],
+        metadatas=data['metadatas'],
+        name=settings.COLLECTION_NAME,
+        version=f"{collection.id}-{int(time.time())}",
+        dtype=dtype
+    )
+    return len(data['ids'])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export ChromaDB collection to a NumPy index")
+    parser.add_argument("--output", type=Path, default=settings.NUMPY_INDEX_PATH)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    args = parser.parse_args()
+
+    print(f"🔄 Đang xuất collection '{settings.COLLECTION_NAME}' sang {args.output} ({args.dtype})...")
+    start = time.perf_counter()
+    n_chunks = export_collection(args.output, args.dtype)
+    print(f"✅ Đã xuất {n_chunks} chunks trong {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,111 @@
+"""
+Shared embedding server: one process owns the embedding model, API workers
+encode through a Unix socket (EMBEDDING_BACKEND=remote).
+
+Requests from all connections go through one EmbeddingBatcher, so concurrent
+queries from different workers are encoded as a single batch.
+
+Usage (from backend/):
+    python scripts/embedding_server.py --backend sentence_transformers
+    EMBEDDING_BACKEND=remote uvicorn app.main:app --workers 8
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings
+
+async def handle_client(reader, writer, model, batcher, stats):
+    """Serve requests of one connection until it closes"""
+    from app.core.embedding_remote import aread_message, pack_message
+    from app.core.executor import run_blocking
+
+    try:
+        while True:
+            try:
+                request, _ = await aread_message(reader)
+            except asyncio.IncompleteReadError:
+                return
+
+            try:
+                if request["op"] == "encode":
+                    texts = request["texts"]
+                    start = time.perf_counter()
+                    if request.get("normalize", True):
+                        # Batched together with the other clients' queries
+                        vectors = await asyncio.gather(*(batcher.encode(text) for text in texts))
+                    else:
+                        vectors = await run_blocking(
+                            model.encode, texts, batch_size=settings.EMBEDDING_BATCH_MAX_SIZE, show_progress_bar=False
+                        )
+                    embeddings = np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+                    stats["requests"] += 1
+                    stats["texts"] += len(texts)
+                    stats["encode_seconds"] += time.perf_counter() - start
+                    writer.write(pack_message({"shape": list(embeddings.shape)}, embeddings.tobytes()))
+                elif request["op"] == "info":
+                    writer.write(pack_message({
+                        "model": settings.EMBEDDING_MODEL,
+                        "backend": settings.EMBEDDING_BACKEND,
+                        "dimension": model.get_sentence_embedding_dimension(),
+                        "pid": os.getpid(),
+                        **stats,
+                        "batcher": batcher.stats()
+                    }))
+                else:
+                    writer.write(pack_message({"error": f"unknown op {request['op']!r}"}))
+            except Exception as e:
+                writer.write(pack_message({"error": str(e)}))
+            await writer.drain()
+    finally:
+        writer.close()
+
+async def serve(socket_path: Path):
+    from app.core.embedding_batcher import get_embedding_batcher
+    from app.core.embedding_model import get_embedding_model
+
+    model = get_embedding_model()
+    batcher = get_embedding_batcher()
+    model.encode("khởi động", normalize_embeddings=True)  # warm-up
+    stats = {"requests": 0, "texts": 0, "encode_seconds": 0.0}
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        socket_path.unlink()  # stale socket of a previous run
+    server = await asyncio.start_unix_server(
+        lambda r, w: handle_client(r, w, model, batcher, stats),
+        path=str(socket_path)
+    )
+    print(f"✅ Embedding server ({settings.EMBEDDING_BACKEND}) listening on {socket_path}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with server:
+        await stop.wait()
+    await batcher.stop()
+    socket_path.unlink(missing_ok=True)
+    print("👋 Embedding server stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared embedding server over a Unix socket")
+    parser.add_argument("--socket", type=Path, default=settings.EMBEDDING_SERVER_SOCKET)
+    parser.add_argument(
+        "--backend", default="sentence_transformers",
+        choices=["sentence_transformers", "onnx", "onnx_int8"],
+        help="Model implementation loaded by the server"
+    )
+    args = parser.parse_args()
+
+    settings.EMBEDDING_BACKEND = args.backend
+    asyncio.run(serve(args.socket))
@@ -0,0 +1,205 @@
+"""
+Export bge-m3 to ONNX (fp32 + int8 dynamic quantization) and benchmark it
+against the full-precision SentenceTransformer model.
+
+Measures load time, single-query latency, batch throughput, resident memory
+and retrieval agreement (top-k overlap on the law collection) on a fixed
+Vietnamese query set. Each backend runs in its own subprocess so memory is
+measured in isolation.
+
+Usage (from backend/):
+    pip install onnx onnxruntime
+    python scripts/export_onnx_embedding.py export      # → data/onnx/bge-m3/{model.onnx, model_int8.onnx}
+    python scripts/export_onnx_embedding.py benchmark [--k 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.core.config import settings
+
+BENCHMARK_QUERIES = [
+    "Điều kiện lái xe ô tô là gì?",
+    "Người bao nhiêu tuổi được lái xe mô tô?",
+    "Nồng độ cồn khi lái xe bị cấm như thế nào?",
+    "Xe ô tô được chạy tốc độ tối đa bao nhiêu?",
+    "Quy định về đội mũ bảo hiểm khi đi xe máy",
+    "Giấy phép lái xe hạng B2 được lái những loại xe nào?",
+    "Khi nào được vượt xe khác?",
+    "Quy tắc nhường đường tại nơi giao nhau",
+    "Người đi bộ phải đi ở đâu?",
+    "Các hành vi bị nghiêm cấm trong giao thông đường bộ",
+    "Xe ưu tiên gồm những loại xe nào?",
+    "Điều kiện để xe cơ giới tham gia giao thông",
+    "Trách nhiệm của người lái xe khi xảy ra tai nạn giao thông",
+    "Dừng xe, đỗ xe trên đường phố được quy định thế nào?",
+    "Quy định về chở người trên xe mô tô",
+    "Hệ thống báo hiệu đường bộ gồm những gì?",
+    "Xe thô sơ tham gia giao thông phải tuân thủ gì?",
+    "Thời gian làm việc của người lái xe ô tô",
+    "Sử dụng đèn chiếu sáng khi lái xe ban đêm",
+    "Đường cao tốc có những quy định riêng nào?",
+]
+
+def export(output_dir: Path, opset: int = 17):
+    """Export the transformer to ONNX, then quantize weights to int8"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(settings.EMBEDDING_MODEL, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model[0].tokenizer
+    tokenizer.save_pretrained(str(output_dir))  # writes tokenizer.json
+
+    dummy = tokenizer(["xin chào", "luật giao thông đường bộ"], padding=True, return_tensors="pt")
+    fp32_path = output_dir / "model.onnx"
+    print(f"🔄 Đang export ONNX fp32 → {fp32_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+
+    int8_path = output_dir / "model_int8.onnx"
+    print(f"🔄 Đang lượng tử hóa int8 → {int8_path}...")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+
+    for path in output_dir.iterdir():
+        print(f"   {path.name}: {path.stat().st_size / 1024 ** 2:.1f} MB")
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_backend(backend: str, output_file: Path) -> dict:
+    """
+    Benchmark one backend in this process; query embeddings are saved for the agreement check
+    
+    settings is built at import time, so EMBEDDING_BACKEND comes from the
+    environment the parent process started us with.
+    """
+    if settings.EMBEDDING_BACKEND != backend:
+        raise RuntimeError(f"EMBEDDING_BACKEND is '{settings.EMBEDDING_BACKEND}', expected '{backend}'")
+    rss_before = rss_mb()
+
+    start = time.perf_counter()
+    from app.core.embedding_model import get_embedding_model
+    model = get_embedding_model()
+    load_s = time.perf_counter() - start
+
+    model.encode(BENCHMARK_QUERIES[0], normalize_embeddings=True)  # warm-up
+
+    latencies = []
+    for query in BENCHMARK_QUERIES:
+        t = time.perf_counter()
+        model.encode(query, normalize_embeddings=True)
+        latencies.append((time.perf_counter() - t) * 1000)
+
+    with open(settings.LAW_CHUNKS_PATH, 'r', encoding='utf-8') as f:
+        passages = [chunk['content'] for chunk in json.load(f)][:256]
+    t = time.perf_counter()
+    model.encode(passages, batch_size=32, normalize_embeddings=True)
+    throughput = len(passages) / (time.perf_counter() - t)
+
+    embeddings = model.encode(BENCHMARK_QUERIES, normalize_embeddings=True)
+    np.save(output_file, np.asarray(embeddings, dtype=np.float32))
+
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "passages_per_s": round(throughput, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+    }
+
+def benchmark(k: int, backends):
+    """Run every backend in a subprocess, then compare retrieval against the fp32 reference"""
+    import tempfile
+    from app.core.chromadb_client import get_collection
+
+    rows, embeddings = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            print(f"🔄 Đang benchmark '{backend}'...")
+            output_file = Path(tmp) / f"{backend}.npy"
+            stdout = subprocess.run(
+                [sys.executable, __file__, "_run", "--backend", backend, "--output", str(output_file)],
+                capture_output=True, text=True, cwd=BACKEND_DIR, check=True,
+                env={**os.environ, "EMBEDDING_BACKEND": backend}
+            ).stdout
+            rows.append(json.loads(stdout.strip().splitlines()[-1]))
+            embeddings[backend] = np.load(output_file)
+
+    # Retrieval agreement: same law collection, queries embedded by each backend
+    collection = get_collection()
+    reference = backends[0]
+    top_ids = {
+        backend: collection.query(query_embeddings=vectors.tolist(), n_results=k)['ids']
+        for backend, vectors in embeddings.items()
+    }
+    for row in rows:
+        backend = row["backend"]
+        overlaps = [
+            len(set(a) & set(b)) / k
+            for a, b in zip(top_ids[reference], top_ids[backend])
+        ]
+        row[f"top{k}_overlap"] = round(float(np.mean(overlaps)), 3)
+        row["top1_agree"] = round(float(np.mean([
+            a[0] == b[0] for a, b in zip(top_ids[reference], top_ids[backend])
+        ])), 3)
+        row["cos_to_fp32"] = round(float(np.mean(np.sum(embeddings[reference] * embeddings[backend], axis=1))), 4)
+
+    columns = list(rows[0].keys())
+    print("\n📊 Kết quả:")
+    print(" | ".join(f"{c:>14}" for c in columns))
+    for row in rows:
+        print(" | ".join(f"{str(row[c]):>14}" for c in columns))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and benchmark the ONNX embedding backend")
+    parser.add_argument("command", choices=["export", "benchmark", "_run"])
+    parser.add_argument("--output-dir", type=Path, default=settings.ONNX_MODEL_PATH)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=["sentence_transformers", "onnx", "onnx_int8"])
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--output", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export(args.output_dir)
+        print("✅ Hoàn thành!")
+    elif args.command == "benchmark":
+        benchmark(args.k, args.backends)
+    else:
+        print(json.dumps(run_backend(args.backend, args.output)))
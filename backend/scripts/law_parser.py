@@ -170,6 +170,141 @@ def flatten_to_chunks(structure):
     
     return chunks
 
+# Một pattern gộp cho cả 4 loại dòng cấu trúc (biên dịch một lần, một lần match mỗi dòng)
+LINE_PATTERN = re.compile(
+    r'^(?:Chương\s+(?P<chapter>[IVXLCDM]+)\s+(?P<chapter_title>.+)'
+    r'|Điều\s+(?P<article>\d+[a-z]?)\.\s+(?P<article_title>.+)'
+    r'|(?P<clause>\d+)\.\s+(?P<clause_content>.+)'
+    r'|(?P<point>[a-zđ])\.\s+(?P<point_content>.+))$'
+)
+
+def iter_law_chunks(lines):
+    """
+    Parser streaming: đọc từng dòng và yield chunk ngay khi chunk hoàn chỉnh
+    
+    Cho ra cùng các chunk (cùng thứ tự, cùng metadata) như
+    flatten_to_chunks(parse_law_document(text)) nhưng không dựng cây cấu
+    trúc trong bộ nhớ, nên bộ nhớ không phụ thuộc độ dài văn bản.
+    
+    Khác biệt duy nhất: các dòng nằm giữa tiêu đề Chương và Điều đầu tiên
+    bị bỏ qua thay vì bị nối vào điểm cuối cùng của chương trước.
+    
+    Args:
+        lines: Iterable các dòng văn bản (vd. file object)
+        
+    Yields:
+        dict: chunk với content và metadata
+    """
+    chapter = None        # (number, title)
+    article = None        # dict: number, title, content, has_clauses, in_structure
+    clause = None         # dict: number, content, has_points
+    
+    def article_metadata():
+        return {
+            'chapter_number': article['chapter'][0],
+            'chapter_title': article['chapter'][1],
+            'article_number': article['number'],
+            'article_title': article['title'],
+        }
+    
+    def close_clause():
+        # Khoản không có điểm con → 1 chunk
+        if clause and not clause['has_points'] and article['in_structure']:
+            metadata = article_metadata()
+            metadata['clause_number'] = clause['number']
+            metadata['full_reference'] = (f"Chương {metadata['chapter_number']}, "
+                                          f"Điều {article['number']}, Khoản {clause['number']}")
+            return {'content': clause['content'], 'metadata': metadata}
+        return None
+    
+    def close_article():
+        # Điều có nội dung trực tiếp và không có khoản → 1 chunk
+        if article and article['content'] and not article['has_clauses'] and article['in_structure']:
+            metadata = article_metadata()
+            metadata['full_reference'] = f"Chương {metadata['chapter_number']}, Điều {article['number']}"
+            return {'content': article['content'], 'metadata': metadata}
+        return None
+    
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        
+        match = LINE_PATTERN.match(line)
+        kind = match.lastgroup if match else None
+        
+        if kind == 'chapter_title':
+            for chunk in (close_clause(), close_article()):
+                if chunk:
+                    yield chunk
+            chapter = (match.group('chapter'), match.group('chapter_title').strip())
+            article, clause = None, None
+            continue
+        
+        if kind == 'article_title':
+            for chunk in (close_clause(), close_article()):
+                if chunk:
+                    yield chunk
+            article = {
+                'number': match.group('article'),
+                'title': match.group('article_title').strip(),
+                'content': '',
+                'has_clauses': False,
+                'chapter': chapter,
+                'in_structure': chapter is not None
+            }
+            clause = None
+            continue
+        
+        if kind == 'clause_content' and article:
+            chunk = close_clause()
+            if chunk:
+                yield chunk
+            article['has_clauses'] = True
+            clause = {
+                'number': match.group('clause'),
+                'content': match.group('clause_content').strip(),
+                'has_points': False
+            }
+            continue
+        
+        if kind == 'point_content' and clause:
+            clause['has_points'] = True
+            if article['in_structure']:
+                metadata = article_metadata()
+                metadata['clause_number'] = clause['number']
+                metadata['point_letter'] = match.group('point')
+                metadata['full_reference'] = (f"Chương {metadata['chapter_number']}, Điều {article['number']}, "
+                                              f"Khoản {clause['number']}, Điểm {metadata['point_letter']}")
+                yield {'content': match.group('point_content').strip(), 'metadata': metadata}
+            continue
+        
+        # Nội dung thuộc về Điều (không có khoản con)
+        if article and not clause:
+            article['content'] = f"{article['content']} {line}" if article['content'] else line
+        # Nội dung tiếp theo của khoản
+        elif clause and kind != 'point_content':
+            clause['content'] += ' ' + line
+    
+    for chunk in (close_clause(), close_article()):
+        if chunk:
+            yield chunk
+
+def iter_law_chunks_from_file(input_file):
+    """Đọc file văn bản luật từng dòng và yield chunk (bộ nhớ không đổi)"""
+    with open(input_file, 'r', encoding='utf-8') as f:
+        yield from iter_law_chunks(f)
+
+def save_chunks_to_jsonl(chunks, output_file='../data/processed/law_chunks.jsonl'):
+    """Ghi chunks ra file JSON Lines (mỗi dòng 1 chunk), ghi dần khi chunk được tạo"""
+    count = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk, ensure_ascii=False) + '\n')
+            count += 1
+    print(f"✓ Đã lưu {count} chunks vào {output_file}")
+    return count
+
 def save_structure_to_json(structure, output_file='../data/processed/law_structure.json'):
     """Lưu cấu trúc ra file JSON"""
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -185,6 +320,21 @@ def save_chunks_to_json(chunks, output_file='../data/processed/law_chunks.json')
 
 # ===== MAIN EXECUTION =====
 if __name__ == "__main__":
+    import sys
+    
+    # Chế độ streaming: python law_parser.py --stream [input.txt ...] → law_chunks.jsonl
+    if '--stream' in sys.argv:
+        inputs = [arg for arg in sys.argv[1:] if arg != '--stream'] or ['../data/raw/raw_text.txt']
+        
+        def all_chunks():
+            for input_file in inputs:
+                print(f"🔍 Đang parse {input_file}...")
+                yield from iter_law_chunks_from_file(input_file)
+        
+        save_chunks_to_jsonl(all_chunks())
+        print(f"\n✅ Hoàn thành!")
+        sys.exit(0)
+    
     # Đọc file văn bản
     with open('../data/raw/raw_text.txt', 'r', encoding='utf-8') as f:
         text = f.read()
@@ -1,29 +1,177 @@
-import pdfplumber
+import argparse
+import hashlib
+import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import pdfplumber
+
+# Các mẫu header/footer và số trang (biên dịch một lần)
+NOISE_PATTERNS = [re.compile(pattern) for pattern in [
+    r'\d+ CÔNG BÁO/Số \d+ \+ \d+/Ngày \d+-\d+-\d+',  # 58 CÔNG BÁO/Số 1215 + 1216/Ngày 27-11-2023
+    r'CÔNG BÁO/Số \d+ \+ \d+/Ngày \d+-\d+-\d+ \d+',  # CÔNG BÁO/Số 1215 + 1216/Ngày 27-11-2023 69
+    r'CÔNG BÁO/Số \d+ \+ \d+/Ngày \d+-\d+-\d+',  # CÔNG BÁO/Số 1215 + 1216/Ngày 27-11-2023
+    r'--- Page \d+ ---',  # --- Page 12 ---
+    r'--- Trang \d+ ---',  # --- Trang 1 ---
+]]
+STANDALONE_NUMBER_PATTERN = re.compile(r'^\s*\d+\s*$', re.MULTILINE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+INLINE_SPACES_PATTERN = re.compile(r'[ \t]+')
+BLANK_LINES_PATTERN = re.compile(r'\n\s*\n+')
+UNFINISHED_LINE_PATTERN = re.compile(r'(\w+)\n(\w+)')
+POINT_LINE_PATTERN = re.compile(r'([a-z]\.)\s*\n')
+# Dòng mở đầu Chương / Điều / Khoản / Điểm: không bao giờ gộp vào dòng trước
+STRUCTURE_LINE = r'(?:Chương\s+[IVXLCDM]+\b|Điều\s+\d+[a-z]?\.|\d+\.\s|[a-zđ][.)]\s)'
+PAGE_UNFINISHED_LINE_PATTERN = re.compile(r'(\w+)\n(?!' + STRUCTURE_LINE + r')(\w+)')
+# Dòng chỉ có ký hiệu điểm ("a.") nối với nội dung ở dòng sau
+PAGE_POINT_LINE_PATTERN = re.compile(r'^([a-zđ]\.)[ \t]*\n(?!' + STRUCTURE_LINE + r')', re.MULTILINE)
+
+
+def clean_page(text: str) -> str:
+    """
+    Làm sạch một trang (dùng trong pipeline streaming)
+
+    Xóa header/footer và số trang, gộp các dòng bị ngắt giữa câu như
+    smart_merge, nhưng không bao giờ gộp dòng mở đầu Chương/Điều/Khoản/Điểm
+    vào dòng trước, để law_parser vẫn nhận diện được cấu trúc theo từng dòng.
+    """
+    for pattern in NOISE_PATTERNS:
+        text = pattern.sub('', text)
+    text = STANDALONE_NUMBER_PATTERN.sub('', text)
+    text = INLINE_SPACES_PATTERN.sub(' ', text)
+    text = PAGE_UNFINISHED_LINE_PATTERN.sub(r'\1 \2', text)
+    text = PAGE_POINT_LINE_PATTERN.sub(r'\1 ', text)
+    text = BLANK_LINES_PATTERN.sub('\n', text)
+    return text.strip()
+
+
+def _extract_page_range(args: Tuple[str, int, int]) -> List[Tuple[int, str]]:
+    """Worker: trích xuất các trang [start, end) của một PDF (mỗi process tự mở file)"""
+    pdf_path, start, end = args
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for index in range(start, end):
+            page = pdf.pages[index]
+            pages.append((index + 1, page.extract_text() or ""))
+            page.close()  # Giải phóng cache của trang
+    return pages
+
 
 class PDFProcessor:
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, cache_dir: Optional[str] = None):
         self.pdf_path = pdf_path
         self.raw_text = ""
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         
     def extract_text(self) -> str:
         """Trích xuất toàn bộ văn bản từ PDF"""
         print("🔄 Đang trích xuất văn bản từ PDF...")
         
         try:
+            parts = []
             with pdfplumber.open(self.pdf_path) as pdf:
                 for page_num, page in enumerate(pdf.pages, 1):
                     text = page.extract_text()
                     if text:
-                        self.raw_text += f"\n--- Trang {page_num} ---\n{text}"
+                        parts.append(f"\n--- Trang {page_num} ---\n{text}")
                         print(f"✅ Đã xử lý trang {page_num}")
             
+            self.raw_text = "".join(parts)
             print(f"✅ Hoàn thành! Tổng số ký tự: {len(self.raw_text)}")
             return self.raw_text
             
         except Exception as e:
             print(f"❌ Lỗi khi trích xuất PDF: {e}")
             return ""
+
+    def file_hash(self) -> str:
+        """SHA-256 của file PDF (khóa cache)"""
+        digest = hashlib.sha256()
+        with open(self.pdf_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def iter_pages(self, workers: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Trích xuất từng trang theo đúng thứ tự, song song bằng process pool
+
+        Các trang đã trích xuất được cache theo hash của PDF, nên chạy lại
+        với tài liệu không đổi sẽ bỏ qua bước trích xuất.
+
+        Yields:
+            (số trang, văn bản thô của trang)
+        """
+        cache_file = None
+        if self.cache_dir is not None:
+            cache_file = self.cache_dir / f"{self.file_hash()}.jsonl"
+            if cache_file.exists():
+                print(f"♻️  Dùng cache {cache_file.name}")
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        page = json.loads(line)
+                        yield page['page'], page['text']
+                return
+
+        with pdfplumber.open(self.pdf_path) as pdf:
+            n_pages = len(pdf.pages)
+        workers = max(1, min(workers or os.cpu_count() or 1, n_pages))
+
+        # Chia thành nhiều đoạn nhỏ hơn số worker để cân bằng tải
+        range_size = max(1, -(-n_pages // (workers * 4)))
+        ranges = [(self.pdf_path, start, min(start + range_size, n_pages))
+                  for start in range(0, n_pages, range_size)]
+
+        tmp_cache = None
+        if cache_file is not None:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_cache = open(cache_file.with_suffix('.tmp'), 'w', encoding='utf-8')
+
+        try:
+            if workers == 1:
+                results = map(_extract_page_range, ranges)
+            else:
+                executor = ProcessPoolExecutor(max_workers=workers)
+                results = executor.map(_extract_page_range, ranges)  # map giữ nguyên thứ tự
+
+            for pages in results:
+                for page_num, text in pages:
+                    if tmp_cache is not None:
+                        tmp_cache.write(json.dumps({'page': page_num, 'text': text}, ensure_ascii=False) + '\n')
+                    yield page_num, text
+
+            if tmp_cache is not None:
+                tmp_cache.close()
+                cache_file.with_suffix('.tmp').replace(cache_file)
+                tmp_cache = None
+        finally:
+            if workers > 1:
+                executor.shutdown(cancel_futures=True)
+            if tmp_cache is not None:
+                # Bị dừng giữa chừng: không giữ cache dở dang
+                tmp_cache.close()
+                cache_file.with_suffix('.tmp').unlink(missing_ok=True)
+
+    def process_to_file(self, output_path: str, workers: Optional[int] = None) -> int:
+        """
+        Pipeline streaming: trích xuất song song → làm sạch từng trang → ghi dần ra file
+
+        Returns:
+            Số trang đã xử lý
+        """
+        print(f"🔄 Đang xử lý {self.pdf_path} (streaming)...")
+        n_pages = 0
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for page_num, text in self.iter_pages(workers):
+                cleaned = clean_page(text)
+                if cleaned:
+                    f.write(cleaned + '\n')
+                n_pages += 1
+        print(f"💾 Đã ghi {n_pages} trang vào: {output_path}")
+        return n_pages
     
     def clean_text(self) -> str:
         """Làm sạch văn bản"""
@@ -32,25 +180,14 @@ class PDFProcessor:
         cleaned = self.raw_text
         
         # Xóa các phần header/footer và số trang
-        patterns_to_remove = [
-            r'--- Page \d+ ---',  # --- Page 12 ---
-            r'CÔNG BÁO/Số \d+ \+ \d+/Ngày \d+-\d+-\d+ \d+',  # CÔNG BÁO/Số 1215 + 1216/Ngày 27-11-2023 69
-            r'CÔNG BÁO/Số \d+ \+ \d+/Ngày \d+-\d+-\d+',  # CÔNG BÁO/Số 1215 + 1216/Ngày 27-11-2023
-            r'\d+ CÔNG BÁO/Số \d+ \+ \d+/Ngày \d+-\d+-\d+',  # 58 CÔNG BÁO/Số 1215 + 1216/Ngày 27-11-2023
-            r'--- Trang \d+ ---',  # --- Trang 1 ---
-        ]
-        
-        for pattern in patterns_to_remove:
-            cleaned = re.sub(pattern, '', cleaned)
+        for pattern in NOISE_PATTERNS:
+            cleaned = pattern.sub('', cleaned)
         
-        # Xóa các số đứng riêng lẻ (thường là số trang)
-        cleaned = re.sub(r'^\d+$', '', cleaned, flags=re.MULTILINE)
-        
-        # Xóa các dòng chỉ chứa khoảng trắng và số
-        cleaned = re.sub(r'^\s*\d+\s*$', '', cleaned, flags=re.MULTILINE)
+        # Xóa các dòng chỉ chứa khoảng trắng và số (thường là số trang)
+        cleaned = STANDALONE_NUMBER_PATTERN.sub('', cleaned)
         
         # Chuẩn hóa khoảng trắng
-        cleaned = re.sub(r'\s+', ' ', cleaned)
+        cleaned = WHITESPACE_PATTERN.sub(' ', cleaned)
         
         # Xóa khoảng trắng thừa ở đầu và cuối
         cleaned = cleaned.strip()
@@ -60,10 +197,10 @@ class PDFProcessor:
 
     def smart_merge(self):
         # Gộp các dòng chưa kết thúc câu
-        self.raw_text = re.sub(r'(\w+)\n(\w+)', r'\1 \2', self.raw_text)
+        self.raw_text = UNFINISHED_LINE_PATTERN.sub(r'\1 \2', self.raw_text)
         
         # Giữ nguyên các đoạn được đánh số a, b, c...
-        self.raw_text = re.sub(r'([a-z]\.)\s*\n', r'\1 ', self.raw_text)
+        self.raw_text = POINT_LINE_PATTERN.sub(r'\1 ', self.raw_text)
     
         return self.raw_text
 
@@ -75,8 +212,25 @@ class PDFProcessor:
 
 # Sử dụng
 if __name__ == "__main__":
-    processor = PDFProcessor("data/raw/2008 Transport Law.pdf")
-    raw_text = processor.extract_text()
-    raw_text = processor.clean_text()
-    processor.smart_merge()
-    processor.save_raw_text("data/raw/pdf_raw_text.txt")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Trích xuất văn bản từ PDF")
+    parser.add_argument("pdfs", nargs="*", default=["data/raw/2008 Transport Law.pdf"])
+    parser.add_argument("--output", default="data/raw/pdf_raw_text.txt",
+                        help="File kết quả (khi chỉ có một PDF)")
+    parser.add_argument("--output-dir", help="Thư mục kết quả (<tên PDF>.txt cho mỗi PDF)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Trích xuất song song + làm sạch từng trang + ghi streaming")
+    parser.add_argument("--workers", type=int, default=None, help="Số process (mặc định: số CPU)")
+    parser.add_argument("--cache-dir", default="data/cache/pdf_pages")
+    args = parser.parse_args()
+
+    for pdf_path in args.pdfs:
+        output = str(Path(args.output_dir) / f"{Path(pdf_path).stem}.txt") if args.output_dir else args.output
+        processor = PDFProcessor(pdf_path, cache_dir=args.cache_dir if args.stream else None)
+
+        if args.stream:
+            processor.process_to_file(output, workers=args.workers)
+        else:
+            raw_text = processor.extract_text()
+            raw_text = processor.clean_text()
+            processor.smart_merge()
+            processor.save_raw_text(output)
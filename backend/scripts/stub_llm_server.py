@@ -0,0 +1,134 @@
+"""
+Stub OpenAI/Groq-compatible chat completion server for latency and failure testing
+
+Simulates response latency (base + jitter + occasional slow responses) and
+rate limiting (429 with Retry-After), for both regular and streamed completions.
+Point the API at it with GROQ_BASE_URL.
+
+Usage (from backend/):
+    python scripts/stub_llm_server.py --port 8100 --latency-ms 300 --slow-rate 0.05 --slow-ms 8000 --rate-limit-rate 0.1
+    GROQ_BASE_URL=http://127.0.0.1:8100 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Stub LLM server")
+config = argparse.Namespace(
+    latency_ms=300.0, jitter_ms=100.0, slow_rate=0.0, slow_ms=5000.0,
+    rate_limit_rate=0.0, retry_after=1.0, error_rate=0.0, tokens=60, token_interval_ms=10.0,
+    slow_models=""
+)
+counters: Dict[str, int] = {"requests": 0, "rate_limited": 0, "errors": 0, "slow": 0}
+
+FAKE_ANSWER = (
+    "Theo quy định tại [Điều 8, Khoản 2], hành vi này bị nghiêm cấm. "
+    "Người điều khiển phương tiện cần tuân thủ các quy tắc giao thông đường bộ."
+)
+
+def latency_seconds(model: str) -> float:
+    """Base latency + jitter; a fraction of requests (or all, for slow models) are slow"""
+    if random.random() < config.slow_rate or model in config.slow_models.split(","):
+        counters["slow"] += 1
+        return config.slow_ms / 1000
+    return max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+
+def answer_tokens(n: int):
+    words = FAKE_ANSWER.split(" ")
+    return [(" " if i else "") + words[i % len(words)] for i in range(n)]
+
+def completion_body(model: str, content: str) -> Dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 500, "completion_tokens": config.tokens, "total_tokens": 500 + config.tokens}
+    }
+
+def chunk_body(chunk_id: str, model: str, delta: Dict, finish_reason=None) -> str:
+    body = {
+        "id": chunk_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+    return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    model = payload.get("model", "stub")
+    counters["requests"] += 1
+
+    if random.random() < config.rate_limit_rate:
+        counters["rate_limited"] += 1
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": str(config.retry_after)},
+            content={"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded"}}
+        )
+    if random.random() < config.error_rate:
+        counters["errors"] += 1
+        return JSONResponse(status_code=503, content={"error": {"message": "Service unavailable (stub)"}})
+
+    # Time to first token
+    await asyncio.sleep(latency_seconds(model))
+    tokens = answer_tokens(config.tokens)
+
+    if not payload.get("stream"):
+        await asyncio.sleep(config.tokens * config.token_interval_ms / 1000)
+        return completion_body(model, "".join(tokens))
+
+    async def events():
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        yield chunk_body(chunk_id, model, {"role": "assistant", "content": ""})
+        for token in tokens:
+            yield chunk_body(chunk_id, model, {"content": token})
+            await asyncio.sleep(config.token_interval_ms / 1000)
+        yield chunk_body(chunk_id, model, {}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/stats")
+async def stats():
+    return counters
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stub Groq/OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Std-dev of the latency")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of slow responses")
+    parser.add_argument("--slow-ms", type=float, default=5000.0, help="Latency of slow responses")
+    parser.add_argument("--slow-models", default="", help="Comma-separated models that are always slow")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of 429 responses (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument("--tokens", type=int, default=60, help="Tokens per answer")
+    parser.add_argument("--token-interval-ms", type=float, default=10.0, help="Delay between streamed tokens")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (reproducible latency/failures)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    random.seed(args.seed)
+    vars(config).update({k: v for k, v in vars(args).items() if k not in ("host", "port", "seed")})
+    print(f"🧪 Stub LLM server on http://{args.host}:{args.port} ({vars(config)})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")